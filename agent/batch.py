@@ -0,0 +1,282 @@
+"""
+Batch Runner - Full OPT pipeline over a JSONL file of business profiles
+
+Each line is a profile whose OPT fields are already known, so discovery is
+skipped: memory is filled directly and analysis → masterplan → code →
+deployment run unattended. Profiles are processed on a bounded worker pool,
+each in its own output directory with its session in a shared session
+store, and a summary report with per-stage timings is written at the end.
+Every agent shares one set of tools on the runner's LLM client.
+
+Batch LLM calls run at 'batch' priority, so interactive sessions sharing the
+process go first, and new profiles are held while the LLM scheduler reports
+backpressure. A profile whose call is refused because the queue is full is
+requeued (stages already checkpointed are not generated again) and marked
+failed once it has been requeued busy_retries times.
+
+Profile format (one JSON object per line):
+    {"id": "bakery-01",
+     "operating_model": {"business_type": ..., "business_size": ..., "tools_used": ..., "pain_points": ...},
+     "process": {"name": ..., "description": ..., "frequency": ..., "time_spent": ...},
+     "task": {"name": ..., "description": ..., "inputs": ..., "outputs": ...},
+     "choice": 1}
+"choice" (which suggestion to build, default 1) is optional.
+"""
+
+import os
+import re
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from agent.core import AgentTools, OPTAgent
+from agent.pipeline import GenerationPipeline
+from memory.session_store import SessionStore
+from tools.discovery_tool import OPT_FIELDS
+from tools.llm_client import get_shared_client
+from tools.llm_metrics import bind_session
+from tools.llm_scheduler import SchedulerBusy, llm_priority
+
+
+STAGES = ('analysis',) + GenerationPipeline.STAGES
+
+
+def load_profiles(path: str) -> list:
+    """
+    Read business profiles from a JSONL file
+
+    Args:
+        path: JSONL file, one profile per line (blank lines are skipped)
+
+    Returns:
+        List of profile dicts
+    """
+    profiles = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                profiles.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{line_number}: invalid JSON ({e.msg})")
+    return profiles
+
+
+class BatchRunner:
+    def __init__(self, workers: int = 4, output_root: str = os.path.join("output", "batch"), llm=None,
+                 session_store: SessionStore = None, busy_retries: int = 3):
+        """
+        Initialize the batch runner
+
+        Args:
+            workers: Profiles processed at the same time
+            output_root: Directory for per-profile outputs and the summary
+            llm: LLMClient shared by every agent (defaults to the process-wide client)
+            session_store: Store every profile's session is saved to
+                (defaults to sessions.db in output_root)
+            busy_retries: Times a profile is requeued after the LLM queue
+                refused one of its calls
+        """
+        self.workers = max(1, workers)
+        self.output_root = output_root
+        self.llm = llm or get_shared_client()
+        self.tools = AgentTools(self.llm)
+        self.session_store = session_store or SessionStore(os.path.join(output_root, "sessions.db"))
+        self.busy_retries = max(0, busy_retries)
+
+    def _profile_id(self, profile: dict, index: int) -> str:
+        """Filesystem-safe id for a profile (never empty, '.' or '..')"""
+        fallback = f"profile_{index:04d}"
+        raw = str(profile.get('id') or fallback)
+        return re.sub(r'[^A-Za-z0-9_.-]+', '_', raw).strip('.') or fallback
+
+    def _profile_ids(self, profiles: list) -> list:
+        """Ids for every profile, a repeated id getting its index appended so no two share an output directory"""
+        ids = []
+        taken = set()
+        for index, profile in enumerate(profiles):
+            profile_id = self._profile_id(profile, index)
+            # Case-insensitive filesystems would merge "Bakery" and "bakery"
+            while profile_id.lower() in taken:
+                profile_id = f"{profile_id}_{index:04d}"
+            taken.add(profile_id.lower())
+            ids.append(profile_id)
+        return ids
+
+    def _fill_memory(self, agent: OPTAgent, profile: dict):
+        """Load the profile's OPT fields into memory and skip discovery"""
+        missing = [f"{section}.{field}" for section, field, _, _ in OPT_FIELDS
+                   if not (profile.get(section) or {}).get(field)]
+        if missing:
+            raise ValueError(f"missing OPT fields: {', '.join(missing)}")
+
+        memory = agent.memory
+        updaters = {
+            'operating_model': memory.update_operating_model,
+            'process': memory.update_process,
+            'task': memory.update_task
+        }
+        for section, field, _, _ in OPT_FIELDS:
+            updaters[section](field, profile[section][field])
+        for section in updaters:
+            memory.mark_phase_complete(section)
+
+        memory.transition_phase('analysis')
+
+    def run_profile(self, profile: dict, index: int, profile_id: str = None) -> dict:
+        """
+        Run analysis → masterplan → code → deployment for one profile
+
+        Args:
+            profile: Profile dict (see module docstring)
+            index: Position in the input file
+            profile_id: Id naming its output directory (defaults to the
+                profile's own id, made filesystem-safe)
+
+        Returns:
+            Result dict with status, chosen suggestion, output directory and stage timings
+        """
+        profile_id = profile_id or self._profile_id(profile, index)
+        output_dir = os.path.join(self.output_root, profile_id)
+        result = {
+            'id': profile_id,
+            'status': 'ok',
+            'error': None,
+            'output_dir': output_dir,
+            'session_id': None,
+            'chosen': None,
+            'code_valid': None,
+            'timings': {},
+            'attempts': 0,
+            'llm': None
+        }
+        started = time.time()
+
+        agent = None
+        while True:
+            self._wait_for_capacity()
+            result['attempts'] += 1
+            try:
+                agent = OPTAgent(tools=self.tools, speculative_masterplans=0, pipeline_mode=False,
+                                 output_dir=output_dir, session_store=self.session_store)
+                result['session_id'] = agent.session_id
+                self._fill_memory(agent, profile)
+                with bind_session(agent.memory.llm_metrics), llm_priority('batch'):
+                    self._run_stages(agent, profile, result)
+            except SchedulerBusy as e:
+                if result['attempts'] <= self.busy_retries:
+                    print(f"⏸️ Profile {profile_id} requeued: {str(e)}")
+                    continue
+                result['status'] = 'failed'
+                result['error'] = f"LLM queue full after {result['attempts']} attempts: {str(e)}"
+                print(f"❌ Profile {profile_id} failed: {result['error']}")
+            except Exception as e:
+                result['status'] = 'failed'
+                result['error'] = str(e)
+                print(f"❌ Profile {profile_id} failed: {str(e)}")
+            break
+
+        if agent is not None:
+            result['llm'] = agent.memory.llm_metrics.snapshot()['totals']
+            agent.save_llm_metrics()
+        result['timings']['total'] = round(time.time() - started, 2)
+        return result
+
+    def _wait_for_capacity(self):
+        """Hold a new profile while the LLM scheduler's queues are saturated"""
+        scheduler = getattr(self.llm, 'scheduler', None)
+        if scheduler is None:
+            return
+
+        announced = False
+        while scheduler.pressure()['saturated']:
+            if not announced:
+                print("⏸️ LLM queue saturated, holding new profiles")
+                announced = True
+            time.sleep(0.5)
+
+    def _run_stages(self, agent: OPTAgent, profile: dict, result: dict):
+        """Analysis, suggestion choice and the generation pipeline, timing each stage"""
+        state = agent.memory.get_state()
+
+        # Analysis
+        stage_started = time.time()
+        suggestions = agent.analysis.analyze_and_suggest(state)
+        agent._show_suggestions(suggestions)
+        agent._choose_suggestion(str(profile.get('choice', 1)))
+        result['chosen'] = state['chosen_task'].get('name')
+        result['timings']['analysis'] = round(time.time() - stage_started, 2)
+
+        # Masterplan → code → deployment
+        pipeline = GenerationPipeline(agent)
+        for event in pipeline.run():
+            if event['status'] == 'completed':
+                result['timings'][event['stage']] = event['elapsed']
+            elif event['status'] == 'validated':
+                result['code_valid'] = event['valid']
+
+    def run(self, profiles: list) -> dict:
+        """
+        Run every profile on the worker pool and write the summary report
+
+        Args:
+            profiles: Profiles from load_profiles()
+
+        Returns:
+            Summary dict (also saved as summary.json in output_root)
+        """
+        print(f"\n📦 Batch: {len(profiles)} profile(s) on {self.workers} worker(s)\n")
+        os.makedirs(self.output_root, exist_ok=True)
+        started = time.time()
+
+        results = [None] * len(profiles)
+        ids = self._profile_ids(profiles)
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(self.run_profile, profile, i, ids[i]): i for i, profile in enumerate(profiles)}
+            for done, future in enumerate(as_completed(futures), 1):
+                i = futures[future]
+                results[i] = future.result()
+                icon = "✅" if results[i]['status'] == 'ok' else "❌"
+                print(f"{icon} [{done}/{len(profiles)}] {results[i]['id']} ({results[i]['timings']['total']}s)")
+
+        summary = self._summarize(results, time.time() - started)
+
+        summary_path = os.path.join(self.output_root, "summary.json")
+        with open(summary_path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+
+        print(f"\n📊 {summary['succeeded']}/{summary['profiles']} succeeded in {summary['wall_time']}s")
+        print(f"💾 Summary saved to: {summary_path}\n")
+        return summary
+
+    def _summarize(self, results: list, wall_time: float) -> dict:
+        """Aggregate per-stage timings across profiles"""
+        stage_stats = {}
+        for stage in STAGES + ('total',):
+            values = sorted(r['timings'][stage] for r in results if stage in r['timings'])
+            if not values:
+                continue
+            stage_stats[stage] = {
+                'count': len(values),
+                'mean': round(sum(values) / len(values), 2),
+                'p50': values[len(values) // 2],
+                'max': values[-1],
+            }
+
+        scheduler = getattr(self.llm, 'scheduler', None)
+        return {
+            'profiles': len(results),
+            'succeeded': sum(1 for r in results if r['status'] == 'ok'),
+            'failed': sum(1 for r in results if r['status'] != 'ok'),
+            'workers': self.workers,
+            'wall_time': round(wall_time, 2),
+            'stages': stage_stats,
+            'llm_tokens': {
+                'prompt': sum((r['llm'] or {}).get('prompt_tokens', 0) for r in results),
+                'completion': sum((r['llm'] or {}).get('completion_tokens', 0) for r in results),
+            },
+            'scheduler': scheduler.get_stats() if scheduler is not None else None,
+            'results': results
+        }
@@ -0,0 +1,183 @@
+"""
+Checkpoint Journal - Write-ahead record of each generation phase
+
+The masterplan, code and deployment phases each depend on the output of
+the one before. Until now their outputs only lived in memory (and in the
+session store, once saved), so a crash or a failed later phase in a new
+process meant regenerating the whole chain.
+
+Before a phase moves on, the journal durably records its output together
+with a hash of its inputs (the exact prompt and model options the phase
+sends to the LLM). Each record is written to a temp file, flushed to disk
+and renamed into place, so a reader sees either no checkpoint or a whole
+one, never a partial one. On restart, a phase whose input hash has a
+checkpoint is restored instead of generated; any change to the inputs (a
+different task, an edited masterplan, a new prompt version) changes the
+hash and the phase runs again.
+
+Checkpoint files are named by phase and input hash, and only the latest
+one of each phase is kept: recording a phase deletes its checkpoints for
+other inputs, so the directory does not grow with every changed task or
+prompt version. Only complete
+LLM results are recorded (see tools/outcome.py): a fallback or a stream
+cut short would otherwise be restored on every restart instead of retried.
+"""
+
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+
+
+class CheckpointJournal:
+    def __init__(self, directory: str):
+        """
+        Initialize the journal
+
+        Nothing is written until the first phase is recorded.
+
+        Args:
+            directory: Directory holding a <phase>-<input hash>.json
+                checkpoint per phase, for its latest inputs
+        """
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._recorded = {}         # phase → (input hash, output) last written or read
+        self.stats = {
+            'writes': 0,
+            'hits': 0,
+            'misses': 0,
+        }
+
+    @staticmethod
+    def input_hash(prompt: str, options: dict) -> str:
+        """
+        Hash the inputs of a phase
+
+        Args:
+            prompt: The prompt the phase sends to the LLM
+            options: The phase's LLM call options (model, temperature,
+                max_tokens and prompt_version are hashed)
+
+        Returns:
+            Hex SHA-256 digest
+        """
+        payload = json.dumps({
+            'prompt': prompt,
+            'model': options.get('model'),
+            'temperature': options.get('temperature'),
+            'max_tokens': options.get('max_tokens'),
+            'prompt_version': options.get('prompt_version'),
+        }, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, phase: str, input_hash: str) -> str:
+        return os.path.join(self.directory, f"{phase}-{input_hash}.json")
+
+    def record(self, phase: str, input_hash: str, output, session_id: str = None):
+        """
+        Durably write a phase's checkpoint (temp file + rename), replacing
+        the phase's checkpoints for other inputs
+
+        Args:
+            phase: Phase name (masterplan, code, deployment)
+            input_hash: Hash from input_hash()
+            output: The phase's output (any JSON-serializable value)
+            session_id: Session that produced it, kept for reference
+        """
+        with self._lock:
+            if self._recorded.get(phase) == (input_hash, output):
+                # Restored from this very checkpoint; nothing new to write
+                return
+
+        entry = {
+            'phase': phase,
+            'input_hash': input_hash,
+            'output': output,
+            'session_id': session_id,
+            'saved_at': time.time(),
+        }
+        os.makedirs(self.directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix=f".{phase}-", suffix=".tmp", dir=self.directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self._path(phase, input_hash))
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self._prune(phase, input_hash)
+        self._sync_directory()
+
+        with self._lock:
+            self._recorded[phase] = (input_hash, output)
+            self.stats['writes'] += 1
+
+    def _prune(self, phase: str, input_hash: str):
+        """Delete a phase's checkpoints for inputs other than input_hash"""
+        keep = os.path.basename(self._path(phase, input_hash))
+        for name in os.listdir(self.directory):
+            if name.startswith(f"{phase}-") and name.endswith('.json') and name != keep:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
+
+    def _sync_directory(self):
+        """Flush the rename itself to disk (not supported on Windows)"""
+        if not hasattr(os, 'O_DIRECTORY'):
+            return
+        fd = os.open(self.directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def load(self, phase: str, input_hash: str):
+        """
+        Get a phase's checkpointed output if its inputs are unchanged
+
+        Args:
+            phase: Phase name
+            input_hash: Hash of the phase's current inputs
+
+        Returns:
+            The saved output, or None if there is no matching checkpoint
+        """
+        try:
+            with open(self._path(phase, input_hash), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            entry = None
+
+        with self._lock:
+            if entry is None or entry.get('input_hash') != input_hash:
+                self.stats['misses'] += 1
+                return None
+            self._recorded[phase] = (input_hash, entry['output'])
+            self.stats['hits'] += 1
+        return entry['output']
+
+    def clear(self):
+        """Delete every checkpoint, so the next run regenerates all phases"""
+        with self._lock:
+            self._recorded.clear()
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name.endswith('.json'):
+                os.remove(os.path.join(self.directory, name))
+
+    def get_stats(self) -> dict:
+        """Get a copy of the journal counters"""
+        with self._lock:
+            stats = dict(self.stats)
+        stats['directory'] = self.directory
+        return stats
@@ -6,34 +6,114 @@ Manages the entire automation discovery and generation workflow
 
 import os
 import sys
+import json
+import asyncio
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from memory.conversation_memory import ConversationMemory
+from memory.session_store import SessionStore, get_shared_session_store
 from tools.discovery_tool import DiscoveryTool
 from tools.analysis_tool import AnalysisTool
 from tools.masterplan_tool import MasterplanTool
 from tools.code_gen_tool import CodeGenTool
 from tools.deployment_tool import DeploymentTool
+from tools.llm_client import get_shared_client
+from tools.llm_metrics import bind_session
+from tools.llm_scheduler import SchedulerBusy
+from agent.speculation import SpeculativeMasterplans
+from agent.pipeline import GenerationPipeline
+from agent.steps import Step, drive, adrive, run, arun, map_output
+from agent.checkpoints import CheckpointJournal
+
+
+class AgentTools:
+    __slots__ = ('llm', 'discovery', 'analysis', 'masterplan', 'codegen', 'deployment')
+    
+    def __init__(self, llm=None):
+        """
+        The tools an agent uses, built once and shareable between agents
+        
+        The tools keep no per-conversation state (everything they need comes
+        from the memory passed to each call), so one set can serve every
+        session in the process.
+        
+        Args:
+            llm: LLMClient injected into every tool (defaults to the process-wide client)
+        """
+        self.llm = llm or get_shared_client()
+        self.discovery = DiscoveryTool(self.llm)
+        self.analysis = AnalysisTool(self.llm)
+        self.masterplan = MasterplanTool(self.llm)
+        self.codegen = CodeGenTool(self.llm)
+        self.deployment = DeploymentTool(self.llm)
 
 
 class OPTAgent:
-    def __init__(self):
-        """Initialize the OPT Agent with all tools"""
+    def __init__(self, llm=None, speculative_masterplans: int = None, pipeline_mode: bool = None,
+                 output_dir: str = "output", session_store: SessionStore = None, session_id: str = None,
+                 autosave: bool = False, history_turns: int = None, tools: AgentTools = None):
+        """
+        Initialize the OPT Agent with all tools
+        
+        Args:
+            llm: LLMClient shared by every tool (defaults to the process-wide client)
+            speculative_masterplans: Start generating masterplans for this many
+                top suggestions while the user decides (defaults to
+                OPT_SPECULATIVE_MASTERPLANS, or 0 = off)
+            pipeline_mode: Run masterplan, code and deployment in the same turn
+                as the user's choice (defaults to OPT_PIPELINE_MODE, or off)
+            output_dir: Directory for the generated files, exported sessions
+                and phase checkpoints (in .checkpoints/)
+            session_store: Where save_session() appends the session (defaults
+                to the process-wide store, see OPT_SESSION_DB)
+            session_id: Key of this session in the store (defaults to a new id)
+            autosave: Save the session to the store after every turn, so a
+                crash loses at most the turn in progress
+            history_turns: User/agent exchanges kept in memory; older saved
+                ones are only in the session store and the history summary
+                (defaults to OPT_HISTORY_TURNS, or 50; 0 = keep everything)
+            tools: AgentTools shared with other agents (defaults to a new set
+                built on llm)
+        """
         print("\n" + "="*60)
         print("🤖 INITIALIZING OPT AUTOMATION AGENT")
         print("="*60 + "\n")
         
         # Initialize memory
-        self.memory = ConversationMemory()
+        self.memory = ConversationMemory(session_id=session_id, history_turns=history_turns)
+        self.session_store = session_store or get_shared_session_store()
+        self.autosave = autosave
+        
+        # One pooled LLM client, injected into every tool
+        self.tools = tools or AgentTools(llm)
+        self.llm = self.tools.llm
         
         # Initialize all tools
-        self.discovery = DiscoveryTool()
-        self.analysis = AnalysisTool()
-        self.masterplan = MasterplanTool()
-        self.codegen = CodeGenTool()
-        self.deployment = DeploymentTool()
+        self.discovery = self.tools.discovery
+        self.analysis = self.tools.analysis
+        self.masterplan = self.tools.masterplan
+        self.codegen = self.tools.codegen
+        self.deployment = self.tools.deployment
+        
+        # Opt-in speculative masterplan generation
+        if speculative_masterplans is None:
+            speculative_masterplans = int(os.getenv("OPT_SPECULATIVE_MASTERPLANS", "0"))
+        self.speculation = None
+        if speculative_masterplans > 0:
+            self.speculation = SpeculativeMasterplans(self.masterplan, top_n=speculative_masterplans)
+        self._speculative_job = None
+        
+        # Single-turn generation pipeline
+        if pipeline_mode is None:
+            pipeline_mode = os.getenv("OPT_PIPELINE_MODE", "0") == "1"
+        self.pipeline_mode = pipeline_mode
+        
+        self.output_dir = output_dir
+        
+        # Write-ahead checkpoint of each generation phase's output
+        self.checkpoints = CheckpointJournal(os.path.join(output_dir, ".checkpoints"))
         
         # Track current phase
         self.current_phase = 'discovery'
@@ -50,57 +130,218 @@ class OPTAgent:
         Returns:
             Agent's response
         """
+        current_phase = self._begin_turn(user_message)
+        
+        with bind_session(self.memory.llm_metrics):
+            try:
+                response = run(self._turn(current_phase, user_message))
+            except SchedulerBusy as e:
+                response = self._busy_response(e)
+        
+        # Add agent response to memory
+        self.memory.add_message('agent', response)
+        self._autosave()
+        
+        return response
+    
+    async def achat(self, user_message: str) -> str:
+        """
+        Async conversation handler
+        
+        Same as chat(), but awaits LLM calls instead of blocking, so one
+        event loop can serve many conversations at once.
+        
+        Args:
+            user_message: What the user said
+            
+        Returns:
+            Agent's response
+        """
+        current_phase = self._begin_turn(user_message)
+        
+        with bind_session(self.memory.llm_metrics):
+            try:
+                response = await arun(self._turn(current_phase, user_message))
+            except SchedulerBusy as e:
+                response = self._busy_response(e)
+        
+        # Add agent response to memory
+        self.memory.add_message('agent', response)
+        await self._aautosave()
+        
+        return response
+    
+    def chat_stream(self, user_message: str):
+        """
+        Streaming conversation handler
+        
+        Same as chat(), but yields the response in chunks. The masterplan
+        and deployment phases yield tokens as the LLM produces them, the
+        analysis phase yields each suggestion as soon as it is generated,
+        and a pipeline turn yields each stage's progress; other phases
+        yield their whole response at once.
+        
+        Args:
+            user_message: What the user said
+            
+        Yields:
+            Chunks of the agent's response
+        """
+        current_phase = self._begin_turn(user_message)
+        
+        chunks = []
+        with bind_session(self.memory.llm_metrics):
+            try:
+                for part in drive(self._stream_turn(current_phase, user_message)):
+                    chunks.append(part)
+                    yield part
+            except SchedulerBusy as e:
+                part = self._busy_response(e)
+                chunks.append(part)
+                yield part
+        
+        # Add the assembled response to memory
+        self.memory.add_message('agent', ''.join(chunks))
+        self._autosave()
+    
+    async def achat_stream(self, user_message: str):
+        """
+        Async variant of chat_stream()
+        
+        Args:
+            user_message: What the user said
+            
+        Yields:
+            Chunks of the agent's response
+        """
+        current_phase = self._begin_turn(user_message)
+        
+        chunks = []
+        with bind_session(self.memory.llm_metrics):
+            try:
+                async for part in adrive(self._stream_turn(current_phase, user_message)):
+                    chunks.append(part)
+                    yield part
+            except SchedulerBusy as e:
+                part = self._busy_response(e)
+                chunks.append(part)
+                yield part
+        
+        # Add the assembled response to memory
+        self.memory.add_message('agent', ''.join(chunks))
+        await self._aautosave()
+    
+    def _autosave(self):
+        """Save the finished turn to the session store when autosave is on"""
+        if self.autosave:
+            self.session_store.save(self.memory)
+    
+    async def _aautosave(self):
+        """Async variant of _autosave(); the write runs off the event loop"""
+        if self.autosave:
+            await asyncio.to_thread(self.session_store.save, self.memory)
+    
+    def _busy_response(self, error: SchedulerBusy) -> str:
+        """
+        Reply for a turn whose LLM call was refused because the queue is full
+        
+        The phase is left as it was, so the next message retries the turn.
+        
+        Args:
+            error: The scheduler's refusal
+            
+        Returns:
+            Agent's response
+        """
+        print(f"⏸️ {str(error)}")
+        return "⏳ I'm handling a lot of requests right now. Send any message in a moment and I'll pick up where we left off."
+    
+    def _begin_turn(self, user_message: str) -> str:
+        """Record the user's message and return the phase to handle it in"""
         # Add user message to memory
         self.memory.add_message('user', user_message)
         
         # Get current state
-        state = self.memory.get_state()
-        current_phase = state['phase']
+        current_phase = self.memory.get_state()['phase']
         
         print(f"\n{'─'*60}")
         print(f"📍 Phase: {current_phase.upper()}")
         print(f"{'─'*60}\n")
         
-        # Route to appropriate handler based on phase
+        return current_phase
+    
+    def _turn(self, current_phase: str, user_message: str):
+        """
+        The turn for a phase (see agent/steps.py), yielding its whole response
+        
+        Args:
+            current_phase: Phase the message arrived in
+            user_message: What the user said
+            
+        Returns:
+            Turn generator for drive() or adrive()
+        """
         if current_phase == 'discovery':
-            response = self._handle_discovery(user_message)
+            return self._discovery_turn(user_message)
         
         elif current_phase == 'analysis':
-            response = self._handle_analysis(user_message)
+            return self._analysis_turn(user_message)
         
         elif current_phase == 'masterplan':
-            response = self._handle_masterplan()
+            return self._masterplan_turn()
         
         elif current_phase == 'code':
-            response = self._handle_code_generation()
+            return self._code_turn()
         
         elif current_phase == 'deployment':
-            response = self._handle_deployment()
+            return self._deployment_turn()
         
         elif current_phase == 'done':
-            response = self._handle_done()
-        
-        else:
-            response = "🤔 Hmm, I seem to be in an unknown state. Let's start over!"
-            self.memory.transition_phase('discovery')
-        
-        # Add agent response to memory
-        self.memory.add_message('agent', response)
+            return self._reply(self._handle_done)
         
-        return response
+        return self._reply(self._handle_unknown_phase)
+    
+    def _stream_turn(self, current_phase: str, user_message: str):
+        """Streaming variant of _turn(): generation phases yield their output as it arrives"""
+        if current_phase == 'masterplan':
+            return self._stream_masterplan()
+        if self._is_suggestion_turn(current_phase):
+            return self._stream_analysis()
+        if self._is_pipeline_turn(current_phase):
+            return self._stream_pipeline(user_message)
+        if current_phase == 'deployment':
+            return self._stream_deployment()
+        return self._turn(current_phase, user_message)
+    
+    @staticmethod
+    def _reply(respond):
+        """Turn that makes no LLM call, just yields respond()"""
+        yield respond()
     
-    def _handle_discovery(self, user_message: str) -> str:
+    def _handle_unknown_phase(self) -> str:
+        """Recover from an unrecognised phase"""
+        self.memory.transition_phase('discovery')
+        return "🤔 Hmm, I seem to be in an unknown state. Let's start over!"
+    
+    def _discovery_turn(self, user_message: str):
         """
         Handle discovery phase - collect OPT information
         """
         state = self.memory.get_state()
         
         # If this is the first message, start with welcome
-        if len(state['messages']) <= 2:
-            return self._welcome_message()
+        if state['messages'].total <= 2:
+            yield self._welcome_message()
+            return
         
         # Extract information from user's response
-        extraction = self.discovery.extract_information(user_message, state)
+        extraction, _ = yield Step(self.discovery.extract_information, self.discovery.aextract_information,
+                                   user_message, state)
+        yield self._apply_extraction(extraction)
+    
+    def _apply_extraction(self, extraction: dict) -> str:
+        """Store extracted info, then ask the next question or start analysis"""
+        state = self.memory.get_state()
         self.discovery.update_memory_with_extraction(extraction, self.memory)
         
         # Check if discovery is complete
@@ -120,7 +361,7 @@ class OPTAgent:
         next_question = self.discovery.get_next_question(state)
         return next_question
     
-    def _handle_analysis(self, user_message: str) -> str:
+    def _analysis_turn(self, user_message: str):
         """
         Handle analysis phase - suggest automations
         """
@@ -129,26 +370,119 @@ class OPTAgent:
         # If we haven't generated suggestions yet, generate them
         if not state.get('suggestions'):
             print("🔬 Analyzing your business and generating suggestions...\n")
-            suggestions = self.analysis.analyze_and_suggest(state)
-            state['suggestions'] = suggestions
-            
-            # Display suggestions
-            display = self.analysis.display_suggestions(suggestions)
-            return display
+            suggestions, _ = yield Step(self.analysis.analyze_and_suggest, self.analysis.aanalyze_and_suggest, state)
+            yield self._show_suggestions(suggestions)
+            return
         
         # User is choosing a suggestion
+        yield self._choose_suggestion(user_message)
+        if self.pipeline_mode:
+            yield from self._pipeline_turn()
+    
+    def _show_suggestions(self, suggestions: list) -> str:
+        """Store the suggestions and format them for the user"""
+        self._store_suggestions(suggestions)
+        
+        # Display suggestions
+        display = self.analysis.display_suggestions(suggestions)
+        return display
+    
+    def _store_suggestions(self, suggestions: list):
+        """Keep the suggestions in memory and start any speculative masterplans"""
+        state = self.memory.get_state()
+        state['suggestions'] = suggestions
+        
+        # Start on the likely masterplans while the user reads the options
+        if self.speculation is not None:
+            self.speculation.start(suggestions, state)
+    
+    def _is_suggestion_turn(self, current_phase: str) -> bool:
+        """True if this turn generates the suggestions"""
+        return current_phase == 'analysis' and not self.memory.get_state().get('suggestions')
+    
+    def _stream_analysis(self):
+        """Yield the suggestions display, one suggestion at a time as each is generated"""
+        state = self.memory.get_state()
+        print("🔬 Analyzing your business and generating suggestions...\n")
+        
+        yield self.analysis.DISPLAY_HEADER
+        suggestions, _ = yield Step(self.analysis.stream_suggestions, self.analysis.astream_suggestions, state,
+                                    stream=True, show=self.analysis.format_suggestion)
+        yield self.analysis.DISPLAY_FOOTER
+        
+        self._store_suggestions(suggestions)
+    
+    def _choose_suggestion(self, user_message: str) -> str:
+        """Record the user's pick and move on to the masterplan"""
+        state = self.memory.get_state()
         suggestions = state['suggestions']
         chosen = self.analysis.get_chosen_suggestion(suggestions, user_message)
         state['chosen_task'] = chosen
         
         print(f"\n✅ User chose: {chosen.get('name')}\n")
         
+        # Keep the chosen speculative plan, cancel the others
+        if self.speculation is not None:
+            self._speculative_job = self.speculation.promote(chosen)
+        
         # Transition to masterplan
         self.memory.transition_phase('masterplan')
         
         return "Perfect choice! 🎯 Let me create a comprehensive masterplan for you...\n\n⏳ Generating detailed automation plan..."
     
-    def _handle_masterplan(self) -> str:
+    def _is_pipeline_turn(self, current_phase: str) -> bool:
+        """True if this turn picks a suggestion and the pipeline should run"""
+        return (self.pipeline_mode and current_phase == 'analysis'
+                and bool(self.memory.get_state().get('suggestions')))
+    
+    def run_pipeline(self, on_event=None) -> str:
+        """
+        Generate the masterplan, code and deployment guide back-to-back
+        
+        Args:
+            on_event: Optional callback for each progress event
+            
+        Returns:
+            Combined response for all stages
+        """
+        return run(self._pipeline_turn(on_event))
+    
+    async def arun_pipeline(self, on_event=None) -> str:
+        """Async variant of run_pipeline()"""
+        return await arun(self._pipeline_turn(on_event))
+    
+    def _pipeline_turn(self, on_event=None, stream: bool = False):
+        """
+        The generation pipeline as (part of) a turn
+        
+        Args:
+            on_event: Optional callback for each progress event
+            stream: Yield each progress line (otherwise they are printed)
+            
+        Yields:
+            Progress lines when streaming, then the combined response for all stages
+        """
+        pipeline = GenerationPipeline(self)
+        
+        def report(event):
+            if on_event:
+                on_event(event)
+            line = pipeline.format_event(event)
+            if stream:
+                return line
+            print(line, end='')
+        
+        yield from map_output(pipeline.steps(), report)
+        yield pipeline.response()
+    
+    def _stream_pipeline(self, user_message: str):
+        """
+        Streaming variant of the pipeline turn - yields progress lines, then the results
+        """
+        yield self._choose_suggestion(user_message) + "\n\n"
+        yield from self._pipeline_turn(stream=True)
+    
+    def _masterplan_turn(self):
         """
         Handle masterplan phase - generate detailed plan
         """
@@ -156,19 +490,36 @@ class OPTAgent:
         chosen_task = state.get('chosen_task')
         
         if not chosen_task:
-            return "❌ Error: No task selected. Please choose a task first."
+            yield "❌ Error: No task selected. Please choose a task first."
+            return
         
-        # Generate masterplan
+        # Generate masterplan (unless it was saved or checkpointed before a restart, or a speculative one is ready)
         print("📋 Generating masterplan...\n")
-        masterplan = self.masterplan.generate_masterplan(chosen_task, state)
-        state['masterplan'] = masterplan
-        
-        # Save masterplan
-        self.masterplan.save_masterplan(masterplan)
+        masterplan, complete = state.get('masterplan') or self._checkpointed('masterplan'), False
+        if not masterplan:
+            masterplan, _ = yield Step(self._take_speculative_masterplan)
+            complete = True
+        if masterplan is None:
+            masterplan, complete = yield Step(self.masterplan.generate_masterplan, self.masterplan.agenerate_masterplan,
+                                              chosen_task, state)
+        self._finish_masterplan(masterplan, complete)
         
-        # Transition to code generation
-        self.memory.transition_phase('code')
+        yield self._masterplan_response(masterplan)
+    
+    def _take_speculative_masterplan(self):
+        """
+        Wait for the promoted speculative masterplan, if there is one
         
+        Returns:
+            The masterplan, or None if it has to be generated now
+        """
+        job, self._speculative_job = self._speculative_job, None
+        if job is None:
+            return None
+        return self.speculation.result(job)
+    
+    def _masterplan_response(self, masterplan: str) -> str:
+        """Response shown once the masterplan is ready"""
         response = f"""
 ✅ Masterplan Complete!
 
@@ -182,22 +533,153 @@ Great! Now let me write the Python code for you...
 """
         return response
     
-    def _handle_code_generation(self) -> str:
+    def _stream_masterplan(self):
         """
-        Handle code generation phase - write Python script
+        Streaming variant of _masterplan_turn() - yields the plan as it is generated
         """
         state = self.memory.get_state()
         chosen_task = state.get('chosen_task')
-        masterplan = state.get('masterplan')
-        task = state['task']
         
-        # Generate code
+        if not chosen_task:
+            yield "❌ Error: No task selected. Please choose a task first."
+            return
+        
+        print("📋 Generating masterplan...\n")
+        yield "\n📋 Masterplan:\n\n"
+        
+        # Follow the promoted speculative job if it is already under way
+        job, self._speculative_job = self._speculative_job, None
+        saved = state.get('masterplan') or self._checkpointed('masterplan')
+        if saved:
+            yield saved
+            chunks, complete = [saved], False
+        elif job is not None:
+            # The job ran in its own thread and reports its own outcome
+            chunks, _ = yield Step(self.speculation.stream, None, job, stream=True)
+            complete = job.complete
+        else:
+            chunks, complete = yield Step(self.masterplan.stream_masterplan, self.masterplan.astream_masterplan,
+                                          chosen_task, state, stream=True)
+        self._finish_masterplan(''.join(chunks).strip(), complete)
+        
+        yield self._masterplan_stream_footer()
+    
+    def _masterplan_stream_footer(self) -> str:
+        """Text streamed after the masterplan body"""
+        return f"""
+
+{'='*60}
+
+Great! Now let me write the Python code for you...
+
+⏳ Generating automation script...
+"""
+    
+    def _finish_masterplan(self, masterplan: str, complete: bool = False):
+        """
+        Store and save the masterplan, then move on to code generation
+        
+        Args:
+            masterplan: The masterplan
+            complete: It is a finished LLM result (not a fallback, a partial
+                stream or a saved copy), so it is checkpointed
+        """
+        state = self.memory.get_state()
+        state['masterplan'] = masterplan
+        if complete:
+            self._record_checkpoint('masterplan', masterplan)
+        
+        # Save masterplan
+        self.masterplan.save_masterplan(masterplan, output_dir=self.output_dir)
+        
+        # Transition to code generation
+        self.memory.transition_phase('code')
+    
+    def _phase_input_hash(self, phase: str):
+        """
+        Hash what a generation phase sends to the LLM
+        
+        Args:
+            phase: masterplan, code or deployment
+            
+        Returns:
+            Hex digest, or None if the phase's inputs are not there yet
+        """
+        state = self.memory.get_state()
+        chosen_task = state.get('chosen_task')
+        if not chosen_task:
+            return None
+        
+        if phase == 'masterplan':
+            tool, prompt = self.masterplan, self.masterplan._build_prompt(chosen_task, state)
+        elif phase == 'code':
+            if not state.get('masterplan'):
+                return None
+            tool, prompt = self.codegen, self.codegen._build_prompt(chosen_task, state['masterplan'], state['task'])
+        else:
+            if not state.get('code'):
+                return None
+            tool, prompt = self.deployment, self.deployment._build_prompt(state['code'], chosen_task, state)
+        
+        return CheckpointJournal.input_hash(prompt, tool._completion_options(use_cache=True))
+    
+    def _checkpointed(self, phase: str):
+        """
+        Restore a phase's output from a checkpoint whose inputs match
+        
+        Args:
+            phase: masterplan, code or deployment
+            
+        Returns:
+            The checkpointed output, or None if the phase has to run
+        """
+        input_hash = self._phase_input_hash(phase)
+        if input_hash is None:
+            return None
+        
+        output = self.checkpoints.load(phase, input_hash)
+        if output is not None:
+            print(f"♻️ Restored {phase} from checkpoint, skipping generation")
+        return output
+    
+    def _record_checkpoint(self, phase: str, output):
+        """Durably record a phase's output before moving on"""
+        input_hash = self._phase_input_hash(phase)
+        if input_hash is not None:
+            self.checkpoints.record(phase, input_hash, output, session_id=self.session_id)
+    
+    def _code_turn(self):
+        """
+        Handle code generation phase - write Python script
+        """
+        state = self.memory.get_state()
+        
+        # Generate code (unless it was saved or checkpointed before a restart)
         print("💻 Generating Python code...\n")
-        code_data = self.codegen.generate_code(chosen_task, masterplan, task)
+        code_data, complete = state.get('code') or self._checkpointed('code'), False
+        if not code_data:
+            code_data, complete = yield Step(self.codegen.generate_code, self.codegen.agenerate_code,
+                                             state.get('chosen_task'), state.get('masterplan'), state['task'])
+        yield self._finish_code(code_data, complete)
+    
+    def _finish_code(self, code_data: dict, complete: bool = False) -> str:
+        """
+        Store and save the generated code, then move on to deployment
+        
+        Args:
+            code_data: dict with 'code', 'filename', 'requirements'
+            complete: It is a finished LLM result, so it is checkpointed
+            
+        Returns:
+            Response with the code preview
+        """
+        state = self.memory.get_state()
         state['code'] = code_data
+        if complete:
+            self._record_checkpoint('code', code_data)
         
         # Save code
-        self.codegen.save_code(code_data)
+        self.codegen.save_code(code_data, output_dir=self.output_dir)
         
         # Transition to deployment
         self.memory.transition_phase('deployment')
@@ -220,7 +702,7 @@ Code Preview (first 30 lines):
 
 ... ({len(code_lines) - 30} more lines)
 
-💾 Full code saved to: output/{code_data['filename']}
+💾 Full code saved to: {self.output_dir}/{code_data['filename']}
 
 {'='*60}
 
@@ -230,7 +712,7 @@ Perfect! Now let me create the deployment guide...
 """
         return response
     
-    def _handle_deployment(self) -> str:
+    def _deployment_turn(self):
         """
         Handle deployment phase - create setup guide
         """
@@ -238,31 +720,79 @@ Perfect! Now let me create the deployment guide...
         chosen_task = state.get('chosen_task')
         code_data = state.get('code')
         
-        # Generate deployment guide
+        # Generate deployment guide (unless it was saved or checkpointed before a restart)
         print("🚀 Generating deployment guide...\n")
-        guide = self.deployment.generate_deployment_guide(code_data, chosen_task, state)
-        state['deployment_guide'] = guide
-        
-        # Save guide
-        self.deployment.save_deployment_guide(guide)
-        
-        # Transition to done
-        self.memory.transition_phase('done')
+        guide, complete = state.get('deployment_guide') or self._checkpointed('deployment'), False
+        if not guide:
+            guide, complete = yield Step(self.deployment.generate_deployment_guide,
+                                         self.deployment.agenerate_deployment_guide, code_data, chosen_task, state)
+        self._finish_deployment(guide, complete)
         
+        yield self._deployment_response(guide, chosen_task, code_data)
+    
+    def _deployment_response(self, guide: str, chosen_task: dict, code_data: dict) -> str:
+        """Response shown once the deployment guide is ready"""
         response = f"""
 ✅ Deployment Guide Complete!
 
 {guide}
 
-{'='*60}
+{self._deployment_summary(chosen_task, code_data)}"""
+        return response
+    
+    def _stream_deployment(self):
+        """
+        Streaming variant of _deployment_turn() - yields the guide as it is generated
+        """
+        state = self.memory.get_state()
+        chosen_task = state.get('chosen_task')
+        code_data = state.get('code')
+        
+        print("🚀 Generating deployment guide...\n")
+        yield "\n🚀 Deployment Guide:\n\n"
+        
+        saved = state.get('deployment_guide') or self._checkpointed('deployment')
+        if saved:
+            yield saved
+            chunks, complete = [saved], False
+        else:
+            chunks, complete = yield Step(self.deployment.stream_deployment_guide,
+                                          self.deployment.astream_deployment_guide, code_data, chosen_task, state,
+                                          stream=True)
+        self._finish_deployment(''.join(chunks).strip(), complete)
+        
+        yield "\n\n" + self._deployment_summary(chosen_task, code_data)
+    
+    def _finish_deployment(self, guide: str, complete: bool = False):
+        """
+        Store and save the deployment guide, then finish the session
+        
+        Args:
+            guide: The deployment guide
+            complete: It is a finished LLM result, so it is checkpointed
+        """
+        state = self.memory.get_state()
+        state['deployment_guide'] = guide
+        if complete:
+            self._record_checkpoint('deployment', guide)
+        
+        # Save guide
+        self.deployment.save_deployment_guide(guide, output_dir=self.output_dir)
+        
+        # Transition to done
+        self.memory.transition_phase('done')
+    
+    def _deployment_summary(self, chosen_task: dict, code_data: dict) -> str:
+        """Closing deliverables summary shown after the deployment guide"""
+        return f"""{'='*60}
 
 🎉 CONGRATULATIONS! Your automation is ready!
 
 📦 DELIVERABLES:
-   ✅ Masterplan: output/masterplan.md
-   ✅ Python Code: output/{code_data['filename']}
-   ✅ Requirements: output/requirements.txt
-   ✅ Setup Guide: output/DEPLOYMENT.md
+   ✅ Masterplan: {self.output_dir}/masterplan.md
+   ✅ Python Code: {self.output_dir}/{code_data['filename']}
+   ✅ Requirements: {self.output_dir}/requirements.txt
+   ✅ Setup Guide: {self.output_dir}/DEPLOYMENT.md
 
 🚀 NEXT STEPS:
    1. Open the deployment guide
@@ -277,16 +807,15 @@ Perfect! Now let me create the deployment guide...
 
 Need help with anything else? Just ask!
 """
-        return response
     
     def _handle_done(self) -> str:
         """
         Handle done phase - conversation complete
         """
-        return """
+        return f"""
 ✅ Your automation project is complete!
 
-All files are in the output/ folder. 
+All files are in the {self.output_dir}/ folder. 
 
 Would you like to:
 1. Create another automation?
@@ -328,9 +857,97 @@ Now let me analyze your business and identify automation opportunities...
 (This will take about 30 seconds)
 """
     
-    def save_session(self, filename: str = "session.json") -> str:
+    def get_llm_metrics(self) -> dict:
+        """
+        Get this session's LLM call metrics
+        
+        Returns:
+            Snapshot with totals and breakdowns by call, model and phase
+        """
+        return self.memory.llm_metrics.snapshot()
+    
+    def save_llm_metrics(self, filename: str = "llm_metrics.json", fmt: str = "json") -> str:
+        """
+        Save this session's LLM call metrics
+        
+        Args:
+            filename: Output filename
+            fmt: 'json' or 'prometheus'
+            
+        Returns:
+            Path to saved file
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        filepath = self.memory.llm_metrics.save(os.path.join(self.output_dir, filename), fmt)
+        
+        print(f"📊 LLM metrics saved to: {filepath}")
+        return filepath
+    
+    @property
+    def session_id(self) -> str:
+        """Key of this session in the session store"""
+        return self.memory.session_id
+    
+    def save_session(self) -> str:
+        """
+        Save the conversation session to the session store
+        
+        Only the messages and state values that changed since the last save
+        are appended, so saving after every turn stays cheap.
+        
+        Returns:
+            The session id
+        """
+        session_id = self.session_store.save(self.memory)
+        
+        print(f"💾 Session saved: {session_id} ({self.session_store.db_path})")
+        return session_id
+    
+    def load_session(self, path_or_id: str) -> str:
+        """
+        Continue a saved session from its recorded phase
+        
+        Restores the phase, the OPT fields, the suggestions and any
+        masterplan, code and deployment guide already generated. The phase
+        handlers reuse outputs that are already in memory, so no LLM call
+        whose result was saved is made again.
+        
+        Args:
+            path_or_id: Session id in the session store, or path of a JSON
+                file from export_session()
+            
+        Returns:
+            The phase the conversation continues in
+            
+        Raises:
+            ValueError: If there is no such file or session
+        """
+        if os.path.isfile(path_or_id):
+            with open(path_or_id, 'r', encoding='utf-8') as f:
+                self.memory.restore(json.load(f))
+        else:
+            state = self.session_store.load_state(path_or_id)
+            if state is None:
+                raise ValueError(f"No saved session found for: {path_or_id}")
+            self.memory.restore(state, session_id=path_or_id)
+        
+        self._speculative_job = None
+        phase = self.memory.get_phase()
+        print(f"📂 Session {self.session_id} resumed in phase: {phase.upper()}")
+        return phase
+    
+    def resume_message(self) -> str:
+        """Message shown when a loaded session continues"""
+        phase = self.memory.get_phase()
+        if phase in ('masterplan', 'code', 'deployment'):
+            return f"👋 Welcome back! We were working on the {phase}. Say 'continue' and I'll pick up from there."
+        messages = self.memory.get_state()['messages']
+        last_agent = next((m['content'] for m in reversed(messages) if m['role'] == 'agent'), None)
+        return "👋 Welcome back! Here's where we left off:\n" + (last_agent or self._welcome_message())
+    
+    def export_session(self, filename: str = "session.json") -> str:
         """
-        Save the entire conversation session
+        Write the entire conversation session to a readable JSON file
         
         Args:
             filename: Output filename
@@ -338,15 +955,19 @@ Now let me analyze your business and identify automation opportunities...
         Returns:
             Path to saved file
         """
-        import json
+        os.makedirs(self.output_dir, exist_ok=True)
+        filepath = os.path.join(self.output_dir, filename)
         
-        os.makedirs("output", exist_ok=True)
-        filepath = os.path.join("output", filename)
+        # Messages dropped from memory are read back from the session store
+        state = self.memory.to_dict()
+        dropped = self.memory.get_state()['messages'].dropped
+        if dropped:
+            state['messages'] = self.session_store.load_messages(self.session_id, end=dropped) + state['messages']
         
         with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(self.memory.get_state(), f, indent=2)
+            json.dump(state, f, indent=2)
         
-        print(f"💾 Session saved to: {filepath}")
+        print(f"💾 Session exported to: {filepath}")
         return filepath
 
 
@@ -399,5 +1020,6 @@ if __name__ == "__main__":
     
     # Save session
     print("\n" + "="*60)
-    agent.save_session("bakery_automation_session.json")
+    agent.save_session()
+    agent.export_session("bakery_automation_session.json")
     print("✅ Test complete!")
\ No newline at end of file
@@ -0,0 +1,167 @@
+"""
+Generation Pipeline - Masterplan → Code → Deployment in one turn
+
+Once the user has chosen a suggestion, the three generation phases need no
+further input, so this runs them back-to-back instead of waiting for a
+message per phase. Every stage reports progress events, and the session is
+saved to the session store after each one. A stage whose inputs match its
+checkpoint (see agent/checkpoints.py) is restored instead of generated.
+The stages are written as a turn (see agent/steps.py), so run() and arun()
+share them.
+"""
+
+import time
+
+from agent.steps import Step, drive, adrive
+
+
+class GenerationPipeline:
+    STAGES = ('masterplan', 'code', 'deployment')
+
+    def __init__(self, agent):
+        """
+        Initialize the pipeline
+
+        Args:
+            agent: OPTAgent whose tools and memory are used
+        """
+        self.agent = agent
+        self.responses = {}
+
+    def _event(self, stage: str, status: str, started: float, **details) -> dict:
+        """Build one progress event"""
+        event = {
+            'stage': stage,
+            'status': status,     # started / completed / restored / validated / skipped
+            'index': self.STAGES.index(stage) + 1,
+            'total': len(self.STAGES),
+            'elapsed': round(time.time() - started, 2),
+        }
+        event.update(details)
+        return event
+
+    def _checkpoint(self) -> str:
+        """Save the session so a failed later stage loses no finished work"""
+        return self.agent.save_session()
+
+    def run(self):
+        """
+        Run every remaining generation stage
+
+        Yields:
+            Progress event dicts (see _event)
+        """
+        return drive(self.steps())
+
+    def arun(self):
+        """
+        Async variant of run()
+
+        Yields:
+            Progress event dicts (see _event)
+        """
+        return adrive(self.steps())
+
+    def steps(self):
+        """
+        Every remaining generation stage, as a turn
+
+        Stages whose output is already in memory are skipped and stages with
+        a matching checkpoint are restored, so a pipeline re-run after an
+        interruption only regenerates what was lost.
+
+        Yields:
+            Progress event dicts (see _event) and the Steps to run
+        """
+        agent = self.agent
+        state = agent.memory.get_state()
+        chosen_task = state.get('chosen_task')
+
+        # Stage 1: masterplan
+        started = time.time()
+        if state.get('masterplan'):
+            yield self._event('masterplan', 'skipped', started)
+        else:
+            masterplan = agent._checkpointed('masterplan')
+            status, complete = 'restored', False
+            if masterplan is None:
+                yield self._event('masterplan', 'started', started)
+                masterplan, _ = yield Step(agent._take_speculative_masterplan)
+                status, complete = 'completed', masterplan is not None
+            if masterplan is None:
+                masterplan, complete = yield Step(agent.masterplan.generate_masterplan,
+                                                  agent.masterplan.agenerate_masterplan, chosen_task, state)
+            agent._finish_masterplan(masterplan, complete)
+            self.responses['masterplan'] = agent._masterplan_response(masterplan)
+            session_id, _ = yield Step(self._checkpoint)
+            yield self._event('masterplan', status, started, checkpoint=session_id)
+
+        # Stage 2: code
+        started = time.time()
+        if state.get('code'):
+            yield self._event('code', 'skipped', started)
+        else:
+            code_data = agent._checkpointed('code')
+            status, complete = 'restored', False
+            if code_data is None:
+                yield self._event('code', 'started', started)
+                code_data, complete = yield Step(agent.codegen.generate_code, agent.codegen.agenerate_code,
+                                                 chosen_task, state['masterplan'], state['task'])
+                status = 'completed'
+            self.responses['code'] = agent._finish_code(code_data, complete)
+            session_id, _ = yield Step(self._checkpoint)
+            yield self._event('code', status, started, checkpoint=session_id)
+
+        code_data = state['code']
+
+        # Stage 3: deployment (validating the code is a compile(), so it just runs first)
+        started = time.time()
+        if state.get('deployment_guide'):
+            yield self._event('deployment', 'skipped', started)
+            return
+
+        validation = agent.codegen.validate_code(code_data)
+        code_data['validation'] = validation
+        yield self._event('code', 'validated', started, **validation)
+
+        guide = agent._checkpointed('deployment')
+        status, complete = 'restored', False
+        if guide is None:
+            yield self._event('deployment', 'started', started)
+            guide, complete = yield Step(agent.deployment.generate_deployment_guide,
+                                         agent.deployment.agenerate_deployment_guide, code_data, chosen_task, state)
+            status = 'completed'
+        agent._finish_deployment(guide, complete)
+        self.responses['deployment'] = agent._deployment_response(guide, chosen_task, code_data)
+        session_id, _ = yield Step(self._checkpoint)
+        yield self._event('deployment', status, started, checkpoint=session_id)
+
+    def response(self) -> str:
+        """Combined response for every stage that ran"""
+        return ''.join(self.responses.get(stage, '') for stage in self.STAGES)
+
+    @staticmethod
+    def format_event(event: dict) -> str:
+        """
+        Format a progress event for display
+
+        Args:
+            event: Event from run()
+
+        Returns:
+            One line of progress text
+        """
+        stage = event['stage'].capitalize()
+        step = f"[{event['index']}/{event['total']}]"
+
+        if event['status'] == 'started':
+            return f"⏳ {step} {stage}...\n"
+        if event['status'] == 'skipped':
+            return f"⏭️ {step} {stage} already done\n"
+        if event['status'] == 'restored':
+            return f"♻️ {step} {stage} restored from checkpoint\n"
+        if event['status'] == 'validated':
+            if event.get('valid'):
+                return "✅ Code compiles\n"
+            return f"⚠️ Code has a syntax error: {event.get('error')}\n"
+        return f"✅ {step} {stage} done ({event['elapsed']}s)\n"
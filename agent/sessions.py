@@ -0,0 +1,393 @@
+"""
+Session Manager - Many conversations served by one process
+
+Hosting many users means many live OPTAgents, and nothing used to evict
+them. The manager maps session ids to agents and keeps a bounded hot set
+in memory, least recently used first out:
+
+- a session idle for longer than the timeout, or pushed out when the hot
+  set is full, is saved to the session store and dropped from memory
+- while the process is over its memory budget, the least recently used
+  quarter of the hot set is evicted after each turn
+- the next message for an evicted session rehydrates it from the store,
+  in the phase it was left in
+
+Every agent shares one LLM client, one set of tools and one session store;
+only the conversation memory and the checkpoint journal are per session.
+A session in the middle of a turn is never evicted.
+
+The manager's lock only guards the map of sessions. Loading a session from
+the store, each of its turns and saving it on eviction happen under that
+session's own lock, so one session's disk I/O never holds up another
+session's turn, and two messages for the same session run one after the
+other.
+"""
+
+import os
+import re
+import time
+import uuid
+import asyncio
+import threading
+from collections import OrderedDict
+
+from agent.core import AgentTools, OPTAgent
+from memory.session_store import SessionStore, get_shared_session_store
+
+
+# Session ids become directory names under output_root
+SESSION_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,128}")
+
+
+def resident_mb():
+    """
+    Resident memory of this process
+
+    Returns:
+        Megabytes in RAM, or None where /proc is not available
+    """
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+
+class _Slot:
+    __slots__ = ('agent', 'lock', 'busy', 'evicting', 'last_used')
+
+    def __init__(self, agent: OPTAgent = None):
+        """One session in the hot set (agent is None until it is loaded)"""
+        self.agent = agent
+        self.lock = threading.Lock()    # held while the session is loaded, in a turn or saved
+        self.busy = 0                   # turns in progress, plus callers waiting for the load
+        self.evicting = False
+        self.last_used = time.monotonic()
+
+
+class SessionManager:
+    def __init__(self, max_sessions: int = None, idle_timeout: float = None, max_memory_mb: float = None,
+                 llm=None, session_store: SessionStore = None, output_root: str = "output", **agent_options):
+        """
+        Initialize the session manager
+
+        Args:
+            max_sessions: Agents kept in memory at once
+                (defaults to OPT_MAX_SESSIONS, or 100)
+            idle_timeout: Seconds without a message before a session is evicted
+                (defaults to OPT_SESSION_IDLE_TIMEOUT, or 1800; 0 = never)
+            max_memory_mb: Resident memory above which sessions are evicted
+                (defaults to OPT_SESSION_MEMORY_MB, or 0 = no limit)
+            llm: LLMClient shared by every agent (defaults to the process-wide client)
+            session_store: Store sessions are evicted to and rehydrated from
+                (defaults to the process-wide store)
+            output_root: Each session writes its files to output_root/<session id>
+            **agent_options: Passed on to every OPTAgent (pipeline_mode,
+                history_turns, ...); autosave is on unless set to False
+        """
+        if max_sessions is None:
+            max_sessions = int(os.getenv("OPT_MAX_SESSIONS", "100"))
+        if idle_timeout is None:
+            idle_timeout = float(os.getenv("OPT_SESSION_IDLE_TIMEOUT", "1800"))
+        if max_memory_mb is None:
+            max_memory_mb = float(os.getenv("OPT_SESSION_MEMORY_MB", "0"))
+        self.max_sessions = max(1, max_sessions)
+        self.idle_timeout = idle_timeout
+        self.max_memory_mb = max_memory_mb
+
+        self.tools = AgentTools(llm)
+        self.session_store = session_store or get_shared_session_store()
+        self.output_root = output_root
+        self.agent_options = {'autosave': True}
+        self.agent_options.update(agent_options)
+
+        self._lock = threading.Lock()
+        self._slots = OrderedDict()         # session id → _Slot, least recently used first
+        self.stats = {
+            'created': 0,
+            'rehydrated': 0,
+            'evicted_idle': 0,
+            'evicted_lru': 0,
+            'evicted_memory': 0,
+        }
+
+    @staticmethod
+    def _check_id(session_id: str):
+        """Reject ids that are not safe as a directory name"""
+        if not isinstance(session_id, str) or not SESSION_ID_PATTERN.fullmatch(session_id):
+            raise ValueError(f"Invalid session id: {session_id!r}")
+
+    def _build_agent(self, session_id: str) -> OPTAgent:
+        """New agent for a session, on the shared tools and store"""
+        return OPTAgent(tools=self.tools, session_store=self.session_store, session_id=session_id,
+                        output_dir=os.path.join(self.output_root, session_id), **self.agent_options)
+
+    def _rehydrate(self, session_id: str) -> OPTAgent:
+        """Load an evicted session from the store (its slot's lock held)"""
+        state = self.session_store.load_state(session_id)
+        if state is None:
+            raise ValueError(f"No saved session found for: {session_id}")
+        agent = self._build_agent(session_id)
+        agent.memory.restore(state, session_id=session_id)
+        print(f"📂 Session {session_id} rehydrated in phase: {agent.memory.get_phase().upper()}")
+        with self._lock:
+            self.stats['rehydrated'] += 1
+        return agent
+
+    def create(self, session_id: str = None) -> str:
+        """
+        Start a new session
+
+        Args:
+            session_id: Key of the session (defaults to a new id); must not
+                be in use, in memory or in the store
+
+        Returns:
+            The session id
+
+        Raises:
+            ValueError: If the id is invalid or already taken
+        """
+        session_id = session_id or uuid.uuid4().hex
+        self._check_id(session_id)
+        if session_id in self._slots or self.session_store.exists(session_id):
+            raise ValueError(f"Session already exists: {session_id} (send it a message to continue it)")
+
+        slot = _Slot(self._build_agent(session_id))
+        with self._lock:
+            if session_id in self._slots:
+                raise ValueError(f"Session already exists: {session_id} (send it a message to continue it)")
+            self._slots[session_id] = slot
+            self.stats['created'] += 1
+        self._make_room()
+        return session_id
+
+    def get(self, session_id: str) -> OPTAgent:
+        """
+        Get a session's agent, rehydrating it from the store if it was evicted
+
+        The agent can be evicted again once this returns; use chat() to run
+        a turn.
+
+        Args:
+            session_id: Key of the session
+
+        Returns:
+            The session's OPTAgent
+
+        Raises:
+            ValueError: If the id is invalid, or the session is neither in
+                memory nor in the store
+        """
+        agent = self._acquire(session_id)
+        self._release(session_id)
+        return agent
+
+    def _acquire(self, session_id: str) -> OPTAgent:
+        """Start a turn: take the session's lock and return its agent, loading it if needed"""
+        self._check_id(session_id)
+        self.evict_idle()
+
+        with self._lock:
+            slot = self._slots.get(session_id)
+            if slot is None:
+                # Placeholder, so concurrent messages for this session wait for one load
+                slot = self._slots[session_id] = _Slot()
+            slot.busy += 1
+            self._slots.move_to_end(session_id)
+
+        slot.lock.acquire()
+        try:
+            if slot.agent is None:
+                slot.agent = self._rehydrate(session_id)
+        except BaseException:
+            slot.lock.release()
+            with self._lock:
+                slot.busy -= 1
+                if slot.agent is None and not slot.busy and self._slots.get(session_id) is slot:
+                    del self._slots[session_id]
+            raise
+        return slot.agent
+
+    def _release(self, session_id: str):
+        """End a session's turn, then evict what no longer fits"""
+        with self._lock:
+            slot = self._slots[session_id]
+            slot.busy -= 1
+            slot.last_used = time.monotonic()
+        slot.lock.release()
+        self._make_room()
+
+    def chat(self, session_id: str, user_message: str) -> str:
+        """
+        Run one turn of a session
+
+        Args:
+            session_id: Key of the session
+            user_message: What the user said
+
+        Returns:
+            Agent's response
+        """
+        agent = self._acquire(session_id)
+        try:
+            return agent.chat(user_message)
+        finally:
+            self._release(session_id)
+
+    async def achat(self, session_id: str, user_message: str) -> str:
+        """
+        Async variant of chat(); rehydration and eviction run off the event loop
+
+        Args:
+            session_id: Key of the session
+            user_message: What the user said
+
+        Returns:
+            Agent's response
+        """
+        agent = await asyncio.to_thread(self._acquire, session_id)
+        try:
+            return await agent.achat(user_message)
+        finally:
+            await asyncio.to_thread(self._release, session_id)
+
+    def chat_stream(self, session_id: str, user_message: str):
+        """
+        Streaming variant of chat()
+
+        Args:
+            session_id: Key of the session
+            user_message: What the user said
+
+        Yields:
+            Chunks of the agent's response
+        """
+        agent = self._acquire(session_id)
+        try:
+            yield from agent.chat_stream(user_message)
+        finally:
+            self._release(session_id)
+
+    def evict(self, session_id: str) -> bool:
+        """
+        Save a session to the store and drop it from memory
+
+        Args:
+            session_id: Key of the session
+
+        Returns:
+            True if it was evicted, False if it is not in memory or is mid-turn
+        """
+        with self._lock:
+            slot = self._slots.get(session_id)
+            if slot is None or not self._evictable(slot):
+                return False
+            slot.evicting = True
+        self._evict([(session_id, slot)], 'lru')
+        return True
+
+    def evict_idle(self, now: float = None) -> int:
+        """
+        Evict every session idle for longer than the timeout
+
+        Turns already do this; call it from a timer to free memory while no
+        messages arrive.
+
+        Args:
+            now: time.monotonic() value to measure idleness against (defaults to now)
+
+        Returns:
+            Number of sessions evicted
+        """
+        if not self.idle_timeout:
+            return 0
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            victims = [(session_id, slot) for session_id, slot in self._slots.items()
+                       if self._evictable(slot) and now - slot.last_used > self.idle_timeout]
+            for _, slot in victims:
+                slot.evicting = True
+        return self._evict(victims, 'idle')
+
+    def _make_room(self):
+        """Evict least recently used sessions over the hot set size or memory budget"""
+        resident = resident_mb() if self.max_memory_mb else None
+        victims = {}
+        with self._lock:
+            candidates = [(session_id, slot) for session_id, slot in self._slots.items() if self._evictable(slot)]
+            active = sum(1 for slot in self._slots.values() if not slot.evicting)
+            over = active - self.max_sessions
+            if over > 0:
+                victims['lru'] = candidates[:over]
+                candidates = candidates[over:]
+            if resident is not None and resident > self.max_memory_mb:
+                victims['memory'] = candidates[:max(1, active // 4)]
+            for chosen in victims.values():
+                for _, slot in chosen:
+                    slot.evicting = True
+
+        for reason, chosen in victims.items():
+            self._evict(chosen, reason)
+
+    @staticmethod
+    def _evictable(slot: _Slot) -> bool:
+        """Loaded, not in a turn and not already being evicted (manager lock held)"""
+        return slot.agent is not None and not slot.busy and not slot.evicting
+
+    def _evict(self, victims: list, reason: str) -> int:
+        """
+        Save sessions marked as evicting and drop them (manager lock not held)
+
+        A message arriving during the save waits on the session's lock and
+        then keeps the saved agent, so nothing is loaded before it is saved.
+
+        Returns:
+            Number of sessions dropped
+        """
+        dropped = 0
+        for session_id, slot in victims:
+            with slot.lock:
+                agent = slot.agent
+                if agent.speculation is not None:
+                    agent.speculation.cancel_all()
+                self.session_store.save(agent.memory)
+
+                with self._lock:
+                    slot.evicting = False
+                    if slot.busy:
+                        continue
+                    del self._slots[session_id]
+                    slot.agent = None
+                    self.stats[f'evicted_{reason}'] += 1
+            dropped += 1
+            print(f"💤 Session {session_id} evicted to the session store ({reason})")
+        return dropped
+
+    def close(self):
+        """Save every session in memory and drop them all"""
+        with self._lock:
+            slots, self._slots = self._slots, OrderedDict()
+        for slot in slots.values():
+            with slot.lock:
+                if slot.agent is None:
+                    continue
+                if slot.agent.speculation is not None:
+                    slot.agent.speculation.cancel_all()
+                self.session_store.save(slot.agent.memory)
+
+    def get_stats(self) -> dict:
+        """Get the manager counters and the current hot set size"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['active'] = len(self._slots)
+            stats['busy'] = sum(1 for slot in self._slots.values() if slot.busy)
+        stats['resident_mb'] = resident_mb()
+        return stats
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, session_id) -> bool:
+        return session_id in self._slots
@@ -0,0 +1,214 @@
+"""
+Speculative Masterplans - Generate plans while the user is still choosing
+
+As soon as the suggestions are displayed, masterplan generation starts in
+the background for the top-N suggestions. When the user picks one, that
+job is promoted (its output is reused or streamed as it finishes) and the
+others are cancelled. A token budget caps how much each round of
+suggestions spends on plans nobody ends up choosing.
+"""
+
+import os
+import threading
+import contextvars
+
+from tools.outcome import Outcome, track_outcome
+
+# Streamed deltas are often a few characters, sometimes several words:
+# budget by text length, at the same ~4 characters per token the scheduler uses
+CHARS_PER_TOKEN = 4
+
+
+class SpeculativeJob:
+    def __init__(self, suggestion: dict):
+        """
+        One background masterplan generation
+
+        Args:
+            suggestion: The suggestion this plan is for
+        """
+        self.suggestion = suggestion
+        self.chunks = []
+        self.chars = 0
+        self.tokens = 0             # estimated from chars
+        self.status = 'running'     # running → done / cancelled / over_budget / failed
+        self.outcome = Outcome()    # degraded if the tool fell back or the stream was cut short
+        self.promoted = False
+        self.cancel_event = threading.Event()
+        self.condition = threading.Condition()
+
+    @property
+    def finished(self) -> bool:
+        return self.status != 'running'
+
+    @property
+    def complete(self) -> bool:
+        """True if the job finished with a complete LLM result"""
+        return self.status == 'done' and self.outcome.complete
+
+    @property
+    def usable(self) -> bool:
+        """True if the job completed, or is still running and can be awaited"""
+        return self.status in ('running', 'done')
+
+
+class SpeculativeMasterplans:
+    def __init__(self, masterplan_tool, top_n: int = None, token_budget: int = None):
+        """
+        Initialize the speculation manager
+
+        Args:
+            masterplan_tool: MasterplanTool used to generate plans
+            top_n: How many top-ranked suggestions to speculate on
+                (defaults to OPT_SPECULATIVE_MASTERPLANS, or 3)
+            token_budget: Max tokens spent on speculative (not yet chosen) plans
+                per round of suggestions (defaults to OPT_SPECULATIVE_TOKEN_BUDGET,
+                or 6000)
+        """
+        self.masterplan_tool = masterplan_tool
+        self.top_n = top_n or int(os.getenv("OPT_SPECULATIVE_MASTERPLANS", "3"))
+        self.token_budget = token_budget or int(os.getenv("OPT_SPECULATIVE_TOKEN_BUDGET", "6000"))
+
+        self._lock = threading.Lock()
+        self.jobs = []
+        self.round_tokens = 0
+        self.stats = {
+            'started': 0,
+            'promoted': 0,
+            'cancelled': 0,
+            'over_budget': 0,
+            'speculative_tokens': 0,
+        }
+
+    def start(self, suggestions: list, memory_state: dict):
+        """
+        Start background generation for the top-N suggestions
+
+        Args:
+            suggestions: Suggestions as displayed to the user
+            memory_state: OPT context for the masterplan prompt
+        """
+        self.cancel_all()
+
+        # The previous round's jobs stop before their next chunk: each round gets the full budget
+        with self._lock:
+            self.round_tokens = 0
+        ranked = sorted(suggestions, key=lambda s: s.get('rank', 99))[:self.top_n]
+        self.jobs = [SpeculativeJob(suggestion) for suggestion in ranked]
+
+        for job in self.jobs:
+            # Each thread keeps the caller's context (session metrics)
+            context = contextvars.copy_context()
+            thread = threading.Thread(target=context.run, args=(self._run, job, memory_state), daemon=True)
+            thread.start()
+            self.stats['started'] += 1
+
+        print(f"🔮 Speculatively generating {len(self.jobs)} masterplan(s) in the background")
+
+    def _run(self, job: SpeculativeJob, memory_state: dict):
+        """Worker: stream one masterplan, stopping on cancel or budget exhaustion"""
+        chunks = self.masterplan_tool.stream_masterplan(job.suggestion, memory_state)
+        status = 'done'
+
+        try:
+            with track_outcome(job.outcome):
+                for chunk in chunks:
+                    if job.cancel_event.is_set():
+                        status = 'cancelled'
+                        break
+
+                    tokens = -(-(job.chars + len(chunk)) // CHARS_PER_TOKEN) - job.tokens
+                    with self._lock:
+                        if not job.promoted:
+                            if self.round_tokens + tokens > self.token_budget:
+                                status = 'over_budget'
+                                self.stats['over_budget'] += 1
+                                break
+                            self.round_tokens += tokens
+                            self.stats['speculative_tokens'] += tokens
+
+                    with job.condition:
+                        job.chunks.append(chunk)
+                        job.chars += len(chunk)
+                        job.tokens += tokens
+                        job.condition.notify_all()
+        except Exception as e:
+            print(f"⚠️ Speculative masterplan failed: {str(e)}")
+            status = 'failed'
+        finally:
+            # Closing the generator also closes the HTTP stream
+            chunks.close()
+            with job.condition:
+                job.status = status
+                job.condition.notify_all()
+
+    def promote(self, chosen: dict):
+        """
+        Keep the job for the chosen suggestion and cancel the rest
+
+        Args:
+            chosen: The suggestion the user picked
+
+        Returns:
+            The promoted SpeculativeJob, or None if there is no usable one
+        """
+        promoted = None
+        with self._lock:
+            for job in self.jobs:
+                if job.suggestion is chosen or job.suggestion == chosen:
+                    job.promoted = True
+                    promoted = job
+                elif not job.finished:
+                    job.cancel_event.set()
+                    self.stats['cancelled'] += 1
+
+        if promoted is not None and promoted.usable:
+            self.stats['promoted'] += 1
+            print(f"🔮 Promoted speculative masterplan: {chosen.get('name')}")
+            return promoted
+        return None
+
+    def stream(self, job: SpeculativeJob):
+        """
+        Yield a promoted job's chunks, waiting for new ones until it finishes
+
+        Args:
+            job: Job from promote()
+
+        Yields:
+            Masterplan text chunks
+        """
+        sent = 0
+        while True:
+            with job.condition:
+                while sent == len(job.chunks) and not job.finished:
+                    job.condition.wait()
+                pending = job.chunks[sent:]
+                finished = job.finished
+            for chunk in pending:
+                yield chunk
+            sent += len(pending)
+            if finished and sent == len(job.chunks):
+                return
+
+    def result(self, job: SpeculativeJob):
+        """
+        Wait for a promoted job to finish
+
+        Args:
+            job: Job from promote()
+
+        Returns:
+            The full masterplan, or None if the job did not complete (or only
+            produced a fallback), so the plan has to be generated now
+        """
+        text = ''.join(self.stream(job)).strip()
+        return text if job.complete and text else None
+
+    def cancel_all(self):
+        """Cancel every running job"""
+        with self._lock:
+            for job in self.jobs:
+                if not job.finished and not job.promoted:
+                    job.cancel_event.set()
+                    self.stats['cancelled'] += 1
@@ -0,0 +1,173 @@
+"""
+Turn Steps - Each conversation turn written once, for sync and async callers
+
+A turn is a generator that yields its output (response text, or progress
+events for the pipeline) and, in between, the LLM generations it needs as
+Step objects. The driver runs each Step and sends back its result:
+
+- drive() makes blocking calls, for chat() and chat_stream()
+- adrive() awaits the tools' async methods, for achat() and achat_stream()
+
+so the phase logic exists only once, and the async side never falls back
+to running a whole sync turn in a thread.
+"""
+
+import asyncio
+
+from tools.outcome import track_outcome
+
+
+class Step:
+    __slots__ = ('call', 'acall', 'args', 'stream', 'show')
+
+    def __init__(self, call, acall=None, *args, stream: bool = False, show=None):
+        """
+        One generation (or other blocking wait) a turn needs
+
+        Args:
+            call: Blocking callable, e.g. masterplan.generate_masterplan
+            acall: Its async counterpart (None runs call in a worker thread
+                under adrive())
+            *args: Arguments for either
+            stream: call/acall produce chunks, which the driver passes on as
+                output while they arrive
+            show: Formats each streamed chunk for output (defaults to the
+                chunk itself)
+        """
+        self.call = call
+        self.acall = acall
+        self.args = args
+        self.stream = stream
+        self.show = show
+
+    def output(self, chunk):
+        """What the driver passes on for one streamed chunk"""
+        return self.show(chunk) if self.show else chunk
+
+
+def drive(turn):
+    """
+    Run a turn with blocking calls
+
+    Each Step is sent back (result, complete): for a stream, result is the
+    list of chunks; complete is False if a tool fell back or was cut short
+    (see tools/outcome.py).
+
+    Args:
+        turn: Generator yielding output and Steps
+
+    Yields:
+        The turn's output
+    """
+    result = None
+    try:
+        while True:
+            try:
+                item = turn.send(result)
+            except StopIteration:
+                return
+            result = None
+            if not isinstance(item, Step):
+                yield item
+                continue
+
+            with track_outcome() as outcome:
+                if item.stream:
+                    output = []
+                    for chunk in item.call(*item.args):
+                        output.append(chunk)
+                        yield item.output(chunk)
+                else:
+                    output = item.call(*item.args)
+            result = (output, outcome.complete)
+    finally:
+        turn.close()
+
+
+async def adrive(turn):
+    """
+    Async variant of drive(): awaits each Step's acall
+
+    Args:
+        turn: Generator yielding output and Steps
+
+    Yields:
+        The turn's output
+    """
+    result = None
+    try:
+        while True:
+            try:
+                item = turn.send(result)
+            except StopIteration:
+                return
+            result = None
+            if not isinstance(item, Step):
+                yield item
+                continue
+
+            with track_outcome() as outcome:
+                if item.stream:
+                    output = []
+                    async for chunk in _achunks(item):
+                        output.append(chunk)
+                        yield item.output(chunk)
+                elif item.acall is not None:
+                    output = await item.acall(*item.args)
+                else:
+                    output = await asyncio.to_thread(item.call, *item.args)
+            result = (output, outcome.complete)
+    finally:
+        turn.close()
+
+
+async def _achunks(step: Step):
+    """Chunks of a streaming Step, reading a blocking stream in a worker thread"""
+    if step.acall is not None:
+        async for chunk in step.acall(*step.args):
+            yield chunk
+        return
+
+    chunks = iter(step.call(*step.args))
+    end = object()
+    while True:
+        chunk = await asyncio.to_thread(next, chunks, end)
+        if chunk is end:
+            return
+        yield chunk
+
+
+def run(turn) -> str:
+    """Run a turn with blocking calls and return its whole text"""
+    return ''.join(drive(turn))
+
+
+async def arun(turn) -> str:
+    """Async variant of run()"""
+    return ''.join([part async for part in adrive(turn)])
+
+
+def map_output(turn, convert):
+    """
+    Wrap a turn, converting its output; Steps and their results pass through
+
+    Args:
+        turn: Generator yielding output and Steps
+        convert: Called on each output item; None drops the item
+
+    Yields:
+        Converted output and the turn's Steps
+    """
+    result = None
+    while True:
+        try:
+            item = turn.send(result)
+        except StopIteration:
+            return
+        result = None
+        if isinstance(item, Step):
+            result = yield item
+            continue
+        converted = convert(item)
+        if converted is not None:
+            yield converted
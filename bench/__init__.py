@@ -0,0 +1,3 @@
+"""
+Benchmark tooling - offline stand-in LLM server and benchmark suite
+"""
@@ -0,0 +1,385 @@
+"""
+Benchmark Suite - End-to-end latency of OPTAgent conversations
+
+Drives the scripted scenario conversations from tests/test_scenarios.py,
+plus longer synthetic ones, through OPTAgent.chat() against the offline
+stand-in server, and reports:
+
+- per-phase wall time per session
+- p50/p95/p99 latency of chat() calls (overall and per phase)
+- LLM calls and tokens in/out per session
+- peak RSS of the process
+
+Results are written as JSON so runs can be diffed; --baseline compares
+against an earlier result and exits non-zero on a regression.
+
+Usage:
+    python -m bench.benchmark --latency 0.05 --tokens-per-sec 2000 --output bench/results/latest.json
+    python -m bench.benchmark --baseline bench/results/main.json --max-regression 0.2
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import contextlib
+
+try:
+    import resource
+except ImportError:     # Windows
+    resource = None
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent.core import OPTAgent
+from bench.standin_server import StandinServer
+from tools.llm_client import LLMClient
+from tests.test_scenarios import SCENARIOS
+
+
+# Sent after the script ends until the session is done (picks suggestion 1)
+FILLER_MESSAGE = "1"
+MAX_EXTRA_TURNS = 10
+
+SYNTHETIC_ANSWERS = [
+    ("I run a {business}", "business_type"),
+    ("We are {size} people", "business_size"),
+    ("We use {tools}", "tools"),
+    ("{pain} takes far too much time", "pain_points"),
+    ("The {process} process", "process_name"),
+    ("{steps}", "process_desc"),
+    ("{frequency}", "frequency"),
+    ("About {minutes} minutes", "time_spent"),
+    ("{task}", "task_name"),
+    ("{steps}", "task_desc"),
+    ("The {tools} data", "inputs"),
+    ("An updated report and an email", "outputs"),
+]
+
+SYNTHETIC_VALUES = {
+    'business': ["dental clinic", "bike repair shop", "tutoring agency", "flower shop", "law office"],
+    'tools': ["Excel and Outlook", "Google Sheets and Gmail", "QuickBooks and email", "Notion and Slack"],
+    'pain': ["Scheduling", "Invoicing", "Reporting", "Data entry", "Follow-up emails"],
+    'process': ["appointment booking", "monthly reporting", "customer follow-up", "order intake"],
+    'task': ["Sending reminder emails", "Building the weekly report", "Copying orders into the sheet"],
+    'frequency': ["Daily", "Weekly", "Twice a week", "Every single day"],
+}
+
+STEP_PHRASES = [
+    "open the spreadsheet", "check each row", "copy the details", "write the email",
+    "update the status column", "double-check totals", "file the paperwork", "ping the team",
+]
+
+
+def synthetic_conversation(seed: int, verbosity: int = 3, extra_turns: int = 5) -> list:
+    """
+    Build a longer scripted conversation
+
+    Args:
+        seed: Random seed, so runs are reproducible
+        verbosity: Sentences per description answer
+        extra_turns: Follow-up messages after the session is done
+
+    Returns:
+        List of (user message, stage) tuples
+    """
+    rng = random.Random(seed)
+    values = {key: rng.choice(options) for key, options in SYNTHETIC_VALUES.items()}
+    values['size'] = rng.randint(1, 12)
+    values['minutes'] = rng.choice([15, 30, 45, 90])
+
+    conversation = [("Hello", "start")]
+    for template, stage in SYNTHETIC_ANSWERS:
+        steps = ', then '.join(rng.choice(STEP_PHRASES) for _ in range(verbosity * 3))
+        message = template.format(steps=steps.capitalize(), **values)
+        conversation.append((message, stage))
+
+    conversation.append(("Sounds good, go ahead", "analysis"))
+    conversation.append(("1", "choice"))
+    for i in range(extra_turns):
+        conversation.append((f"Thanks! One more question ({i + 1})", "followup"))
+    return conversation
+
+
+def percentile(values: list, pct: float):
+    """Nearest-rank percentile (None for no values)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def latency_summary(values: list) -> dict:
+    """p50/p95/p99/mean/max of latencies in milliseconds"""
+    return {
+        'count': len(values),
+        'p50_ms': _ms(percentile(values, 50)),
+        'p95_ms': _ms(percentile(values, 95)),
+        'p99_ms': _ms(percentile(values, 99)),
+        'mean_ms': _ms(sum(values) / len(values)) if values else None,
+        'max_ms': _ms(max(values)) if values else None,
+    }
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 2)
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None if unavailable)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return round(peak / divisor, 1)
+
+
+class Benchmark:
+    def __init__(self, llm: LLMClient, server: StandinServer = None, pipeline_mode: bool = False,
+                 quiet: bool = True):
+        """
+        Initialize the benchmark
+
+        Args:
+            llm: Client pointed at the replay backend
+            server: In-process stand-in server, used to count LLM calls and
+                tokens per session (None when using an external backend)
+            pipeline_mode: Run agents in single-turn pipeline mode
+            quiet: Silence the agent's console output while measuring
+        """
+        self.llm = llm
+        self.server = server
+        self.pipeline_mode = pipeline_mode
+        self.quiet = quiet
+        self.output_dir = tempfile.mkdtemp(prefix="opt-bench-")
+
+    def _server_counters(self) -> dict:
+        if self.server is None:
+            return {}
+        with self.server.state._lock:
+            return dict(self.server.state.stats)
+
+    def run_session(self, name: str, conversation: list) -> dict:
+        """
+        Drive one conversation through OPTAgent.chat()
+
+        Args:
+            name: Scenario name
+            conversation: List of (user message, stage) tuples
+
+        Returns:
+            Per-session result with call latencies and phase times
+        """
+        before = self._server_counters()
+        calls = []
+        phase_times = {}
+        started = time.perf_counter()
+        error = None
+
+        sink = open(os.devnull, 'w', encoding='utf-8') if self.quiet else None
+        try:
+            with contextlib.redirect_stdout(sink) if sink else contextlib.nullcontext():
+                agent = OPTAgent(llm=self.llm, speculative_masterplans=0, pipeline_mode=self.pipeline_mode,
+                                 output_dir=os.path.join(self.output_dir, name.replace(' ', '_')))
+
+                messages = [message for message, _ in conversation]
+                messages += [FILLER_MESSAGE] * MAX_EXTRA_TURNS
+                for i, message in enumerate(messages):
+                    phase = agent.memory.get_state()['phase']
+                    if i >= len(conversation) and phase == 'done':
+                        break
+
+                    call_started = time.perf_counter()
+                    agent.chat(message)
+                    elapsed = time.perf_counter() - call_started
+
+                    calls.append({'phase': phase, 'seconds': elapsed})
+                    phase_times[phase] = phase_times.get(phase, 0.0) + elapsed
+
+                final_phase = agent.memory.get_state()['phase']
+        except Exception as e:
+            error = str(e)
+            final_phase = None
+        finally:
+            if sink:
+                sink.close()
+
+        after = self._server_counters()
+        result = {
+            'scenario': name,
+            'turns': len(calls),
+            'final_phase': final_phase,
+            'completed': final_phase == 'done',
+            'error': error,
+            'wall_time_s': round(time.perf_counter() - started, 3),
+            'phase_wall_time_s': {phase: round(t, 3) for phase, t in phase_times.items()},
+            'chat_latency': latency_summary([c['seconds'] for c in calls]),
+            '_calls': calls,
+        }
+        if after:
+            result['llm_calls'] = after['requests'] - before['requests']
+            result['tokens_in'] = after['prompt_tokens'] - before['prompt_tokens']
+            result['tokens_out'] = after['completion_tokens'] - before['completion_tokens']
+        return result
+
+    def run(self, sessions: list, repeat: int = 1) -> dict:
+        """
+        Run every session and aggregate
+
+        Args:
+            sessions: List of (name, conversation)
+            repeat: Times each session is run
+
+        Returns:
+            Report dict
+        """
+        results = []
+        for round_number in range(repeat):
+            for name, conversation in sessions:
+                result = self.run_session(name, conversation)
+                result['round'] = round_number + 1
+                results.append(result)
+                icon = "✅" if result['completed'] else "❌"
+                print(f"{icon} {name} (round {round_number + 1}): {result['turns']} turns, "
+                      f"{result['wall_time_s']}s, p95 {result['chat_latency']['p95_ms']}ms")
+
+        all_calls = [c for r in results for c in r.pop('_calls')]
+        by_phase = {}
+        for call in all_calls:
+            by_phase.setdefault(call['phase'], []).append(call['seconds'])
+
+        summary = {
+            'sessions': len(results),
+            'completed': sum(1 for r in results if r['completed']),
+            'chat_latency': latency_summary([c['seconds'] for c in all_calls]),
+            'chat_latency_by_phase': {phase: latency_summary(v) for phase, v in by_phase.items()},
+            'session_wall_time': latency_summary([r['wall_time_s'] for r in results]),
+            'peak_rss_mb': peak_rss_mb(),
+        }
+        if results and 'llm_calls' in results[0]:
+            summary['llm_calls_per_session'] = round(sum(r['llm_calls'] for r in results) / len(results), 2)
+            summary['tokens_in_per_session'] = round(sum(r['tokens_in'] for r in results) / len(results), 1)
+            summary['tokens_out_per_session'] = round(sum(r['tokens_out'] for r in results) / len(results), 1)
+
+        return {'summary': summary, 'sessions': results}
+
+
+def compare(report: dict, baseline: dict, max_regression: float) -> list:
+    """
+    Compare latency percentiles against a baseline report
+
+    Args:
+        report: Current report
+        baseline: Earlier report
+        max_regression: Allowed relative slowdown (0.2 = 20%)
+
+    Returns:
+        List of regression descriptions (empty if none)
+    """
+    regressions = []
+    current, previous = report['summary'], baseline['summary']
+
+    checks = [('chat_latency', key) for key in ('p50_ms', 'p95_ms', 'p99_ms')]
+    checks.append(('session_wall_time', 'p50_ms'))
+    for group, key in checks:
+        new, old = current[group].get(key), previous.get(group, {}).get(key)
+        if not new or not old:
+            continue
+        change = (new - old) / old
+        print(f"   {group}.{key}: {old} → {new} ({change:+.1%})")
+        if change > max_regression:
+            regressions.append(f"{group}.{key} +{change:.1%}")
+
+    for key in ('llm_calls_per_session', 'tokens_in_per_session', 'tokens_out_per_session'):
+        new, old = current.get(key), previous.get(key)
+        if new is not None and old:
+            print(f"   {key}: {old} → {new}")
+            if new > old * (1 + max_regression):
+                regressions.append(f"{key} {old} → {new}")
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end OPTAgent latency benchmark")
+    parser.add_argument('--repeat', type=int, default=3, help="Rounds over all sessions")
+    parser.add_argument('--synthetic', type=int, default=3, help="Number of longer synthetic conversations")
+    parser.add_argument('--verbosity', type=int, default=3, help="Sentences per synthetic description answer")
+    parser.add_argument('--latency', type=float, default=0.05, help="Stand-in time to first token (s)")
+    parser.add_argument('--tokens-per-sec', type=float, default=2000, help="Stand-in token rate")
+    parser.add_argument('--fixtures', default=None, help="Stand-in fixture directory")
+    parser.add_argument('--base-url', default=None, help="Use an already running backend instead")
+    parser.add_argument('--pipeline', action='store_true', help="Run agents in pipeline mode")
+    parser.add_argument('--output', default=os.path.join("bench", "results", "latest.json"))
+    parser.add_argument('--baseline', default=None, help="Earlier result JSON to compare against")
+    parser.add_argument('--max-regression', type=float, default=0.2)
+    parser.add_argument('--verbose', action='store_true', help="Show the agent's console output")
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.base_url
+    if base_url is None:
+        server = StandinServer(port=0, mode='replay', fixtures_dir=args.fixtures,
+                               latency=args.latency, tokens_per_sec=args.tokens_per_sec)
+        base_url = server.start()
+
+    # Response cache off: every call should reach the backend
+    llm = LLMClient(api_key=os.getenv("GROQ_API_KEY") or "standin", base_url=base_url, cache=False)
+
+    sessions = [(name, conversation) for name, conversation in SCENARIOS.items()]
+    sessions += [(f"Synthetic {i + 1}", synthetic_conversation(i, args.verbosity)) for i in range(args.synthetic)]
+
+    print(f"\n⏱️ Benchmarking {len(sessions)} conversation(s) x {args.repeat} against {base_url}\n")
+    report = Benchmark(llm, server, pipeline_mode=args.pipeline, quiet=not args.verbose).run(sessions, args.repeat)
+    report['config'] = {
+        'repeat': args.repeat,
+        'synthetic': args.synthetic,
+        'latency': args.latency if server else None,
+        'tokens_per_sec': args.tokens_per_sec if server else None,
+        'base_url': args.base_url,
+        'pipeline_mode': args.pipeline,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+    summary = report['summary']
+    print(f"\n📊 {summary['completed']}/{summary['sessions']} sessions completed")
+    print(f"   chat() p50/p95/p99: {summary['chat_latency']['p50_ms']} / "
+          f"{summary['chat_latency']['p95_ms']} / {summary['chat_latency']['p99_ms']} ms")
+    if 'llm_calls_per_session' in summary:
+        print(f"   LLM calls/session: {summary['llm_calls_per_session']}, "
+              f"tokens in/out: {summary['tokens_in_per_session']} / {summary['tokens_out_per_session']}")
+    print(f"   Peak RSS: {summary['peak_rss_mb']} MB")
+    print(f"💾 Results saved to: {args.output}\n")
+
+    llm.close()
+    if server:
+        server.stop()
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"🔍 Comparing against {args.baseline}")
+        regressions = compare(report, baseline, args.max_regression)
+        if regressions:
+            print(f"\n❌ Regressions: {', '.join(regressions)}\n")
+            return 1
+        print("\n✅ No regressions\n")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""
+Session Memory Benchmark - Bytes per resident session
+
+Builds many filled-in sessions (OPT answers, three suggestions, a chosen
+task, N turns of conversation, and a masterplan and deployment guide shown
+in the agent's replies) and measures, with tracemalloc, what their state
+costs in the slotted layout of memory/models.py and in the plain
+nested-dict layout it replaced (the shape to_dict() returns). The texts
+are created before measuring and shared by both layouts, so the numbers
+compare container overhead and the copies of the artifacts embedded in
+replies, which is what the layouts differ in.
+
+Usage:
+    python -m bench.session_memory --sessions 2000 --turns 20
+"""
+
+import os
+import sys
+import argparse
+import tracemalloc
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from memory.models import SessionState
+
+
+def _texts(session: int, turns: int) -> dict:
+    """Distinct strings for one session, created outside the measurement"""
+    return {
+        'answers': [f"Session {session} user message {turn}" for turn in range(turns)],
+        'replies': [f"Session {session} agent reply {turn}" for turn in range(turns)],
+        'fields': [f"Session {session} value {i}" for i in range(14)],
+        'suggestions': [
+            {'rank': rank, 'name': f"Session {session} automation {rank}", 'description': "Automate it",
+             'time_saved': "2 hours/week", 'money_saved': "$100/month", 'complexity': "Easy",
+             'impact': "High", 'value_score': 80, 'implementation': "A script",
+             'why_this_rank': "Saves the most time"}
+            for rank in (1, 2, 3)
+        ],
+        'masterplan': f"# Session {session} masterplan\n\n" + "1. Read the stock sheet and flag low items.\n" * 60,
+        'guide': f"# Session {session} deployment\n\n" + "- Install Python, then set the .env values.\n" * 60,
+    }
+
+
+def build_state(texts: dict) -> SessionState:
+    """Fill in one session's state the way a conversation does"""
+    state = SessionState()
+    fields = iter(texts['fields'])
+    for section in ('operating_model', 'process', 'task'):
+        for name in state[section].FIELDS[:-1]:
+            state[section][name] = next(fields)
+        state[section]['completed'] = True
+    for answer, reply in zip(texts['answers'], texts['replies']):
+        state.messages.append('user', answer)
+        state.messages.append('agent', reply)
+    state['suggestions'] = texts['suggestions']
+    state['chosen_task'] = state['suggestions'][0]
+    artifacts = (('masterplan', "Masterplan Complete!", texts['masterplan']),
+                 ('deployment_guide', "Deployment Guide Complete!", texts['guide']))
+    for key, title, text in artifacts:
+        state[key] = text
+        state.messages.append('agent', f"\n✅ {title}\n\n{text}\n\n{'='*60}\n")
+    state['phase'] = 'done'
+    return state
+
+
+def _traced(build) -> tuple:
+    """Run build() and return (its result, bytes it left allocated)"""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return result, after - before
+
+
+def session_footprint(sessions: int = 1000, turns: int = 20) -> dict:
+    """
+    Measure the state memory of resident sessions in both layouts
+
+    Args:
+        sessions: Sessions to keep resident
+        turns: User/agent exchanges per session
+
+    Returns:
+        dict with bytes per session for each layout and the reduction
+    """
+    texts = [_texts(session, turns) for session in range(sessions)]
+
+    states, slotted = _traced(lambda: [build_state(t) for t in texts])
+    _, plain = _traced(lambda: [state.to_dict() for state in states])
+
+    return {
+        'sessions': sessions,
+        'turns': turns,
+        'slotted_bytes_per_session': round(slotted / sessions),
+        'dict_bytes_per_session': round(plain / sessions),
+        'reduction': round(1 - slotted / plain, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-session state memory benchmark")
+    parser.add_argument('--sessions', type=int, default=1000, help="Resident sessions")
+    parser.add_argument('--turns', type=int, default=20, help="User/agent exchanges per session")
+    args = parser.parse_args()
+
+    print(f"\n🧮 Measuring {args.sessions} sessions x {args.turns} turns\n")
+    result = session_footprint(args.sessions, args.turns)
+    print(f"   Nested dicts: {result['dict_bytes_per_session']:,} bytes/session")
+    print(f"   Slotted:      {result['slotted_bytes_per_session']:,} bytes/session")
+    print(f"   Reduction:    {result['reduction']:.1%}\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
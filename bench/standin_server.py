@@ -0,0 +1,521 @@
+"""
+Stand-in LLM Server - Offline Groq/OpenAI-compatible endpoint for benchmarks
+
+Serves POST /openai/v1/chat/completions (the path the Groq SDK calls) so the
+agent can run without network access:
+
+- replay: answer from recorded fixtures, with configurable synthetic
+  latency (time to first token) and token rate. Prompts with no fixture get
+  a synthetic, deterministic response shaped like what each tool expects.
+- record: forward every request to the real API, save the response as a
+  fixture, and return it.
+
+Point the agent at it with LLM_BASE_URL=http://127.0.0.1:8765 (any API key
+works in replay mode). Set LLM_CACHE_ENABLED=0 too when benchmarking, or
+the response cache will answer repeated prompts before they reach the server.
+
+Usage:
+    python -m bench.standin_server --mode replay --latency 0.3 --tokens-per-sec 250
+    python -m bench.standin_server --mode record   # needs GROQ_API_KEY and network
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.discovery_tool import OPT_FIELDS
+
+
+CHAT_PATH = "/openai/v1/chat/completions"
+UPSTREAM_URL = "https://api.groq.com"
+DEFAULT_FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+TOKEN_PATTERN = re.compile(r"\s*\S+")
+
+
+def fixture_key(request: dict) -> str:
+    """
+    Content address of a chat request (model, messages and sampling settings)
+
+    Args:
+        request: Parsed request body
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    payload = json.dumps({
+        'model': request.get('model'),
+        'messages': request.get('messages'),
+        'temperature': request.get('temperature'),
+        'max_tokens': request.get('max_tokens'),
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def split_tokens(text: str) -> list:
+    """Split text into word-sized pseudo tokens (whitespace is kept with each piece)"""
+    tokens = TOKEN_PATTERN.findall(text)
+    trailing = text[len(''.join(tokens)):]
+    if trailing:
+        tokens.append(trailing)
+    return tokens
+
+
+def synthesize(prompt: str, length: int = 400) -> str:
+    """
+    Build a deterministic response shaped like what the calling tool expects
+
+    Args:
+        prompt: The user prompt
+        length: Approximate size in tokens of free-text responses
+
+    Returns:
+        Response text
+    """
+    # Discovery extraction: answer the asked field with the user's message
+    if '"fields"' in prompt and "User's message:" in prompt:
+        message = prompt.split("User's message: \"", 1)[1].rsplit('"\n', 1)[0]
+        asked = re.search(r"We're asking about: (.+)", prompt)
+        fields = {}
+        for section, field, label, _ in OPT_FIELDS:
+            if asked and asked.group(1).strip() == label:
+                fields[f"{section}.{field}"] = {'value': message, 'confidence': 'high'}
+        return json.dumps({'fields': fields})
+
+    # Analysis: three ranked suggestions
+    if '"suggestions"' in prompt:
+        return json.dumps({'suggestions': [{
+            'rank': rank,
+            'name': f"Synthetic Automation {rank}",
+            'description': "Automates a repetitive step of the process",
+            'time_saved': f"{40 - rank * 10} minutes/day",
+            'money_saved': f"${400 - rank * 100}/month (estimated)",
+            'complexity': ['Easy', 'Medium', 'Hard'][rank - 1],
+            'impact': ['High', 'Medium', 'Low'][rank - 1],
+            'value_score': 95 - rank * 10,
+            'implementation': "Python script with pandas and smtplib",
+            'why_this_rank': f"Ranked #{rank} by value and effort"
+        } for rank in (1, 2, 3)]}, indent=2)
+
+    # Code generation: a small script that compiles
+    if "Python script" in prompt:
+        return '''```python
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+INPUT_FILE = os.getenv('INPUT_FILE', 'input.xlsx')
+
+
+def main():
+    """Synthetic automation script"""
+    print(f"Processing {INPUT_FILE}...")
+    print("Done!")
+
+
+if __name__ == "__main__":
+    main()
+```'''
+
+    # Anything else (masterplan, deployment guide): markdown of the requested size
+    seed = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+    words = ["automation", "step", "process", "data", "schedule", "report", "email", "file", "check", "update"]
+    lines = ["# Synthetic Document", ""]
+    count = 0
+    section = 1
+    while count < length:
+        lines.append(f"## Section {section}")
+        sentence = ' '.join(words[int(seed[(count + i) % 64], 16) % len(words)] for i in range(12))
+        lines.append(f"- {sentence.capitalize()}.")
+        lines.append("")
+        count += 16
+        section += 1
+    return '\n'.join(lines)
+
+
+class StandinState:
+    def __init__(self, mode: str = 'replay', fixtures_dir: str = None, latency: float = 0.0,
+                 tokens_per_sec: float = 0.0, synthetic_tokens: int = 400, upstream: str = UPSTREAM_URL,
+                 rate_limited_models: list = None, fail_every: int = 0, slow_every: int = 0,
+                 slow_latency: float = 0.0):
+        """
+        Shared configuration and counters for the request handlers
+
+        Args:
+            mode: 'replay' or 'record'
+            fixtures_dir: Where fixtures are read from / written to
+            latency: Seconds before the first token
+            tokens_per_sec: Token rate after the first token (0 = instant)
+            synthetic_tokens: Size of synthesized free-text responses
+            upstream: Real API base URL used in record mode
+            rate_limited_models: Models answered with 429 Too Many Requests,
+                to exercise fallback chains
+            fail_every: Answer every Nth request with 503 (0 = never), to
+                exercise retries
+            slow_every: Add slow_latency to every Nth request (0 = never),
+                to exercise hedging
+            slow_latency: Extra seconds for the slow requests
+        """
+        if mode not in ('replay', 'record'):
+            raise ValueError(f"unknown mode: {mode}")
+
+        self.mode = mode
+        self.fixtures_dir = fixtures_dir or DEFAULT_FIXTURES_DIR
+        self.latency = latency
+        self.tokens_per_sec = tokens_per_sec
+        self.synthetic_tokens = synthetic_tokens
+        self.upstream = upstream
+        self.rate_limited_models = set(rate_limited_models or [])
+        self.fail_every = fail_every
+        self.slow_every = slow_every
+        self.slow_latency = slow_latency
+
+        self._lock = threading.Lock()
+        self.stats = {
+            'requests': 0,
+            'streamed': 0,
+            'replayed': 0,
+            'recorded': 0,
+            'synthesized': 0,
+            'rate_limited': 0,
+            'failed': 0,
+            'slowed': 0,
+            'prompt_tokens': 0,
+            'completion_tokens': 0,
+        }
+        self._upstream_client = None
+
+        os.makedirs(self.fixtures_dir, exist_ok=True)
+
+    def count(self, name: str, amount: int = 1) -> int:
+        with self._lock:
+            self.stats[name] += amount
+            return self.stats[name]
+
+    def _fixture_path(self, key: str) -> str:
+        return os.path.join(self.fixtures_dir, f"{key}.json")
+
+    def load_fixture(self, key: str):
+        try:
+            with open(self._fixture_path(key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save_fixture(self, key: str, request: dict, text: str, usage: dict):
+        fixture = {
+            'request': {k: request.get(k) for k in ('model', 'messages', 'temperature', 'max_tokens')},
+            'text': text,
+            'usage': usage,
+            'recorded_at': time.time(),
+        }
+        path = self._fixture_path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(fixture, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def fetch_upstream(self, request: dict, authorization: str) -> tuple:
+        """Forward a request to the real API (non-streaming) and return (text, usage)"""
+        if self._upstream_client is None:
+            self._upstream_client = httpx.Client(base_url=self.upstream, timeout=120)
+
+        body = dict(request)
+        body.pop('stream', None)
+        body.pop('stream_options', None)
+        response = self._upstream_client.post(
+            CHAT_PATH, json=body, headers={'Authorization': authorization or ''}
+        )
+        response.raise_for_status()
+        data = response.json()
+        return data['choices'][0]['message']['content'], data.get('usage')
+
+    def resolve(self, request: dict, authorization: str) -> tuple:
+        """
+        Find the response text for a request
+
+        Returns:
+            (text, source) where source is 'replayed', 'recorded' or 'synthesized'
+        """
+        key = fixture_key(request)
+
+        if self.mode == 'record':
+            text, usage = self.fetch_upstream(request, authorization)
+            self.save_fixture(key, request, text, usage)
+            return text, 'recorded'
+
+        fixture = self.load_fixture(key)
+        if fixture is not None:
+            return fixture['text'], 'replayed'
+
+        prompt = '\n'.join(m.get('content') or '' for m in request.get('messages', []))
+        return synthesize(prompt, self.synthetic_tokens), 'synthesized'
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"    # keep-alive, like the real API
+    disable_nagle_algorithm = True   # headers and body go out as separate writes
+    state = None                     # set on the server's handler subclass
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/stats':
+            with self.state._lock:
+                stats = dict(self.state.stats)
+            stats['mode'] = self.state.mode
+            self._send_json(200, stats)
+        else:
+            self._send_json(404, {'error': {'message': f"Unknown path {self.path}"}})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length)
+
+        if self.path != CHAT_PATH:
+            self._send_json(404, {'error': {'message': f"Unknown path {self.path}"}})
+            return
+
+        try:
+            request = json.loads(raw or b'{}')
+        except ValueError:
+            self._send_json(400, {'error': {'message': "Invalid JSON body"}})
+            return
+
+        state = self.state
+        number = state.count('requests')
+        started = time.time()
+
+        if request.get('model') in state.rate_limited_models:
+            state.count('rate_limited')
+            body = json.dumps({'error': {'message': f"Rate limit reached for model {request['model']}",
+                                         'type': 'tokens', 'code': 'rate_limit_exceeded'}}).encode('utf-8')
+            self.send_response(429)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('Retry-After', '2')
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        if state.fail_every and number % state.fail_every == 0:
+            state.count('failed')
+            self._send_json(503, {'error': {'message': "Service unavailable (injected)", 'type': 'internal_server_error'}})
+            return
+
+        if state.slow_every and number % state.slow_every == 0:
+            state.count('slowed')
+            time.sleep(state.slow_latency)
+
+        try:
+            text, source = state.resolve(request, self.headers.get('Authorization'))
+        except Exception as e:
+            self._send_json(502, {'error': {'message': f"Upstream error: {str(e)}"}})
+            return
+        state.count(source)
+
+        tokens = split_tokens(text)
+        prompt_tokens = sum(len(split_tokens(m.get('content') or '')) for m in request.get('messages', []))
+        usage = {
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': len(tokens),
+            'total_tokens': prompt_tokens + len(tokens),
+        }
+        state.count('prompt_tokens', prompt_tokens)
+        state.count('completion_tokens', len(tokens))
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        model = request.get('model', 'standin')
+
+        # Record mode already paid the real latency
+        delay = state.latency if source != 'recorded' else 0.0
+        rate = state.tokens_per_sec if source != 'recorded' else 0.0
+
+        if request.get('stream'):
+            state.count('streamed')
+            self._stream(completion_id, model, tokens, usage, delay, rate)
+            return
+
+        # Non-streaming: the whole generation time up front
+        remaining = delay + (len(tokens) / rate if rate else 0.0) - (time.time() - started)
+        if remaining > 0:
+            time.sleep(remaining)
+
+        self._send_json(200, {
+            'id': completion_id,
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': model,
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': text},
+                'finish_reason': 'stop'
+            }],
+            'usage': usage
+        })
+
+    def _write_chunk(self, data: bytes):
+        """Write one HTTP/1.1 chunked-encoding chunk"""
+        self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+        self.wfile.flush()
+
+    def _stream(self, completion_id: str, model: str, tokens: list, usage: dict,
+                delay: float, rate: float):
+        """Send the response as server-sent events, paced by latency and token rate"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        def event(delta: dict, finish_reason=None, extra: dict = None) -> bytes:
+            chunk = {
+                'id': completion_id,
+                'object': 'chat.completion.chunk',
+                'created': int(time.time()),
+                'model': model,
+                'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}]
+            }
+            if extra:
+                chunk.update(extra)
+            return f"data: {json.dumps(chunk)}\n\n".encode('utf-8')
+
+        try:
+            if delay:
+                time.sleep(delay)
+            self._write_chunk(event({'role': 'assistant', 'content': ''}))
+
+            started = time.time()
+            for i, token in enumerate(tokens):
+                if rate:
+                    wait = started + i / rate - time.time()
+                    if wait > 0:
+                        time.sleep(wait)
+                self._write_chunk(event({'content': token}))
+
+            self._write_chunk(event({}, 'stop', {'x_groq': {'usage': usage}}))
+            self._write_chunk(b"data: [DONE]\n\n")
+            self._write_chunk(b"")
+        except (BrokenPipeError, ConnectionResetError):
+            # Client stopped reading (e.g. a cancelled speculative stream)
+            self.close_connection = True
+
+
+class StandinHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128    # many concurrent sessions connect at once
+
+    def handle_error(self, request, client_address):
+        # Clients hang up on purpose (cancelled streams, lost hedges)
+        if isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            return
+        super().handle_error(request, client_address)
+
+
+class StandinServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765, **options):
+        """
+        Stand-in server that can run in a background thread
+
+        Args:
+            host: Interface to bind
+            port: Port to bind (0 = pick a free one)
+            **options: StandinState options (mode, fixtures_dir, latency, ...)
+        """
+        self.state = StandinState(**options)
+        handler = type('BoundStandinHandler', (StandinHandler,), {'state': self.state})
+        self.httpd = StandinHTTPServer((host, port), handler)
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        """URL to use as LLM_BASE_URL"""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> str:
+        """
+        Serve in a background thread
+
+        Returns:
+            The server's base URL
+        """
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        """Stop serving and release the port"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def serve_forever(self):
+        """Serve in the current thread until interrupted"""
+        try:
+            self.httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline Groq/OpenAI-compatible stand-in server")
+    parser.add_argument('--mode', choices=['replay', 'record'], default='replay')
+    parser.add_argument('--host', default=os.getenv("STANDIN_HOST", "127.0.0.1"))
+    parser.add_argument('--port', type=int, default=int(os.getenv("STANDIN_PORT", "8765")))
+    parser.add_argument('--fixtures', default=os.getenv("STANDIN_FIXTURES_DIR", DEFAULT_FIXTURES_DIR),
+                        help="Fixture directory")
+    parser.add_argument('--latency', type=float, default=float(os.getenv("STANDIN_LATENCY", "0")),
+                        help="Seconds before the first token (replay)")
+    parser.add_argument('--tokens-per-sec', type=float, default=float(os.getenv("STANDIN_TOKENS_PER_SEC", "0")),
+                        help="Token rate after the first token, 0 = instant (replay)")
+    parser.add_argument('--synthetic-tokens', type=int, default=400,
+                        help="Size of synthesized responses for prompts without a fixture")
+    parser.add_argument('--upstream', default=UPSTREAM_URL, help="Real API base URL (record)")
+    parser.add_argument('--rate-limit-model', action='append', default=[],
+                        help="Answer this model with 429 (repeatable)")
+    parser.add_argument('--fail-every', type=int, default=0, help="Answer every Nth request with 503")
+    parser.add_argument('--slow-every', type=int, default=0, help="Delay every Nth request by --slow-latency")
+    parser.add_argument('--slow-latency', type=float, default=2.0, help="Extra seconds for slowed requests")
+    args = parser.parse_args()
+
+    server = StandinServer(
+        host=args.host, port=args.port, mode=args.mode, fixtures_dir=args.fixtures,
+        latency=args.latency, tokens_per_sec=args.tokens_per_sec,
+        synthetic_tokens=args.synthetic_tokens, upstream=args.upstream,
+        rate_limited_models=args.rate_limit_model, fail_every=args.fail_every,
+        slow_every=args.slow_every, slow_latency=args.slow_latency
+    )
+
+    print(f"🧪 Stand-in LLM server ({args.mode}) on {server.base_url}")
+    print(f"📁 Fixtures: {args.fixtures}")
+    print(f"⏱️ Latency: {args.latency}s, token rate: {args.tokens_per_sec or 'instant'}")
+    print(f"\nexport LLM_BASE_URL={server.base_url} LLM_CACHE_ENABLED=0\n")
+
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
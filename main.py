@@ -1,22 +1,40 @@
 """
 OPT Automation Agent - Main Entry Point
 
-Run this to start the agent conversation
+Run this to start the agent conversation, continue a saved one, or
+process business profiles in bulk:
+
+    python main.py --resume <session id or session.json>
+    python main.py --batch profiles.jsonl --workers 4
 """
 
+import sys
+import argparse
+
 from agent.core import OPTAgent
 
 
-def main():
-    """Run the OPT Agent interactively"""
+def main(resume: str = None):
+    """
+    Run the OPT Agent interactively
+    
+    Args:
+        resume: Session id (or exported session file) to continue
+    """
     
     print("\n" + "🎯"*30)
     print("OPT AUTOMATION AGENT")
     print("Find and automate your repetitive work!")
     print("🎯"*30)
     
-    # Initialize agent
-    agent = OPTAgent()
+    # Initialize agent; every turn is saved so an interrupted session can be resumed
+    agent = OPTAgent(autosave=True)
+    if resume:
+        try:
+            agent.load_session(resume)
+        except ValueError as e:
+            print(f"\n❌ {str(e)}\n")
+            return 1
     
     # Start conversation
     print("\n" + "="*60)
@@ -25,9 +43,12 @@ def main():
     print("Type 'exit' or 'quit' to end the conversation")
     print("="*60 + "\n")
     
-    # Send welcome message
-    welcome = agent.chat("Hello")
-    print(f"🤖 Agent:\n{welcome}\n")
+    # Send welcome message (or pick up where a resumed session left off)
+    if resume:
+        print(f"🤖 Agent:\n{agent.resume_message()}\n")
+    else:
+        welcome = agent.chat("Hello")
+        print(f"🤖 Agent:\n{welcome}\n")
     
     # Conversation loop
     while True:
@@ -41,25 +62,28 @@ def main():
                 
                 # Save session
                 agent.save_session()
+                print(f"🔁 Resume any time with: python main.py --resume {agent.session_id}\n")
                 break
             
             # Skip empty inputs
             if not user_input:
                 continue
             
-            # Get agent response
-            response = agent.chat(user_input)
-            print(f"\n🤖 Agent:\n{response}\n")
+            # Stream agent response as it is generated
+            print("\n🤖 Agent:")
+            for chunk in agent.chat_stream(user_input):
+                print(chunk, end='', flush=True)
+            print("\n")
             
             # Check if done
             if agent.memory.get_state()['phase'] == 'done':
-                save_choice = input("\n💾 Save this session? (y/n): ").strip().lower()
+                save_choice = input("\n💾 Export this session to a JSON file? (y/n): ").strip().lower()
                 if save_choice == 'y':
-                    agent.save_session()
+                    agent.export_session()
                 
                 continue_choice = input("\n🔄 Start another automation? (y/n): ").strip().lower()
                 if continue_choice == 'y':
-                    agent = OPTAgent()  # Fresh start
+                    agent = OPTAgent(autosave=True)  # Fresh start
                     welcome = agent.chat("Hello")
                     print(f"\n🤖 Agent:\n{welcome}\n")
                 else:
@@ -68,9 +92,8 @@ def main():
         
         except KeyboardInterrupt:
             print("\n\n⏸️  Interrupted by user")
-            save_choice = input("💾 Save session before exit? (y/n): ").strip().lower()
-            if save_choice == 'y':
-                agent.save_session()
+            agent.save_session()
+            print(f"🔁 Resume with: python main.py --resume {agent.session_id}")
             print("\n👋 Goodbye!\n")
             break
         
@@ -79,5 +102,28 @@ def main():
             print("Let's try again...\n")
 
 
+def run_batch(path: str, workers: int, output_root: str):
+    """Run the full pipeline for every profile in a JSONL file"""
+    from agent.batch import BatchRunner, load_profiles
+    
+    profiles = load_profiles(path)
+    summary = BatchRunner(workers=workers, output_root=output_root).run(profiles)
+    return 0 if summary['failed'] == 0 else 1
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="OPT Automation Agent")
+    parser.add_argument('--resume', metavar='SESSION',
+                        help="Continue a saved session (session id, or a file from export_session)")
+    parser.add_argument('--batch', metavar='PROFILES_JSONL',
+                        help="Run non-interactively over a JSONL file of business profiles")
+    parser.add_argument('--workers', type=int, default=4,
+                        help="Profiles processed at the same time in batch mode (default: 4)")
+    parser.add_argument('--output', default='output/batch',
+                        help="Output directory for batch mode (default: output/batch)")
+    args = parser.parse_args()
+    
+    if args.batch:
+        sys.exit(run_batch(args.batch, args.workers, args.output))
+    
+    sys.exit(main(resume=args.resume))
\ No newline at end of file
@@ -0,0 +1,151 @@
+"""
+Artifact Store - Content-addressed storage of large generated texts
+
+The masterplan and deployment guide are kept in the state and are also
+embedded, word for word, in the agent's reply that shows them. The reply
+goes into the message history, so every artifact used to be held (and
+saved) twice.
+
+Each session now registers its large artifacts by SHA-256. When a message
+is appended, any registered artifact inside it is replaced by a short
+reference marker, and the text is put back only when the message is read.
+The session store writes each artifact once and the message rows and state
+deltas only hold references to it.
+"""
+
+import re
+import hashlib
+
+
+# Artifacts shorter than this are not worth a reference
+MIN_ARTIFACT_CHARS = 256
+
+# Reference marker placed in message contents (record separator characters
+# do not occur in generated text)
+MARKER = "\x1eartifact:{}\x1e"
+MARKER_PATTERN = re.compile("\x1eartifact:([0-9a-f]{64})\x1e")
+
+# Key of a state delta value that refers to an artifact
+REF_KEY = '$artifact'
+
+
+def content_hash(text: str) -> str:
+    """SHA-256 hex digest of an artifact's text"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class ArtifactStore:
+    __slots__ = ('_artifacts', '_synced')
+
+    def __init__(self):
+        """Initialize an empty store"""
+        self._artifacts = {}        # hash → text
+        self._synced = set()        # hashes the session store already has
+
+    def put(self, text: str):
+        """
+        Register an artifact
+
+        Args:
+            text: The artifact's text
+
+        Returns:
+            Its hash, or None if it is too short to be worth storing
+        """
+        if not isinstance(text, str) or len(text) < MIN_ARTIFACT_CHARS:
+            return None
+        digest = content_hash(text)
+        self._artifacts.setdefault(digest, text)
+        return digest
+
+    def get(self, digest: str):
+        """Get an artifact's text (None if unknown)"""
+        return self._artifacts.get(digest)
+
+    def ref(self, text):
+        """
+        Get the hash of a registered artifact
+
+        Args:
+            text: Any value
+
+        Returns:
+            The hash if text is a registered artifact, else None
+        """
+        if not isinstance(text, str) or len(text) < MIN_ARTIFACT_CHARS:
+            return None
+        digest = content_hash(text)
+        return digest if digest in self._artifacts else None
+
+    def dedupe(self, content: str) -> str:
+        """
+        Replace the registered artifacts inside a message with references
+
+        Args:
+            content: Message text
+
+        Returns:
+            The text with each embedded artifact replaced by a marker
+        """
+        if not self._artifacts or len(content) < MIN_ARTIFACT_CHARS:
+            return content
+        for digest, text in self._artifacts.items():
+            if text in content:
+                content = content.replace(text, MARKER.format(digest))
+        return content
+
+    def resolve(self, content: str) -> str:
+        """
+        Put the artifacts back into a message
+
+        Args:
+            content: Message text, possibly holding markers
+
+        Returns:
+            The full text (markers of unknown artifacts are left as they are)
+        """
+        if '\x1e' not in content:
+            return content
+
+        def expand(match):
+            text = self._artifacts.get(match.group(1))
+            return match.group(0) if text is None else text
+
+        return MARKER_PATTERN.sub(expand, content)
+
+    def encode(self, value):
+        """Turn a state value into a reference if it is a registered artifact"""
+        digest = self.ref(value)
+        return value if digest is None else {REF_KEY: digest}
+
+    def decode(self, value):
+        """Turn a reference from encode() back into the artifact's text"""
+        if isinstance(value, dict) and set(value) == {REF_KEY}:
+            return self._artifacts.get(value[REF_KEY])
+        return value
+
+    def load(self, artifacts: dict, synced: bool = True):
+        """
+        Add artifacts loaded from the session store
+
+        Args:
+            artifacts: {hash: text}
+            synced: The store already has them
+        """
+        self._artifacts.update(artifacts)
+        if synced:
+            self._synced.update(artifacts)
+
+    def pending(self) -> dict:
+        """Get the {hash: text} artifacts not saved to the session store yet"""
+        return {digest: text for digest, text in self._artifacts.items() if digest not in self._synced}
+
+    def mark_synced(self, digests=None):
+        """Record that artifacts were saved (all of them if digests is None)"""
+        self._synced.update(self._artifacts if digests is None else digests)
+
+    def __len__(self) -> int:
+        return len(self._artifacts)
+
+    def __contains__(self, digest) -> bool:
+        return digest in self._artifacts
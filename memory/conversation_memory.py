@@ -4,59 +4,61 @@ Conversation Memory - Tracks the state of the OPT discovery process
 This is simpler than Level 1's vector memory - just tracks conversation state
 """
 
+import os
+import sys
+import json
+import uuid
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.llm_metrics import LLMMetrics
+from memory.models import Section, SessionState, to_plain
+
+
+# Characters of each dropped message kept in the history summary
+SUMMARY_CHARS = 120
+
+# Dropped messages listed in the summary; older ones are only counted
+SUMMARY_LINES = 40
+
+SUMMARY_HEADER = "… {} earlier messages"
+
+
 class ConversationMemory:
-    def __init__(self):
+    __slots__ = ('state', 'llm_metrics', 'session_id', 'history_turns', '_synced_messages', '_synced_hashes')
+    
+    def __init__(self, session_id: str = None, history_turns: int = None):
         """
         Initialize conversation state
         
+        Args:
+            session_id: Key of this session in the session store (defaults to a new random id)
+            history_turns: User/agent exchanges kept in memory (defaults to
+                OPT_HISTORY_TURNS, or 50; 0 = keep everything). Older
+                messages are folded into state['history_summary'] and
+                dropped, once saved if the session is saved to the store.
+        
         State tracks:
         - Current phase (discovery, analysis, masterplan, code, deployment)
         - Information collected (operating model, process, task)
         - Conversation history (all messages)
         """
-        self.state = {
-            # What phase are we in?
-            'phase': 'discovery',  # discovery → analysis → masterplan → code → deployment
-            
-            # Operating Model (O)
-            'operating_model': {
-                'business_type': None,      # e.g., "bakery"
-                'business_size': None,      # e.g., "2 employees"
-                'tools_used': None,         # e.g., "Excel, email"
-                'pain_points': None,        # e.g., "manual inventory"
-                'completed': False
-            },
-            
-            # Process (P)
-            'process': {
-                'name': None,               # e.g., "inventory management"
-                'description': None,        # e.g., "daily counting of ingredients"
-                'frequency': None,          # e.g., "daily"
-                'time_spent': None,         # e.g., "30 minutes"
-                'completed': False
-            },
-            
-            # Task (T)
-            'task': {
-                'name': None,               # e.g., "email suppliers when low stock"
-                'description': None,        # detailed description
-                'inputs': None,             # e.g., "inventory CSV"
-                'outputs': None,            # e.g., "email to supplier"
-                'completed': False
-            },
-            
-            # Analysis results
-            'suggestions': [],              # List of automation suggestions
-            'chosen_task': None,            # Which suggestion user chose
-            
-            # Generated outputs
-            'masterplan': None,             # The automation plan
-            'code': None,                   # Generated Python code
-            'deployment_guide': None,       # How to deploy
-            
-            # Conversation history
-            'messages': []                  # All user/agent messages
-        }
+        # Slotted records behind a dict-compatible view (see memory/models.py)
+        self.state = SessionState()
+        
+        # LLM calls made for this session (latency, tokens, cache), by phase
+        self.llm_metrics = LLMMetrics(phase_getter=self.get_phase)
+        
+        self.session_id = session_id or uuid.uuid4().hex
+        
+        if history_turns is None:
+            history_turns = int(os.getenv("OPT_HISTORY_TURNS", "50"))
+        self.history_turns = history_turns
+        
+        # What the session store already has: messages appended so far, and
+        # a hash of each top-level value as last saved
+        self._synced_messages = 0
+        self._synced_hashes = {}
     
     def add_message(self, role: str, content: str):
         """
@@ -66,10 +68,59 @@ class ConversationMemory:
             role: 'user' or 'agent'
             content: The message text
         """
-        self.state['messages'].append({
-            'role': role,
-            'content': content
-        })
+        self.state.messages.append(role, content)
+        self._trim_history()
+    
+    def _trim_history(self):
+        """Drop the oldest messages beyond the history limit into the summary"""
+        messages = self.state.messages
+        if self.history_turns <= 0:
+            return
+        
+        # Once the session is saved, only messages the store already has can be
+        # dropped; a session that never is keeps nothing but the summary of them
+        count = len(messages) - 2 * self.history_turns
+        if self._synced_hashes:
+            count = min(count, self._synced_messages - messages.dropped)
+        if count <= 0:
+            return
+        
+        # One line per dropped message (the most recent SUMMARY_LINES), after an optional header
+        listed = min(messages.dropped, SUMMARY_LINES)
+        lines = self.state.history_summary.splitlines()[-listed:] if listed else []
+        for message in messages.drop(count):
+            text = ' '.join(message['content'].split())
+            if len(text) > SUMMARY_CHARS:
+                text = text[:SUMMARY_CHARS - 1] + '…'
+            lines.append(f"{message['role']}: {text}")
+        
+        lines = lines[-SUMMARY_LINES:]
+        omitted = messages.dropped - len(lines)
+        if omitted:
+            lines.insert(0, SUMMARY_HEADER.format(omitted))
+        self.state.history_summary = '\n'.join(lines)
+    
+    def get_context(self, recent_messages: int = 6) -> str:
+        """
+        Get compact conversation context for a prompt
+        
+        Args:
+            recent_messages: Latest messages included word for word
+            
+        Returns:
+            The summary of older messages followed by the latest ones
+        """
+        messages = self.state.messages
+        recent = messages[max(0, len(messages) - recent_messages):]
+        older = messages.total - len(recent)
+        
+        parts = []
+        if self.state.history_summary:
+            parts.append(f"Earlier in the conversation:\n{self.state.history_summary}")
+        if older > messages.dropped:
+            parts.append(f"({older - messages.dropped} more messages not shown)")
+        parts.append('\n'.join(f"{m['role']}: {m['content']}" for m in recent))
+        return '\n\n'.join(parts)
     
     def update_operating_model(self, key: str, value: str):
         """Update a field in operating model"""
@@ -166,9 +217,101 @@ class ConversationMemory:
         
         return summary
     
-    def get_state(self) -> dict:
-        """Get the entire state (for debugging or saving)"""
+    def get_state(self) -> SessionState:
+        """
+        Get the entire state
+        
+        The state is a SessionState record that reads and writes like the
+        dict it replaced (state['task']['name'], state['messages'][-1]);
+        use to_dict() for a plain copy.
+        """
         return self.state
+    
+    def to_dict(self) -> dict:
+        """Get a plain dict copy of the state (for JSON export)"""
+        return self.state.to_dict()
+    
+    def restore(self, state: dict, session_id: str = None):
+        """
+        Replace the state with a saved one
+        
+        Saved sections are merged over the defaults, so fields added since
+        the session was saved are still present.
+        
+        Args:
+            state: Saved state (from the session store or a JSON export)
+            session_id: Id the state was loaded from in the session store;
+                the loaded values then count as saved. Without it the
+                session keeps this memory's id and is saved in full next time.
+        """
+        for key, value in state.items():
+            if key == 'messages':
+                continue
+            if isinstance(self.state.get(key), Section) and isinstance(value, dict):
+                self.state[key].update(value)
+            else:
+                self.state[key] = value
+        
+        # Messages last, so the artifacts they embed are already registered
+        if 'messages' in state:
+            self.state['messages'] = state['messages']
+        
+        self._synced_messages = 0
+        self._synced_hashes = {}
+        if session_id is not None:
+            self.session_id = session_id
+            _, messages, deltas = self.pending_changes()
+            self.mark_synced(len(messages), {key: text for key, text in deltas.items() if key in state},
+                             list(self.pending_artifacts()))
+    
+    def pending_changes(self) -> tuple:
+        """
+        Get what changed since the last save to the session store
+        
+        Tools update the state dict in place, so changed values are found by
+        comparing each top-level value's JSON with the hash saved last time.
+        Messages keep their artifact references, and artifact values are
+        given as references (see pending_artifacts()).
+        
+        Returns:
+            (position of the first new message, new messages,
+             {key: JSON text} of the changed top-level values)
+        """
+        messages = self.state.messages.raw(self._synced_messages)
+        artifacts = self.state.artifacts
+        deltas = {}
+        for key, value in self.state.items():
+            if key == 'messages':
+                continue
+            text = json.dumps(artifacts.encode(to_plain(value)), ensure_ascii=False, sort_keys=True)
+            if self._synced_hashes.get(key) != hash(text):
+                deltas[key] = text
+        return self._synced_messages, messages, deltas
+    
+    def pending_artifacts(self) -> dict:
+        """
+        Get the artifacts not saved to the session store yet
+        
+        Returns:
+            {hash: text} of the new masterplans and deployment guides
+        """
+        return self.state.artifacts.pending()
+    
+    def mark_synced(self, message_count: int, deltas: dict, artifacts: list = None):
+        """
+        Record that changes from pending_changes() were saved
+        
+        Args:
+            message_count: New messages saved
+            deltas: The saved {key: JSON text} values
+            artifacts: Hashes of the saved artifacts
+        """
+        self._synced_messages += message_count
+        for key, text in deltas.items():
+            self._synced_hashes[key] = hash(text)
+        if artifacts:
+            self.state.artifacts.mark_synced(artifacts)
+        self._trim_history()
 
 
 # Test the memory
@@ -0,0 +1,362 @@
+"""
+Session Models - Compact slotted records behind ConversationMemory
+
+The session state used to be a nested dict of dicts with one
+{'role', 'content'} dict per message. Every dict carries a hash table, so
+a server holding thousands of sessions spent most of each session's memory
+on container overhead rather than on the text itself.
+
+The state is now made of __slots__ classes (OperatingModel, Process, Task,
+Suggestion, Message, SessionState), and messages live in a MessageLog: one
+byte per message for the role (an interned Role enum) plus a list of the
+contents. Every record is also a MutableMapping, so code that reads or
+writes state['task']['name'] or state['messages'][-1]['content'] keeps
+working unchanged, and to_dict() builds plain dicts only when they are
+needed (JSON export, session store deltas).
+
+The masterplan and deployment guide are registered in the session's
+ArtifactStore (memory/artifacts.py), and messages that embed them hold a
+reference instead of a second copy.
+"""
+
+from array import array
+from enum import Enum
+from collections.abc import Mapping, MutableMapping, Sequence
+
+from memory.artifacts import ArtifactStore
+
+
+class Role(str, Enum):
+    USER = 'user'
+    AGENT = 'agent'
+    SYSTEM = 'system'
+
+    @classmethod
+    def parse(cls, role) -> 'Role':
+        """Get the Role for a role name (or Role)"""
+        return role if isinstance(role, cls) else cls(role)
+
+
+# Role ↔ the byte stored for it in a MessageLog
+ROLES = tuple(Role)
+ROLE_CODES = {role: code for code, role in enumerate(ROLES)}
+
+
+def to_plain(value):
+    """
+    Convert records, message logs and roles back to plain dicts, lists and strings
+
+    Args:
+        value: Any state value
+
+    Returns:
+        A JSON-serializable copy
+    """
+    if isinstance(value, Record):
+        return value.to_dict()
+    if isinstance(value, MessageLog):
+        return value.to_list()
+    if isinstance(value, Role):
+        return value.value
+    if isinstance(value, Mapping):
+        return {key: to_plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_plain(item) for item in value]
+    return value
+
+
+class Record(MutableMapping):
+    """
+    Base of the slotted records: attributes for the known fields, and a
+    dict (only created when needed) for any other key
+    """
+
+    __slots__ = ('_extra',)
+    FIELDS = ()
+
+    def __init__(self, values: Mapping = None):
+        self._extra = None
+        if values:
+            self.update(values)
+
+    @classmethod
+    def from_value(cls, value):
+        """Wrap a mapping in this record type (records of the type are kept as they are)"""
+        if value is None or isinstance(value, cls):
+            return value
+        return cls(value)
+
+    def _convert(self, key: str, value):
+        """Hook for records whose fields hold other records"""
+        return value
+
+    def __getitem__(self, key):
+        if key in self.FIELDS:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in self.FIELDS:
+            setattr(self, key, self._convert(key, value))
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key in self.FIELDS:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        elif self._extra is not None and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __iter__(self):
+        for name in self.FIELDS:
+            if hasattr(self, name):
+                yield name
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def to_dict(self) -> dict:
+        """Build a plain dict copy (nested records included)"""
+        return {key: to_plain(value) for key, value in self.items()}
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class Section(Record):
+    """An OPT section: every field starts as None, and 'completed' as False"""
+
+    __slots__ = ()
+
+    def __init__(self, values: Mapping = None):
+        for name in self.FIELDS:
+            setattr(self, name, None)
+        self.completed = False
+        super().__init__(values)
+
+
+class OperatingModel(Section):
+    FIELDS = ('business_type', 'business_size', 'tools_used', 'pain_points', 'completed')
+    __slots__ = FIELDS
+
+
+class Process(Section):
+    FIELDS = ('name', 'description', 'frequency', 'time_spent', 'completed')
+    __slots__ = FIELDS
+
+
+class Task(Section):
+    FIELDS = ('name', 'description', 'inputs', 'outputs', 'completed')
+    __slots__ = FIELDS
+
+
+class Suggestion(Record):
+    """One automation suggestion; fields the LLM left out stay absent"""
+
+    FIELDS = ('rank', 'name', 'description', 'time_saved', 'money_saved', 'complexity',
+              'impact', 'value_score', 'implementation', 'why_this_rank')
+    __slots__ = FIELDS
+
+
+class Message(Record):
+    """One message; message['role'] is the role name, message.role the Role"""
+
+    FIELDS = ('role', 'content')
+    __slots__ = FIELDS
+
+    def __init__(self, role, content: str):
+        self._extra = None
+        self.role = Role.parse(role)
+        self.content = content
+
+    def _convert(self, key: str, value):
+        return Role.parse(value) if key == 'role' else value
+
+    def __getitem__(self, key):
+        if key == 'role':
+            return self.role.value
+        return super().__getitem__(key)
+
+
+class MessageLog(Sequence):
+    """
+    Array-backed message history: a byte per role and a list of contents
+
+    Items are Message records built on access; the log itself holds no
+    per-message objects. With an ArtifactStore, embedded artifacts are
+    stored as references and put back when a message is read.
+
+    Old messages can be dropped from the front (see ConversationMemory's
+    history limit); len() and indexes cover the messages still held, and
+    `total` counts every message ever appended.
+    """
+
+    __slots__ = ('_roles', '_contents', 'artifacts', 'dropped')
+
+    def __init__(self, messages=None, artifacts: ArtifactStore = None):
+        self._roles = array('B')
+        self._contents = []
+        self.artifacts = artifacts
+        self.dropped = 0            # Messages dropped from the front
+        if messages:
+            self.extend(messages)
+
+    def append(self, role, content: str):
+        """
+        Add a message
+
+        Args:
+            role: Role, or its name ('user', 'agent', 'system')
+            content: The message text
+        """
+        self._roles.append(ROLE_CODES[Role.parse(role)])
+        if self.artifacts is not None:
+            content = self.artifacts.dedupe(content)
+        self._contents.append(content)
+
+    def extend(self, messages):
+        """Add messages given as {'role', 'content'} mappings"""
+        for message in messages:
+            self.append(message['role'], message['content'])
+
+    def clear(self):
+        """Remove every message"""
+        del self._roles[:]
+        self._contents.clear()
+        self.dropped = 0
+
+    @property
+    def total(self) -> int:
+        """Messages appended so far, including the dropped ones"""
+        return self.dropped + len(self._contents)
+
+    def drop(self, count: int) -> list:
+        """
+        Remove the oldest messages
+
+        Args:
+            count: Messages to remove
+
+        Returns:
+            The removed Message records, oldest first
+        """
+        removed = self[:count]
+        del self._roles[:count]
+        del self._contents[:count]
+        self.dropped += len(removed)
+        return removed
+
+    def _resolve(self, content: str) -> str:
+        return content if self.artifacts is None else self.artifacts.resolve(content)
+
+    def __len__(self) -> int:
+        return len(self._contents)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [Message(ROLES[code], self._resolve(content))
+                    for code, content in zip(self._roles[index], self._contents[index])]
+        return Message(ROLES[self._roles[index]], self._resolve(self._contents[index]))
+
+    def __iter__(self):
+        for code, content in zip(self._roles, self._contents):
+            yield Message(ROLES[code], self._resolve(content))
+
+    def raw(self, start: int = 0) -> list:
+        """
+        Get messages as stored, with artifact references left in place
+
+        Args:
+            start: Position of the first message in the whole conversation
+                (dropped messages included)
+
+        Returns:
+            List of {'role', 'content'} dicts
+        """
+        start = max(0, start - self.dropped)
+        return [{'role': ROLES[code].value, 'content': content}
+                for code, content in zip(self._roles[start:], self._contents[start:])]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (MessageLog, list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None
+
+    def to_list(self) -> list:
+        """Build plain {'role', 'content'} dicts, artifacts included"""
+        return [{'role': ROLES[code].value, 'content': self._resolve(content)}
+                for code, content in zip(self._roles, self._contents)]
+
+    def __repr__(self) -> str:
+        return f"MessageLog({len(self)} messages)"
+
+
+class SessionState(Record):
+    """
+    The whole session state, in the key order of the dict it replaces
+
+    Assigning a plain value converts it to the matching record, so
+    state['suggestions'] = [...] and state['chosen_task'] = {...} work as before.
+    The artifact store is not a key of the state.
+    """
+
+    FIELDS = ('phase', 'operating_model', 'process', 'task', 'suggestions', 'chosen_task',
+              'masterplan', 'code', 'deployment_guide', 'history_summary', 'messages')
+    __slots__ = FIELDS + ('artifacts',)
+
+    # Values registered in the artifact store when assigned
+    ARTIFACT_KEYS = ('masterplan', 'deployment_guide')
+
+    SECTIONS = {
+        'operating_model': OperatingModel,
+        'process': Process,
+        'task': Task,
+    }
+
+    def __init__(self, values: Mapping = None):
+        self._extra = None
+        self.artifacts = ArtifactStore()
+        self.phase = 'discovery'            # discovery → analysis → masterplan → code → deployment
+        self.operating_model = OperatingModel()
+        self.process = Process()
+        self.task = Task()
+        self.suggestions = []               # Automation suggestions
+        self.chosen_task = None             # Which suggestion user chose
+        self.masterplan = None              # The automation plan
+        self.code = None                    # Generated Python code
+        self.deployment_guide = None        # How to deploy
+        self.history_summary = ''           # Compact summary of messages dropped from memory
+        self.messages = MessageLog(artifacts=self.artifacts)    # All user/agent messages
+        if values:
+            self.update(values)
+
+    def _convert(self, key: str, value):
+        if key in self.SECTIONS:
+            return self.SECTIONS[key].from_value(value)
+        if key == 'suggestions':
+            return [Suggestion.from_value(s) if isinstance(s, Mapping) else s for s in value or []]
+        if key == 'chosen_task':
+            return Suggestion.from_value(value) if isinstance(value, Mapping) else value
+        if key == 'messages':
+            if isinstance(value, MessageLog) and value.artifacts is self.artifacts:
+                return value
+            return MessageLog(value, artifacts=self.artifacts)
+        if key in self.ARTIFACT_KEYS:
+            self.artifacts.put(value)
+        return value
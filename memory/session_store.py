@@ -0,0 +1,374 @@
+"""
+Session Store - Append-only SQLite persistence of conversation sessions
+
+Saving a session used to rewrite the whole state as one JSON file, which
+costs more with every turn, and every session wrote to the same file. The
+store keeps all sessions in one SQLite database (WAL mode, so many sessions
+can write at once) keyed by session id:
+
+- messages: one row per message, appended as the conversation grows
+- state_deltas: one row per changed top-level state key (phase,
+  operating_model, masterplan, ...) holding its new JSON value
+- artifacts: the masterplans and deployment guides, once each, keyed by
+  content hash; messages and deltas only hold references to them
+
+A save appends only what changed since the previous one, and loading a
+session reads its own rows through the primary key index, so both cost
+O(the session's size) no matter how many sessions the database holds.
+Superseded deltas are compacted away from time to time.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+
+from memory.artifacts import ArtifactStore
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    phase TEXT,
+    message_count INTEGER NOT NULL DEFAULT 0,
+    delta_count INTEGER NOT NULL DEFAULT 0      -- deltas appended since the last compaction
+);
+CREATE TABLE IF NOT EXISTS messages (
+    session_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (session_id, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS state_deltas (
+    session_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (session_id, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS artifacts (
+    session_id TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (session_id, hash)
+) WITHOUT ROWID;
+"""
+
+# Deltas appended to a session before superseded ones are deleted
+COMPACT_EVERY = 200
+
+
+class SessionStore:
+    def __init__(self, db_path: str = None, compact_every: int = COMPACT_EVERY):
+        """
+        Initialize the session store
+
+        The database is opened on first use, so creating a store (or an
+        agent that has one) writes nothing to disk.
+
+        Args:
+            db_path: SQLite file (defaults to OPT_SESSION_DB, or output/sessions.db)
+            compact_every: Deltas appended to a session between compactions
+        """
+        self.db_path = db_path or os.getenv("OPT_SESSION_DB") or os.path.join("output", "sessions.db")
+        self.compact_every = compact_every
+
+        # One connection per thread; SQLite connections must not be shared
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._initialized = False
+        self.stats = {
+            'saves': 0,
+            'messages_appended': 0,
+            'deltas_appended': 0,
+            'artifacts_appended': 0,
+            'loads': 0,
+            'compactions': 0,
+        }
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's connection, creating the database on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            return conn
+
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Autocommit mode; transactions are opened explicitly with BEGIN IMMEDIATE
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=30000")
+        with self._lock:
+            if not self._initialized:
+                conn.executescript(SCHEMA)
+                self._initialized = True
+            self._connections.append(conn)
+
+        self._local.conn = conn
+        return conn
+
+    def append(self, session_id: str, messages: list = None, deltas: dict = None,
+               first_seq: int = 0, phase: str = None, artifacts: dict = None):
+        """
+        Append messages and state changes to a session in one transaction
+
+        Args:
+            session_id: Session to append to (created if new)
+            messages: New {'role', 'content'} messages
+            deltas: {state key: JSON text of its new value}
+            first_seq: Position of the first new message in the conversation
+            phase: Current phase, kept on the session row for listings
+            artifacts: New {hash: text} artifacts referenced by the messages and deltas
+        """
+        messages = messages or []
+        deltas = deltas or {}
+        artifacts = artifacts or {}
+        now = time.time()
+        conn = self._connect()
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT INTO sessions (session_id, created_at, updated_at, phase) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET updated_at = excluded.updated_at, "
+                "phase = COALESCE(excluded.phase, sessions.phase)",
+                (session_id, now, now, phase)
+            )
+            conn.executemany(
+                "INSERT INTO messages (session_id, seq, role, content, created_at) VALUES (?, ?, ?, ?, ?)",
+                [(session_id, first_seq + i, m['role'], m['content'], now) for i, m in enumerate(messages)]
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO artifacts (session_id, hash, content, created_at) VALUES (?, ?, ?, ?)",
+                [(session_id, digest, text, now) for digest, text in artifacts.items()]
+            )
+            if deltas:
+                next_seq = conn.execute(
+                    "SELECT COALESCE(MAX(seq), 0) + 1 FROM state_deltas WHERE session_id = ?", (session_id,)
+                ).fetchone()[0]
+                conn.executemany(
+                    "INSERT INTO state_deltas (session_id, seq, key, value, created_at) VALUES (?, ?, ?, ?, ?)",
+                    [(session_id, next_seq + i, key, value, now) for i, (key, value) in enumerate(deltas.items())]
+                )
+            conn.execute(
+                "UPDATE sessions SET message_count = message_count + ?, delta_count = delta_count + ? "
+                "WHERE session_id = ?",
+                (len(messages), len(deltas), session_id)
+            )
+            delta_count = conn.execute(
+                "SELECT delta_count FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()[0]
+            if delta_count >= self.compact_every:
+                self._compact(conn, session_id)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+        with self._lock:
+            self.stats['saves'] += 1
+            self.stats['messages_appended'] += len(messages)
+            self.stats['deltas_appended'] += len(deltas)
+            self.stats['artifacts_appended'] += len(artifacts)
+
+    def save(self, memory) -> str:
+        """
+        Append what changed in a ConversationMemory since its last save
+
+        Args:
+            memory: The session's ConversationMemory
+
+        Returns:
+            The session id
+        """
+        first_seq, messages, deltas = memory.pending_changes()
+        artifacts = memory.pending_artifacts()
+        if messages or deltas or artifacts:
+            self.append(memory.session_id, messages, deltas, first_seq, memory.get_phase(), artifacts)
+        memory.mark_synced(len(messages), deltas, list(artifacts))
+        return memory.session_id
+
+    def load_state(self, session_id: str):
+        """
+        Rebuild a session's state from its deltas and messages
+
+        Artifact references are resolved, so the state holds full texts.
+
+        Args:
+            session_id: Session to load
+
+        Returns:
+            State dict (the top-level keys that were saved, plus 'messages'),
+            or None if the session is unknown
+        """
+        conn = self._connect()
+        if conn.execute("SELECT 1 FROM sessions WHERE session_id = ?", (session_id,)).fetchone() is None:
+            return None
+
+        artifacts = ArtifactStore()
+        artifacts.load(dict(conn.execute(
+            "SELECT hash, content FROM artifacts WHERE session_id = ?", (session_id,))))
+
+        # Later deltas replace earlier ones; only the latest value is decoded
+        latest = {}
+        for key, value in conn.execute(
+                "SELECT key, value FROM state_deltas WHERE session_id = ? ORDER BY seq", (session_id,)):
+            latest[key] = value
+        state = {key: artifacts.decode(json.loads(value)) for key, value in latest.items()}
+
+        state['messages'] = self._messages(conn, session_id, artifacts)
+
+        with self._lock:
+            self.stats['loads'] += 1
+        return state
+
+    def _messages(self, conn: sqlite3.Connection, session_id: str, artifacts: ArtifactStore,
+                  start: int = 0, end: int = None) -> list:
+        """Read messages [start, end) with their artifact references resolved"""
+        end = end if end is not None else -1
+        return [
+            {'role': role, 'content': artifacts.resolve(content)}
+            for role, content in conn.execute(
+                "SELECT role, content FROM messages WHERE session_id = ? AND seq >= ? AND (? < 0 OR seq < ?) "
+                "ORDER BY seq", (session_id, start, end, end))
+        ]
+
+    def load_messages(self, session_id: str, start: int = 0, end: int = None) -> list:
+        """
+        Read part of a session's full message log
+
+        Args:
+            session_id: Session to read
+            start: Position of the first message
+            end: Position after the last message (None = to the end)
+
+        Returns:
+            List of {'role', 'content'} dicts (empty for an unknown session)
+        """
+        conn = self._connect()
+        artifacts = ArtifactStore()
+        artifacts.load(dict(conn.execute(
+            "SELECT hash, content FROM artifacts WHERE session_id = ?", (session_id,))))
+        return self._messages(conn, session_id, artifacts, start, end)
+
+    def _compact(self, conn: sqlite3.Connection, session_id: str):
+        """Delete deltas superseded by a later one for the same key (inside a transaction)"""
+        conn.execute(
+            "DELETE FROM state_deltas WHERE session_id = ? AND seq NOT IN "
+            "(SELECT MAX(seq) FROM state_deltas WHERE session_id = ? GROUP BY key)",
+            (session_id, session_id)
+        )
+        conn.execute("UPDATE sessions SET delta_count = 0 WHERE session_id = ?", (session_id,))
+        with self._lock:
+            self.stats['compactions'] += 1
+
+    def compact(self, session_id: str):
+        """
+        Delete a session's superseded deltas now
+
+        Args:
+            session_id: Session to compact
+        """
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._compact(conn, session_id)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def exists(self, session_id: str) -> bool:
+        """
+        Check whether a session was ever saved
+
+        Args:
+            session_id: Session to look up
+
+        Returns:
+            True if the store has the session
+        """
+        row = self._connect().execute("SELECT 1 FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        return row is not None
+
+    def list_sessions(self, limit: int = 50) -> list:
+        """
+        Get the most recently updated sessions
+
+        Args:
+            limit: Maximum sessions returned
+
+        Returns:
+            List of dicts with session_id, phase, message_count, created_at and updated_at
+        """
+        rows = self._connect().execute(
+            "SELECT session_id, phase, message_count, created_at, updated_at FROM sessions "
+            "ORDER BY updated_at DESC LIMIT ?", (limit,)
+        ).fetchall()
+        return [
+            {'session_id': row[0], 'phase': row[1], 'message_count': row[2],
+             'created_at': row[3], 'updated_at': row[4]}
+            for row in rows
+        ]
+
+    def delete(self, session_id: str):
+        """
+        Remove a session and all its rows
+
+        Args:
+            session_id: Session to delete
+        """
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for table in ('messages', 'state_deltas', 'artifacts', 'sessions'):
+                conn.execute(f"DELETE FROM {table} WHERE session_id = ?", (session_id,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def get_stats(self) -> dict:
+        """Get a copy of the store counters"""
+        with self._lock:
+            stats = dict(self.stats)
+        stats['db_path'] = self.db_path
+        return stats
+
+    def close(self):
+        """Close every connection opened by the store"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+
+_shared_store = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_session_store() -> SessionStore:
+    """
+    Get the process-wide session store, creating it on first use
+
+    Returns:
+        The shared SessionStore instance
+    """
+    global _shared_store
+
+    with _shared_lock:
+        if _shared_store is None:
+            _shared_store = SessionStore()
+        return _shared_store
@@ -0,0 +1,80 @@
+"""
+Test Streaming Analysis
+"""
+
+import sys
+import os
+import time
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.standin_server import StandinServer
+from tools.llm_client import LLMClient
+from tools.analysis_tool import AnalysisTool
+from memory.conversation_memory import ConversationMemory
+
+
+def make_state() -> dict:
+    """Bakery OPT data, complete through the task"""
+    memory = ConversationMemory()
+    memory.update_operating_model('business_type', 'Bakery')
+    memory.update_operating_model('business_size', '2 employees')
+    memory.update_operating_model('tools_used', 'Excel, Gmail')
+    memory.update_operating_model('pain_points', 'Manual inventory tracking daily')
+    memory.update_process('name', 'Inventory Management')
+    memory.update_process('description', 'Count ingredients and update Excel')
+    memory.update_process('frequency', 'Daily')
+    memory.update_process('time_spent', '30 minutes')
+    memory.update_task('name', 'Email suppliers for low stock')
+    memory.update_task('description', 'Check Excel and email each supplier')
+    memory.update_task('inputs', 'Excel inventory file')
+    memory.update_task('outputs', 'Order emails')
+    return memory.get_state()
+
+
+def test_suggestions_arrive_incrementally():
+    """Test that suggestion #1 is yielded before the reply has finished"""
+    print("\n" + "="*60)
+    print("TEST: Incremental Suggestions")
+    print("="*60 + "\n")
+    
+    server = StandinServer(port=0, fixtures_dir=tempfile.mkdtemp(), tokens_per_sec=300)
+    client = LLMClient(api_key="standin", base_url=server.start(), cache=False)
+    analysis = AnalysisTool(client)
+    
+    try:
+        started = time.perf_counter()
+        arrivals = []
+        suggestions = []
+        for suggestion in analysis.stream_suggestions(make_state()):
+            arrivals.append(time.perf_counter() - started)
+            suggestions.append(suggestion)
+        total = time.perf_counter() - started
+        
+        assert [s['rank'] for s in suggestions] == [1, 2, 3]
+        assert arrivals[0] < total * 0.6
+        print(f"✅ Arrivals: {[round(t, 2) for t in arrivals]} of {total:.2f}s")
+        
+        # Rendering piece by piece matches the one-shot display
+        assert ''.join(analysis.iter_display(iter(suggestions))) == analysis.display_suggestions(suggestions)
+        print("✅ Incremental display matches display_suggestions()")
+    finally:
+        client.close()
+        server.stop()
+    
+    print("\n✅ Incremental suggestions test PASSED\n")
+    return True
+
+
+if __name__ == "__main__":
+    print("\n🧪 RUNNING STREAMING ANALYSIS TESTS\n")
+    
+    try:
+        test_suggestions_arrive_incrementally()
+        
+        print("="*60)
+        print("🎉 ALL STREAMING ANALYSIS TESTS PASSED!")
+        print("="*60 + "\n")
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {str(e)}\n")
+        sys.exit(1)
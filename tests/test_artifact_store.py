@@ -0,0 +1,109 @@
+"""
+Test artifact references in the message history
+"""
+
+import sys
+import os
+import json
+import sqlite3
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from memory.artifacts import MARKER, content_hash
+from memory.conversation_memory import ConversationMemory
+from memory.session_store import SessionStore
+
+
+MASTERPLAN = "# Masterplan\n\n" + "1. Read the stock sheet and email the supplier of each low item.\n" * 40
+
+
+def _memory_with_masterplan() -> ConversationMemory:
+    memory = ConversationMemory()
+    memory.add_message('user', '1')
+    memory.get_state()['masterplan'] = MASTERPLAN
+    memory.add_message('agent', f"\n✅ Masterplan Complete!\n\n{MASTERPLAN}\n\nNow the code...")
+    return memory
+
+
+def test_message_references():
+    """Test that a reply embedding an artifact holds a reference, read back in full"""
+    print("\n" + "="*60)
+    print("TEST: Message References")
+    print("="*60 + "\n")
+    
+    memory = _memory_with_masterplan()
+    state = memory.get_state()
+    digest = content_hash(MASTERPLAN)
+    
+    raw = state['messages'].raw()[-1]['content']
+    assert MARKER.format(digest) in raw and len(raw) < 200, raw
+    print(f"✅ Reply stored as {len(raw)} characters instead of {len(MASTERPLAN) + 40}")
+    
+    reply = state['messages'][-1]['content']
+    assert reply.startswith("\n✅ Masterplan Complete!") and MASTERPLAN in reply
+    assert memory.to_dict()['messages'][-1]['content'] == reply
+    print("✅ Reply resolved in full when read and exported")
+    
+    # Short texts are not worth a reference
+    memory.get_state()['deployment_guide'] = "Run it daily"
+    memory.add_message('agent', "Guide: Run it daily")
+    assert memory.get_state()['messages'].raw()[-1]['content'] == "Guide: Run it daily"
+    
+    print("\n✅ Message references test PASSED\n")
+    return True
+
+
+def test_artifacts_saved_once():
+    """Test that the session store writes each artifact once and loads it back"""
+    print("\n" + "="*60)
+    print("TEST: Artifacts Saved Once")
+    print("="*60 + "\n")
+    
+    db_path = os.path.join(tempfile.mkdtemp(), "sessions.db")
+    store = SessionStore(db_path)
+    memory = _memory_with_masterplan()
+    store.save(memory)
+    store.save(memory)
+    
+    conn = sqlite3.connect(db_path)
+    stored = conn.execute("SELECT SUM(LENGTH(content)) FROM messages").fetchone()[0]
+    deltas = conn.execute("SELECT SUM(LENGTH(value)) FROM state_deltas").fetchone()[0]
+    artifacts = conn.execute("SELECT COUNT(*), SUM(LENGTH(content)) FROM artifacts").fetchone()
+    conn.close()
+    assert artifacts == (1, len(MASTERPLAN)), artifacts
+    assert stored < 200 and deltas < len(MASTERPLAN), (stored, deltas)
+    assert store.get_stats()['artifacts_appended'] == 1
+    print(f"✅ Masterplan written once; messages {stored} chars, deltas {deltas} chars")
+    
+    loaded = store.load_state(memory.session_id)
+    assert loaded['masterplan'] == MASTERPLAN and loaded == memory.get_state()
+    print("✅ Loaded state has the full texts")
+    
+    resumed = ConversationMemory()
+    resumed.restore(loaded, session_id=memory.session_id)
+    assert resumed.get_state()['messages'].raw() == memory.get_state()['messages'].raw()
+    assert resumed.pending_changes()[1:] == ([], {}) and resumed.pending_artifacts() == {}
+    print("✅ Restored session keeps references and has nothing to re-save")
+    
+    # An exported file has no references
+    exported = json.dumps(memory.to_dict())
+    assert '\x1e' not in json.loads(exported)['messages'][-1]['content']
+    
+    store.close()
+    print("\n✅ Artifacts saved once test PASSED\n")
+    return True
+
+
+if __name__ == "__main__":
+    print("\n🧪 RUNNING ARTIFACT STORE TESTS\n")
+    
+    try:
+        test_message_references()
+        test_artifacts_saved_once()
+        
+        print("="*60)
+        print("🎉 ALL ARTIFACT STORE TESTS PASSED!")
+        print("="*60 + "\n")
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {str(e)}\n")
+        sys.exit(1)
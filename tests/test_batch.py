@@ -0,0 +1,45 @@
+"""
+Test the Batch Runner
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent.batch import BatchRunner
+from tools.llm_client import LLMClient
+
+
+def test_profile_ids():
+    """Test that every profile gets its own safe output directory"""
+    print("\n" + "="*60)
+    print("TEST: Profile Ids")
+    print("="*60 + "\n")
+    
+    llm = LLMClient(api_key="standin", base_url="http://127.0.0.1:9", cache=False)
+    runner = BatchRunner(workers=1, output_root=tempfile.mkdtemp(), llm=llm)
+    
+    profiles = [{'id': '..'}, {'id': '.'}, {'id': '../etc'}, {'id': 'bakery'}, {'id': 'Bakery'},
+                {'id': 'bakery'}, {}, {'id': 'bakery 01'}, {'id': 'bakery_01'}]
+    ids = runner._profile_ids(profiles)
+    assert ids == ['profile_0000', 'profile_0001', '_etc', 'bakery', 'Bakery_0004', 'bakery_0005',
+                   'profile_0006', 'bakery_01', 'bakery_01_0008'], ids
+    print(f"✅ Ids: {ids}")
+    
+    print("\n✅ Profile id test PASSED\n")
+    return True
+
+
+if __name__ == "__main__":
+    print("\n🧪 RUNNING BATCH TESTS\n")
+    
+    try:
+        test_profile_ids()
+        
+        print("="*60)
+        print("🎉 ALL BATCH TESTS PASSED!")
+        print("="*60 + "\n")
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {str(e)}\n")
+        sys.exit(1)
@@ -0,0 +1,187 @@
+"""
+Test the per-phase Checkpoint Journal
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent.checkpoints import CheckpointJournal
+from agent.core import OPTAgent
+from bench.standin_server import StandinServer
+from memory.session_store import SessionStore
+from tools.llm_client import LLMClient
+
+
+CHOSEN = {'rank': 1, 'name': 'Low Stock Alerts', 'description': 'Email suppliers when stock is low',
+          'time_saved': '3 hours/week', 'money_saved': '$200/month', 'impact': 'High'}
+
+
+def test_journal():
+    """Test atomic writes and input-hash matching"""
+    print("\n" + "="*60)
+    print("TEST: Checkpoint Journal")
+    print("="*60 + "\n")
+    
+    directory = os.path.join(tempfile.mkdtemp(), ".checkpoints")
+    journal = CheckpointJournal(directory)
+    options = {'model': 'm', 'temperature': 0.3, 'max_tokens': 100, 'prompt_version': '1'}
+    first = CheckpointJournal.input_hash("Plan the bakery automation", options)
+    assert first == CheckpointJournal.input_hash("Plan the bakery automation", dict(options))
+    assert first != CheckpointJournal.input_hash("Plan the bakery automation", dict(options, prompt_version='2'))
+    
+    assert journal.load('masterplan', first) is None
+    assert not os.path.exists(directory)
+    print("✅ Nothing written before the first record")
+    
+    journal.record('masterplan', first, "# Plan v1")
+    journal.record('masterplan', first, "# Plan v2")
+    assert CheckpointJournal(directory).load('masterplan', first) == "# Plan v2"
+    assert journal.load('masterplan', "other inputs") is None
+    assert os.listdir(directory) == [f'masterplan-{first}.json']
+    print("✅ Latest checkpoint read back, no temp files left")
+    
+    # New inputs replace the phase's older checkpoint, other phases are kept
+    second = CheckpointJournal.input_hash("Plan the florist automation", options)
+    journal.record('code', first, {'code': "print('hi')"})
+    journal.record('masterplan', second, "# Florist plan")
+    assert sorted(os.listdir(directory)) == [f'code-{first}.json', f'masterplan-{second}.json']
+    assert journal.load('masterplan', first) is None
+    assert journal.load('masterplan', second) == "# Florist plan"
+    print("✅ Older checkpoints of a phase pruned")
+    
+    # A torn file (e.g. copied mid-write) is treated as missing
+    with open(os.path.join(directory, f'code-{first}.json'), 'w') as f:
+        f.write('{"phase": "code", "input_')
+    assert journal.load('code', first) is None
+    
+    journal.clear()
+    assert journal.load('masterplan', first) is None
+    print(f"✅ Mismatched, torn and cleared checkpoints miss: {journal.get_stats()}")
+    
+    print("\n✅ Checkpoint journal test PASSED\n")
+    return True
+
+
+def _agent(llm, store, output_dir) -> OPTAgent:
+    agent = OPTAgent(llm=llm, speculative_masterplans=0, pipeline_mode=False,
+                     output_dir=output_dir, session_store=store)
+    memory = agent.memory
+    memory.update_operating_model('business_type', 'Bakery')
+    memory.update_task('name', 'Email suppliers')
+    state = memory.get_state()
+    state['suggestions'] = [CHOSEN]
+    state['chosen_task'] = CHOSEN
+    memory.transition_phase('masterplan')
+    return agent
+
+
+def test_restart_skips_checkpointed_phases():
+    """Test that a restarted run only regenerates the phase that was lost"""
+    print("\n" + "="*60)
+    print("TEST: Restart From Checkpoints")
+    print("="*60 + "\n")
+    
+    workdir = tempfile.mkdtemp()
+    server = StandinServer(port=0, fixtures_dir=tempfile.mkdtemp())
+    llm = LLMClient(api_key="standin", base_url=server.start(), cache=False)
+    store = SessionStore(os.path.join(workdir, "sessions.db"))
+    
+    try:
+        # First run: masterplan and code are generated, then the process dies
+        first = _agent(llm, store, workdir)
+        first.chat("go")
+        first.chat("continue")
+        assert first.memory.get_phase() == 'deployment'
+        assert server.state.stats['requests'] == 2
+        names = sorted(name.split('-')[0] for name in os.listdir(os.path.join(workdir, ".checkpoints")))
+        assert names == ['code', 'masterplan'], names
+        print("✅ Masterplan and code checkpointed before moving on")
+        
+        # Second run, new session with the same inputs: only deployment is generated
+        second = _agent(llm, store, workdir)
+        events = []
+        second.run_pipeline(on_event=events.append)
+        statuses = {e['stage']: e['status'] for e in events if e['stage'] != 'code' or e['status'] != 'validated'}
+        assert statuses == {'masterplan': 'restored', 'code': 'restored', 'deployment': 'completed'}, statuses
+        assert server.state.stats['requests'] == 3
+        assert second.memory.get_state()['code']['code'] == first.memory.get_state()['code']['code']
+        assert os.path.exists(os.path.join(workdir, 'DEPLOYMENT.md'))
+        print("✅ Restart cost one phase: masterplan and code restored")
+        
+        # Changed inputs invalidate the checkpoint
+        third = _agent(llm, store, workdir)
+        third.memory.update_operating_model('business_type', 'Florist')
+        third.chat("go")
+        assert server.state.stats['requests'] == 4
+        print("✅ Different inputs regenerate the phase")
+        
+        # ...and replace the phase's older checkpoint
+        names = sorted(name.split('-')[0] for name in os.listdir(os.path.join(workdir, ".checkpoints")))
+        assert names == ['code', 'deployment', 'masterplan'], names
+        fourth = _agent(llm, store, workdir)
+        assert fourth.chat("go") and server.state.stats['requests'] == 5
+        print("✅ Only the latest checkpoint of each phase is kept")
+    finally:
+        llm.close()
+        server.stop()
+        store.close()
+    
+    print("\n✅ Restart from checkpoints test PASSED\n")
+    return True
+
+
+def test_fallback_not_checkpointed():
+    """Test that a fallback from a failed LLM call is shown but never checkpointed"""
+    print("\n" + "="*60)
+    print("TEST: Fallbacks Are Not Checkpointed")
+    print("="*60 + "\n")
+    
+    workdir = tempfile.mkdtemp()
+    store = SessionStore(os.path.join(workdir, "sessions.db"))
+    down = LLMClient(api_key="standin", base_url="http://127.0.0.1:9", cache=False)
+    server = StandinServer(port=0, fixtures_dir=tempfile.mkdtemp())
+    llm = LLMClient(api_key="standin", base_url=server.start(), cache=False)
+    
+    try:
+        # LLM unreachable: the canned masterplan and code are used, nothing is recorded
+        first = _agent(down, store, workdir)
+        for part in first.chat_stream("go"):
+            pass
+        first.chat("continue")
+        assert first.memory.get_phase() == 'deployment'
+        assert "AUTOMATION MASTERPLAN" in first.memory.get_state()['masterplan']
+        assert not os.path.exists(os.path.join(workdir, ".checkpoints"))
+        print("✅ Fallback masterplan and code shown, no checkpoint written")
+        
+        # A restart with the LLM back retries the phases
+        second = _agent(llm, store, workdir)
+        second.chat("go")
+        assert server.state.stats['requests'] == 1
+        assert second.memory.get_state()['masterplan'] != first.memory.get_state()['masterplan']
+        print("✅ Restart retries the phase instead of restoring the fallback")
+    finally:
+        down.close()
+        llm.close()
+        server.stop()
+        store.close()
+    
+    print("\n✅ Fallback checkpoint test PASSED\n")
+    return True
+
+
+if __name__ == "__main__":
+    print("\n🧪 RUNNING CHECKPOINT TESTS\n")
+    
+    try:
+        test_journal()
+        test_restart_skips_checkpointed_phases()
+        test_fallback_not_checkpointed()
+        
+        print("="*60)
+        print("🎉 ALL CHECKPOINT TESTS PASSED!")
+        print("="*60 + "\n")
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {str(e)}\n")
+        sys.exit(1)
@@ -8,6 +8,12 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from tools.discovery_tool import DiscoveryTool
 from memory.conversation_memory import ConversationMemory
+from tools.llm_client import LLMClient
+
+
+def _offline_llm() -> LLMClient:
+    """Client for tests that never reach the LLM (no API key needed)"""
+    return LLMClient(api_key="standin", base_url="http://127.0.0.1:9", cache=False)
 
 
 def test_question_generation():
@@ -58,6 +64,76 @@ def test_information_extraction():
     return True
 
 
+def test_multi_field_update():
+    """Test that one extraction can fill several fields at once"""
+    print("\n" + "="*60)
+    print("TEST: Multi-Field Update")
+    print("="*60 + "\n")
+    
+    memory = ConversationMemory()
+    discovery = DiscoveryTool(llm=_offline_llm())
+    
+    # "I run a 2-person bakery using Excel and Gmail"
+    extraction = {
+        'fields': {
+            'operating_model.business_type': {'value': 'Bakery', 'confidence': 'high'},
+            'operating_model.business_size': {'value': '2 people', 'confidence': 'high'},
+            'operating_model.tools_used': {'value': 'Excel, Gmail', 'confidence': 'medium'},
+            'process.name': {'value': 'Guess', 'confidence': 'low'},
+        },
+        'extracted_value': 'Bakery',
+        'confidence': 'high'
+    }
+    discovery.update_memory_with_extraction(extraction, memory)
+    
+    om = memory.get_state()['operating_model']
+    assert om['business_type'] == 'Bakery'
+    assert om['business_size'] == '2 people'
+    assert om['tools_used'] == 'Excel, Gmail'
+    assert memory.get_state()['process']['name'] is None
+    print("✅ Three fields filled from one message, low-confidence guess skipped")
+    
+    # Filled questions are skipped
+    question = discovery.get_next_question(memory.get_state())
+    assert "frustrating" in question.lower()
+    print(f"✅ Next question: {question[:50]}...")
+    
+    # Section is marked complete once its last field is filled
+    discovery.update_memory_with_extraction({'extracted_value': 'Inventory', 'confidence': 'high'}, memory)
+    assert memory.get_state()['operating_model']['completed']
+    print("✅ Operating Model marked complete")
+    
+    print("\n✅ Multi-field update test PASSED\n")
+    return True
+
+
+def test_asked_field_always_filled():
+    """Test that volunteered fields do not leave the asked field empty"""
+    print("\n" + "="*60)
+    print("TEST: Asked Field Always Filled")
+    print("="*60 + "\n")
+    
+    memory = ConversationMemory()
+    discovery = DiscoveryTool(llm=_offline_llm())
+    
+    # Asked about the business, the reply only picked out the tools
+    user_msg = "A bakery, we do everything in Excel"
+    reply = '{"fields": {"operating_model.tools_used": {"value": "Excel", "confidence": "high"}}}'
+    extraction = discovery._parse_response(reply, user_msg, memory.get_state())
+    assert extraction['field'] == 'operating_model.business_type'
+    assert extraction['extracted_value'] == user_msg and extraction['confidence'] == 'low'
+    
+    discovery.update_memory_with_extraction(extraction, memory)
+    om = memory.get_state()['operating_model']
+    assert om['business_type'] == user_msg and om['tools_used'] == 'Excel'
+    question = discovery.get_next_question(memory.get_state())
+    assert "people" in question.lower() or "team" in question.lower()
+    print(f"✅ Raw answer kept for the asked field, next question: {question[:50]}...")
+    
+    print("\n✅ Asked field test PASSED\n")
+    return True
+
+
 def test_completion_check():
     """Test that discovery knows when it's complete"""
     print("\n" + "="*60)
@@ -90,6 +166,8 @@ if __name__ == "__main__":
     try:
         test_question_generation()
         test_information_extraction()
+        test_multi_field_update()
+        test_asked_field_always_filled()
         test_completion_check()
         
         print("="*60)
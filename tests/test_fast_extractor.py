@@ -0,0 +1,111 @@
+"""
+Test Fast Extractor
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.fast_extractor import FastExtractor
+from memory.conversation_memory import ConversationMemory
+
+
+def test_parsers():
+    """Test duration, frequency and headcount normalization"""
+    print("\n" + "="*60)
+    print("TEST: Rule-Based Parsers")
+    print("="*60 + "\n")
+    
+    extractor = FastExtractor()
+    
+    assert extractor.parse_duration("About 30-45 minutes each time") == ("30-45 minutes", 'high')
+    assert extractor.parse_duration("half an hour") == ("30 minutes", 'high')
+    assert extractor.parse_duration("1.5 hrs") == ("90 minutes", 'high')
+    assert extractor.parse_duration("2-3 hours") == ("2-3 hours", 'high')
+    assert extractor.parse_duration("takes forever") is None
+    assert extractor.parse_duration("2 days") == ("16 hours", 'high')
+    assert extractor.parse_duration("2 days", days=False) is None
+    for frequency in ("Once a day", "Twice a day", "A few times a day"):
+        assert extractor.parse_duration(frequency) is None, frequency
+    print("✅ Durations normalized")
+    
+    assert extractor.parse_frequency("Every single day") == ("daily", 'high')
+    assert extractor.parse_frequency("twice a week") == ("2 times per week", 'high')
+    assert extractor.parse_frequency("once a month") == ("monthly", 'high')
+    assert extractor.parse_frequency("Every day, sometimes twice a day")[1] == 'low'
+    assert extractor.parse_frequency("whenever it's needed") is None
+    for answer in ("daily or weekly", "weekly, sometimes monthly"):
+        assert extractor.parse_frequency(answer)[1] == 'low', answer
+    assert extractor.parse_frequency("every weekday") == ("5 times per week", 'high')
+    assert extractor.parse_frequency("every Monday") == ("weekly", 'high')
+    assert extractor.parse_frequency("every Monday and Thursday") == ("2 times per week", 'low')
+    print("✅ Frequencies normalized")
+    
+    assert extractor.parse_headcount("Just 2 people - me and my assistant") == ("2 people", 'high')
+    assert extractor.parse_headcount("me and my wife") == ("2 people", 'high')
+    assert extractor.parse_headcount("Me and one employee") == ("2 people", 'low')
+    assert extractor.parse_headcount("just me and a team member") == ("2 people", 'low')
+    assert extractor.parse_headcount("me and 3 contractors") == ("4 people", 'low')
+    assert extractor.parse_headcount("just me") == ("1 person", 'high')
+    assert extractor.parse_headcount("5-10 staff") == ("5-10 people", 'high')
+    assert extractor.parse_headcount("a bakery") is None
+    print("✅ Headcounts normalized")
+    
+    print("\n✅ Parser test PASSED\n")
+    return True
+
+
+def test_fast_path_and_fallthrough():
+    """Test that only confident answers to rule-parsable fields skip the LLM"""
+    print("\n" + "="*60)
+    print("TEST: Fast Path and Fall-Through")
+    print("="*60 + "\n")
+    
+    extractor = FastExtractor()
+    memory = ConversationMemory()
+    state = memory.get_state()
+    
+    # Not a rule-parsable field
+    assert extractor.extract("I run a bakery", state, ('operating_model', 'business_type')) is None
+    
+    # Confident answer, plus a second field in the same message
+    memory.update_operating_model('business_type', 'Bakery')
+    memory.update_operating_model('business_size', '2 people')
+    fields = extractor.extract("Daily, about 30 minutes", state, ('process', 'frequency'))
+    assert fields['process.frequency']['value'] == 'daily'
+    assert fields['process.time_spent']['value'] == '30 minutes'
+    print(f"✅ Fast path: {fields}")
+    
+    # Ambiguous or long answers fall through
+    assert extractor.extract("Every day, sometimes twice a day", state, ('process', 'frequency')) is None
+    assert extractor.extract("It depends on the season but in summer it is daily and in winter less", state, ('process', 'frequency')) is None
+    
+    # "a day" in a frequency answer is not a time spent
+    for answer, frequency in (("Once a day", "daily"), ("Twice a day", "2 times per day"),
+                              ("A few times a day", "3 times per day")):
+        fields = extractor.extract(answer, state, ('process', 'frequency'))
+        assert fields == {'process.frequency': {'value': frequency, 'confidence': 'high'}}, fields
+    assert 'process.time_spent' not in extractor.extract("Daily, 2 days", state, ('process', 'frequency'))
+    assert extractor.extract("About 2 days", state, ('process', 'time_spent'))['process.time_spent']['value'] == '16 hours'
+    print("✅ Frequencies with 'a day' leave the time spent unanswered")
+    
+    assert extractor.stats == {'hits': 6, 'fallthroughs': 1}
+    print(f"✅ Stats: {extractor.stats}")
+    
+    print("\n✅ Fast path test PASSED\n")
+    return True
+
+
+if __name__ == "__main__":
+    print("\n🧪 RUNNING FAST EXTRACTOR TESTS\n")
+    
+    try:
+        test_parsers()
+        test_fast_path_and_fallthrough()
+        
+        print("="*60)
+        print("🎉 ALL FAST EXTRACTOR TESTS PASSED!")
+        print("="*60 + "\n")
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {str(e)}\n")
+        sys.exit(1)
@@ -0,0 +1,143 @@
+"""
+Test the bounded conversation history and its rolling summary
+"""
+
+import sys
+import os
+import json
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent.core import OPTAgent
+from agent.steps import run
+from memory.conversation_memory import ConversationMemory, SUMMARY_LINES
+from memory.session_store import SessionStore
+from tools.llm_client import LLMClient
+
+
+def _converse(memory: ConversationMemory, store: SessionStore, turns: int, start: int = 0):
+    for turn in range(start, start + turns):
+        memory.add_message('user', f"question {turn}")
+        memory.add_message('agent', f"answer {turn}")
+        if store is not None:
+            store.save(memory)
+
+
+def test_ring_buffer():
+    """Test that only the last N turns stay in memory once they are saved"""
+    print("\n" + "="*60)
+    print("TEST: History Ring Buffer")
+    print("="*60 + "\n")
+    
+    store = SessionStore(os.path.join(tempfile.mkdtemp(), "sessions.db"))
+    memory = ConversationMemory(history_turns=3)
+    _converse(memory, store, 20)
+    messages = memory.get_state()['messages']
+    
+    assert len(messages) == 6 and messages.total == 40 and messages.dropped == 34
+    assert messages[0]['content'] == "question 17" and messages[-1]['content'] == "answer 19"
+    assert len(store.load_state(memory.session_id)['messages']) == 40
+    print("✅ 6 messages in memory, all 40 in the session store")
+    
+    summary = memory.get_state()['history_summary']
+    assert summary.splitlines()[-1] == "agent: answer 16"
+    context = memory.get_context(recent_messages=2)
+    assert "Earlier in the conversation" in context and context.endswith("user: question 19\nagent: answer 19")
+    print("✅ Dropped turns folded into the summary used by get_context()")
+    
+    # Once a session is saved, messages the store does not have yet are kept
+    _converse(memory, None, 5, start=20)
+    assert len(messages) == 10 and messages[0]['content'] == "question 20"
+    store.save(memory)
+    assert len(messages) == 6 and len(store.load_state(memory.session_id)['messages']) == 50
+    print("✅ Unsaved messages kept until the store has them")
+    
+    # A session that is never saved is trimmed too, into the summary
+    unsaved = ConversationMemory(history_turns=3)
+    _converse(unsaved, None, 20)
+    assert len(unsaved.get_state()['messages']) == 6
+    assert unsaved.get_state()['history_summary'].splitlines()[-1] == "agent: answer 16"
+    print("✅ Sessions without a store are bounded as well")
+    
+    store.close()
+    print("\n✅ Ring buffer test PASSED\n")
+    return True
+
+
+def test_bounded_summary():
+    """Test that the summary and the saved state stay bounded in long sessions"""
+    print("\n" + "="*60)
+    print("TEST: Bounded Summary")
+    print("="*60 + "\n")
+    
+    store = SessionStore(os.path.join(tempfile.mkdtemp(), "sessions.db"))
+    memory = ConversationMemory(history_turns=2)
+    _converse(memory, store, 50)
+    sizes = []
+    for block in range(3):
+        _converse(memory, store, 100, start=50 + block * 100)
+        sizes.append(len(json.dumps(memory.to_dict())))
+    
+    lines = memory.get_state()['history_summary'].splitlines()
+    assert len(lines) == SUMMARY_LINES + 1 and lines[0] == f"… {700 - 4 - SUMMARY_LINES} earlier messages", lines[0]
+    assert max(sizes) - min(sizes) < 50, sizes
+    print(f"✅ Summary has {len(lines)} lines after 350 turns; serialized state ~{sizes[-1]} bytes")
+    
+    # A reloaded session is bounded too
+    resumed = ConversationMemory(history_turns=2)
+    resumed.restore(store.load_state(memory.session_id), session_id=memory.session_id)
+    assert resumed.get_state()['messages'] == memory.get_state()['messages']
+    assert resumed.get_state()['history_summary'] == memory.get_state()['history_summary']
+    assert resumed.pending_changes()[1:] == ([], {})
+    print("✅ Reloaded session rebuilds the same window and summary")
+    
+    store.close()
+    print("\n✅ Bounded summary test PASSED\n")
+    return True
+
+
+def test_agent_history():
+    """Test the agent's use of the total message count and full exports"""
+    print("\n" + "="*60)
+    print("TEST: Agent With Bounded History")
+    print("="*60 + "\n")
+    
+    workdir = tempfile.mkdtemp()
+    store = SessionStore(os.path.join(workdir, "sessions.db"))
+    llm = LLMClient(api_key="standin", base_url="http://127.0.0.1:9", cache=False)
+    
+    try:
+        agent = OPTAgent(llm=llm, speculative_masterplans=0, pipeline_mode=False, output_dir=workdir,
+                         session_store=store, history_turns=1)
+        _converse(agent.memory, store, 5)
+        assert len(agent.memory.get_state()['messages']) == 2
+        assert run(agent._discovery_turn("hello")) != agent._welcome_message()
+        print("✅ Welcome only shown at the real start of the conversation")
+        
+        with open(agent.export_session(), 'r', encoding='utf-8') as f:
+            exported = json.load(f)
+        assert [m['content'] for m in exported['messages'][:2]] == ["question 0", "answer 0"]
+        assert len(exported['messages']) == 10
+        print("✅ Export includes the messages dropped from memory")
+    finally:
+        llm.close()
+        store.close()
+    
+    print("\n✅ Agent history test PASSED\n")
+    return True
+
+
+if __name__ == "__main__":
+    print("\n🧪 RUNNING HISTORY TESTS\n")
+    
+    try:
+        test_ring_buffer()
+        test_bounded_summary()
+        test_agent_history()
+        
+        print("="*60)
+        print("🎉 ALL HISTORY TESTS PASSED!")
+        print("="*60 + "\n")
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {str(e)}\n")
+        sys.exit(1)
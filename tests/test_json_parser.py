@@ -0,0 +1,122 @@
+"""
+Test JSON Parser
+"""
+
+import sys
+import os
+import httpx
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from groq import BadRequestError
+from tools.json_parser import parse_json, IncrementalJSONParser, JSONParseError
+from tools.llm_client import LLMClient
+
+
+def test_repairs():
+    """Test that common defects in LLM replies are repaired"""
+    print("\n" + "="*60)
+    print("TEST: JSON Repairs")
+    print("="*60 + "\n")
+    
+    cases = [
+        ('```json\n{"a": 1}\n```', {'a': 1}),
+        ('Here you go:\n{"a": 1}\nLet me know if you need more {details}.', {'a': 1}),
+        ('{"a": [1, 2,], "b": True, "c": None,}', {'a': [1, 2], 'b': True, 'c': None}),
+        ("{'name': 'Bob\\'s \"Bakery\"'}", {'name': 'Bob\'s "Bakery"'}),
+        ('{"a": 1, // note\n "b": /* inline */ 2}', {'a': 1, 'b': 2}),
+        ('{"text": "line one\nline two"}', {'text': 'line one\nline two'}),
+        ('{"url": "http://example.com/a", "n": 1e3}', {'url': 'http://example.com/a', 'n': 1000.0}),
+    ]
+    for text, expected in cases:
+        assert parse_json(text) == expected, text
+    print(f"✅ {len(cases)} defective replies repaired")
+    
+    try:
+        parse_json("I could not find anything to extract.")
+        assert False, "expected JSONParseError"
+    except JSONParseError:
+        print("✅ Reply without JSON raises JSONParseError")
+    
+    print("\n✅ Repairs test PASSED\n")
+    return True
+
+
+def test_truncated_reply():
+    """Test that a reply cut off mid-value keeps its complete elements"""
+    print("\n" + "="*60)
+    print("TEST: Truncated Reply")
+    print("="*60 + "\n")
+    
+    text = '{"suggestions": [{"rank": 1, "name": "Auto"}, {"rank": 2, "na'
+    assert parse_json(text) == {'suggestions': [{'rank': 1, 'name': 'Auto'}, {'rank': 2}]}
+    print("✅ Closed after the last complete element")
+    
+    text = '{"fields": {"task.name": {"value": "Send invoi'
+    assert parse_json(text) == {'fields': {'task.name': {'value': 'Send invoi'}}}
+    print("✅ Open string closed where it stands")
+    
+    print("\n✅ Truncation test PASSED\n")
+    return True
+
+
+def test_incremental():
+    """Test parsing a reply as it streams in"""
+    print("\n" + "="*60)
+    print("TEST: Incremental Parsing")
+    print("="*60 + "\n")
+    
+    text = ('Sure!\n```json\n{"suggestions": [{"rank": 1, "name": "Invoice bot"}, '
+            '{"rank": 2, "name": "Stock alerts"}]}\n```')
+    parser = IncrementalJSONParser()
+    seen = []
+    for i in range(0, len(text), 4):
+        value = parser.feed(text[i:i + 4])
+        if value:
+            count = len(value.get('suggestions', []))
+            if not seen or seen[-1] != count:
+                seen.append(count)
+    
+    assert parser.complete
+    assert parser.result()['suggestions'][1]['name'] == "Stock alerts"
+    assert seen[0] < seen[-1] == 2
+    print(f"✅ Suggestion counts seen while streaming: {seen}")
+    
+    print("\n✅ Incremental test PASSED\n")
+    return True
+
+
+def test_failed_generation():
+    """Test recovering the reply the backend rejected in JSON mode"""
+    print("\n" + "="*60)
+    print("TEST: JSON Mode Failed Generation")
+    print("="*60 + "\n")
+    
+    response = httpx.Response(400, request=httpx.Request('POST', 'http://localhost/openai/v1/chat/completions'))
+    error = BadRequestError("json_validate_failed", response=response, body={'error': {
+        'code': 'json_validate_failed',
+        'failed_generation': '{"fields": {"process.name": {"value": "Inventory",}}}'
+    }})
+    text = LLMClient._failed_generation(error)
+    assert parse_json(text)['fields']['process.name']['value'] == "Inventory"
+    assert LLMClient._failed_generation(ValueError("other")) is None
+    print("✅ Rejected reply recovered and parsed")
+    
+    print("\n✅ Failed generation test PASSED\n")
+    return True
+
+
+if __name__ == "__main__":
+    print("\n🧪 RUNNING JSON PARSER TESTS\n")
+    
+    try:
+        test_repairs()
+        test_truncated_reply()
+        test_incremental()
+        test_failed_generation()
+        
+        print("="*60)
+        print("🎉 ALL JSON PARSER TESTS PASSED!")
+        print("="*60 + "\n")
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {str(e)}\n")
+        sys.exit(1)
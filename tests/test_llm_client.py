@@ -0,0 +1,85 @@
+"""
+Test LLM Client
+"""
+
+import sys
+import os
+import asyncio
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.standin_server import StandinServer
+from tools.response_cache import ResponseCache
+from tools.llm_client import LLMClient
+from tools.model_router import SMALL_MODEL, LARGE_MODEL
+
+
+def test_async_across_event_loops():
+    """Test that one client serves async calls from successive event loops"""
+    print("\n" + "="*60)
+    print("TEST: Async Calls Across Event Loops")
+    print("="*60 + "\n")
+    
+    server = StandinServer(port=0, fixtures_dir=tempfile.mkdtemp())
+    client = LLMClient(api_key="standin", base_url=server.start(), cache=False)
+    
+    try:
+        # One asyncio.run() per request, as a sync caller would do
+        for i in range(3):
+            assert asyncio.run(client.acomplete(f"Describe bakery {i}", call_name='test.loops'))
+        records = [r for r in client.metrics.records if r['call_name'] == 'test.loops']
+        assert len(records) == 3 and not any(r['error'] or r['retries'] for r in records), records
+        assert len(client._async_clients) <= 1
+        print("✅ Each loop got its own async pool, closed loops' pools dropped")
+    finally:
+        client.close()
+        server.stop()
+    
+    print("\n✅ Event loop test PASSED\n")
+    return True
+
+
+def test_fallback_replies_not_cached():
+    """Test that a reply from a fallback model is never cached under the requested model"""
+    print("\n" + "="*60)
+    print("TEST: Fallback Replies Not Cached")
+    print("="*60 + "\n")
+    
+    server = StandinServer(port=0, fixtures_dir=tempfile.mkdtemp(), rate_limited_models=[SMALL_MODEL])
+    client = LLMClient(api_key="standin", base_url=server.start(),
+                       cache=ResponseCache(cache_dir=tempfile.mkdtemp()))
+    
+    try:
+        options = {'model': SMALL_MODEL, 'fallback_models': [LARGE_MODEL], 'call_name': 'test.fallback'}
+        assert client.complete("Extract the business type", **options)
+        assert ''.join(client.stream("Summarize the bakery", **options))
+        assert asyncio.run(client.acomplete("Describe the bakery", **options))
+        records = [r for r in client.metrics.records if r['call_name'] == 'test.fallback']
+        assert [r['model'] for r in records] == [LARGE_MODEL] * 3, records
+        
+        # Asking again goes upstream rather than replaying the fallback reply
+        assert client.complete("Extract the business type", **options)
+        assert ''.join(client.stream("Summarize the bakery", **options))
+        assert [r['cache'] for r in client.metrics.records if r['call_name'] == 'test.fallback'] == ['miss'] * 5
+        print("✅ Fallback replies left out of the cache")
+    finally:
+        client.close()
+        server.stop()
+    
+    print("\n✅ Fallback cache test PASSED\n")
+    return True
+
+
+if __name__ == "__main__":
+    print("\n🧪 RUNNING LLM CLIENT TESTS\n")
+    
+    try:
+        test_async_across_event_loops()
+        test_fallback_replies_not_cached()
+        
+        print("="*60)
+        print("🎉 ALL LLM CLIENT TESTS PASSED!")
+        print("="*60 + "\n")
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {str(e)}\n")
+        sys.exit(1)
@@ -0,0 +1,212 @@
+"""
+Test LLM Scheduler
+"""
+
+import sys
+import os
+import time
+import asyncio
+import tempfile
+import threading
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent.batch import BatchRunner
+from agent.core import OPTAgent
+from bench.standin_server import StandinServer
+from tools.llm_client import LLMClient
+from tools.llm_scheduler import LLMScheduler, SchedulerBusy, llm_priority
+
+MODEL = "llama-3.3-70b-versatile"
+
+PROFILE = {
+    "id": "bakery",
+    "operating_model": {"business_type": "bakery", "business_size": "3 employees", "tools_used": "Excel",
+                        "pain_points": "manual order entry"},
+    "process": {"name": "order intake", "description": "copy email orders into a sheet", "frequency": "daily",
+                "time_spent": "2 hours"},
+    "task": {"name": "order entry", "description": "type each order into Excel", "inputs": "order emails",
+             "outputs": "order sheet"}
+}
+
+
+class RefusingScheduler(LLMScheduler):
+    def __init__(self, refusals: int):
+        """Scheduler whose queue is full for the first `refusals` calls"""
+        super().__init__()
+        self.refusals = refusals
+
+    def _enqueue(self, model: str, tokens: int, priority: str) -> list:
+        if self.refusals:
+            self.refusals -= 1
+            raise SchedulerBusy(f"LLM queue for {model} is full")
+        return super()._enqueue(model, tokens, priority)
+
+
+def test_token_bucket():
+    """Test that the TPM bucket throttles and settles to real usage"""
+    print("\n" + "="*60)
+    print("TEST: Token Bucket")
+    print("="*60 + "\n")
+    
+    scheduler = LLMScheduler(rpm=0, tpm=600)     # 10 tokens per second
+    
+    ticket = scheduler.acquire(MODEL, 600)
+    assert ticket['waited_s'] < 0.05
+    
+    # Used far less than estimated: the difference is given back
+    scheduler.settle(ticket, 100)
+    assert scheduler.acquire(MODEL, 400)['waited_s'] < 0.05
+    print("✅ Over-estimate returned to the bucket")
+    
+    # The bucket is now nearly empty: 5 tokens take ~0.5s to refill
+    started = time.perf_counter()
+    scheduler.acquire(MODEL, 105)
+    waited = time.perf_counter() - started
+    assert 0.3 < waited < 1.5, waited
+    print(f"✅ Throttled for {waited:.2f}s")
+    
+    print("\n✅ Token bucket test PASSED\n")
+    return True
+
+
+def test_priority_order():
+    """Test that interactive calls leave the queue before batch calls"""
+    print("\n" + "="*60)
+    print("TEST: Priority Order")
+    print("="*60 + "\n")
+    
+    scheduler = LLMScheduler(rpm=0, tpm=0)
+    scheduler.pause(MODEL, 0.3)
+    order = []
+    
+    def worker(name, priority):
+        scheduler.acquire(MODEL, 10, priority)
+        order.append(name)
+    
+    threads = []
+    for name, priority in [('batch-1', 'batch'), ('batch-2', 'batch'), ('normal', 'normal'), ('interactive', 'interactive')]:
+        thread = threading.Thread(target=worker, args=(name, priority))
+        thread.start()
+        threads.append(thread)
+        time.sleep(0.02)
+    
+    assert scheduler.pressure()['queue_by_priority'] == {'interactive': 1, 'normal': 1, 'batch': 2}
+    for thread in threads:
+        thread.join()
+    
+    assert order == ['interactive', 'normal', 'batch-1', 'batch-2'], order
+    print(f"✅ Dispatch order: {order}")
+    
+    with llm_priority('batch'):
+        assert scheduler.priority_for('discovery.extract') == 'batch'
+    assert scheduler.priority_for('discovery.extract') == 'interactive'
+    assert scheduler.priority_for('masterplan.generate') == 'normal'
+    print("✅ Call defaults and llm_priority() override")
+    
+    print("\n✅ Priority test PASSED\n")
+    return True
+
+
+def test_backpressure():
+    """Test saturation signal and refusal of non-interactive calls when full"""
+    print("\n" + "="*60)
+    print("TEST: Backpressure")
+    print("="*60 + "\n")
+    
+    scheduler = LLMScheduler(rpm=0, tpm=0, max_queue=2)
+    scheduler.pause(MODEL, 0.3)
+    
+    threads = [threading.Thread(target=scheduler.acquire, args=(MODEL, 10, 'batch')) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    
+    pressure = scheduler.pressure()
+    assert pressure['saturated'] and pressure['queue_depth'] == 2
+    print(f"✅ Pressure: {pressure}")
+    
+    try:
+        scheduler.acquire(MODEL, 10, 'batch')
+        assert False, "expected SchedulerBusy"
+    except SchedulerBusy:
+        print("✅ Batch call refused while the queue is full")
+    
+    # Interactive calls still queue, and async waiters don't block the loop
+    assert asyncio.run(scheduler.aacquire(MODEL, 10, 'interactive'))['priority'] == 'interactive'
+    for thread in threads:
+        thread.join()
+    
+    stats = scheduler.get_stats()
+    assert stats['rejected'] == 1 and stats['dispatched'] == 3 and stats['queue_depth'] == 0
+    print(f"✅ Stats: {stats}")
+    
+    print("\n✅ Backpressure test PASSED\n")
+    return True
+
+
+def test_busy_reaches_callers():
+    """Test that a full queue is reported to callers instead of answered with a fallback"""
+    print("\n" + "="*60)
+    print("TEST: SchedulerBusy Reaches Callers")
+    print("="*60 + "\n")
+    
+    server = StandinServer(port=0, fixtures_dir=tempfile.mkdtemp())
+    base_url = server.start()
+    
+    def client(refusals: int) -> LLMClient:
+        return LLMClient(api_key="standin", base_url=base_url, cache=False, scheduler=RefusingScheduler(refusals))
+    
+    llm = client(1)
+    try:
+        agent = OPTAgent(llm=llm, speculative_masterplans=0, pipeline_mode=False, output_dir=tempfile.mkdtemp())
+        state = agent.memory.get_state()
+        state['chosen_task'] = {'name': 'Order entry', 'description': 'Type orders into Excel'}
+        agent.memory.transition_phase('masterplan')
+        try:
+            agent.masterplan.generate_masterplan(state['chosen_task'], state)
+            assert False, "expected SchedulerBusy"
+        except SchedulerBusy:
+            pass
+        print("✅ Tool raised SchedulerBusy instead of a fallback masterplan")
+        
+        # An interactive turn says so and stays in its phase
+        llm.scheduler.refusals = 1
+        assert "lot of requests" in agent.chat("Go ahead")
+        assert agent.memory.get_phase() == 'masterplan' and not agent.memory.get_state().get('masterplan')
+        assert "lot of requests" not in agent.chat("Go ahead") and agent.memory.get_phase() == 'code'
+        print("✅ Busy turn kept its phase, the next message generated the masterplan")
+    finally:
+        llm.close()
+    
+    # Batch profiles are requeued, then failed once the queue stays full
+    for refusals, status, attempts in ((2, 'ok', 3), (10, 'failed', 4)):
+        llm = client(refusals)
+        try:
+            runner = BatchRunner(workers=1, output_root=tempfile.mkdtemp(), llm=llm, busy_retries=3)
+            result = runner.run([PROFILE])['results'][0]
+            assert (result['status'], result['attempts']) == (status, attempts), result
+        finally:
+            llm.close()
+    assert "LLM queue full" in result['error']
+    print("✅ Batch profile requeued while the queue was full, failed when it stayed full")
+    
+    server.stop()
+    print("\n✅ SchedulerBusy test PASSED\n")
+    return True
+
+
+if __name__ == "__main__":
+    print("\n🧪 RUNNING LLM SCHEDULER TESTS\n")
+    
+    try:
+        test_token_bucket()
+        test_priority_order()
+        test_backpressure()
+        test_busy_reaches_callers()
+        
+        print("="*60)
+        print("🎉 ALL LLM SCHEDULER TESTS PASSED!")
+        print("="*60 + "\n")
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {str(e)}\n")
+        sys.exit(1)
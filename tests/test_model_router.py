@@ -0,0 +1,94 @@
+"""
+Test Model Router
+"""
+
+import sys
+import os
+import json
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.standin_server import StandinServer
+from tools.llm_client import LLMClient
+from tools.model_router import ModelRouter, SMALL_MODEL, LARGE_MODEL
+from tools.discovery_tool import DiscoveryTool
+
+
+def test_routes_and_overrides():
+    """Test default routes and JSON overrides"""
+    print("\n" + "="*60)
+    print("TEST: Routes and Overrides")
+    print("="*60 + "\n")
+    
+    router = ModelRouter()
+    options = router.options('discovery.extract')
+    assert options['model'] == SMALL_MODEL
+    assert options['fallback_models'] == [LARGE_MODEL]
+    assert router.options('masterplan.generate')['model'] == LARGE_MODEL
+    assert router.options('unknown.call')['model'] == LARGE_MODEL
+    print("✅ Extraction routed to the small model, generation to the large one")
+    
+    config_path = os.path.join(tempfile.mkdtemp(), 'routes.json')
+    with open(config_path, 'w') as f:
+        json.dump({'discovery.extract': {'models': LARGE_MODEL, 'temperature': 0.1}}, f)
+    router = ModelRouter(config_path=config_path)
+    options = router.options('discovery.extract')
+    assert options['model'] == LARGE_MODEL and options['fallback_models'] == []
+    assert options['temperature'] == 0.1 and options['max_tokens'] == 600
+    print("✅ Override file merged over the defaults")
+    
+    # Tools take their options from the route
+    tool = DiscoveryTool(llm=object(), router=router)
+    assert tool._completion_options(True)['model'] == LARGE_MODEL
+    print("✅ Tool options follow the route")
+    
+    print("\n✅ Routes test PASSED\n")
+    return True
+
+
+def test_fallback_on_rate_limit():
+    """Test that a rate-limited model falls back and then cools down"""
+    print("\n" + "="*60)
+    print("TEST: Fallback on Rate Limit")
+    print("="*60 + "\n")
+    
+    server = StandinServer(port=0, fixtures_dir=tempfile.mkdtemp(), rate_limited_models=[SMALL_MODEL])
+    router = ModelRouter()
+    client = LLMClient(api_key="standin", base_url=server.start(), cache=False, router=router)
+    
+    try:
+        options = router.options('discovery.extract')
+        text = client.complete("Extract the business type", **options)
+        assert text
+        record = client.metrics.records[-1]
+        assert record['model'] == LARGE_MODEL and record['fallbacks'] == 1
+        print(f"✅ Answered by {record['model']} after a 429")
+        
+        # The rate-limited model is skipped while it cools down
+        chunks = list(client.stream("Extract the business type", **options))
+        assert chunks
+        assert server.state.stats['rate_limited'] == 1
+        assert router.get_stats()['skipped_cooling'] == 1
+        assert SMALL_MODEL in router.get_stats()['cooling']
+        print(f"✅ Routing stats: {router.get_stats()}")
+    finally:
+        client.close()
+        server.stop()
+    
+    print("\n✅ Fallback test PASSED\n")
+    return True
+
+
+if __name__ == "__main__":
+    print("\n🧪 RUNNING MODEL ROUTER TESTS\n")
+    
+    try:
+        test_routes_and_overrides()
+        test_fallback_on_rate_limit()
+        
+        print("="*60)
+        print("🎉 ALL MODEL ROUTER TESTS PASSED!")
+        print("="*60 + "\n")
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {str(e)}\n")
+        sys.exit(1)
@@ -0,0 +1,97 @@
+"""
+Test Response Cache
+"""
+
+import sys
+import os
+import time
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.response_cache import ResponseCache
+
+
+def test_cache_hit_and_miss():
+    """Test that identical requests hit and different ones miss"""
+    print("\n" + "="*60)
+    print("TEST: Cache Hit and Miss")
+    print("="*60 + "\n")
+
+    cache = ResponseCache(cache_dir=tempfile.mkdtemp())
+    key = ResponseCache.make_key("model-a", "Hello", 0.3, None, "1")
+
+    assert cache.get(key) is None
+    cache.set(key, "Hi there")
+    assert cache.get(key) == "Hi there"
+
+    # Any parameter change is a different address
+    assert key != ResponseCache.make_key("model-a", "Hello", 0.7, None, "1")
+    assert key != ResponseCache.make_key("model-a", "Hello", 0.3, None, "2")
+
+    stats = cache.get_stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 1
+    print(f"✅ Stats: {stats}")
+
+    print("\n✅ Cache hit/miss test PASSED\n")
+    return True
+
+
+def test_disk_tier_survives_restart():
+    """Test that entries are served from disk by a fresh cache"""
+    print("\n" + "="*60)
+    print("TEST: Disk Tier")
+    print("="*60 + "\n")
+
+    cache_dir = tempfile.mkdtemp()
+    key = ResponseCache.make_key("model-a", "Bakery", 0.3, None, "1")
+    ResponseCache(cache_dir=cache_dir).set(key, "Inventory")
+
+    fresh = ResponseCache(cache_dir=cache_dir)
+    assert fresh.get(key) == "Inventory"
+    assert fresh.get_stats()['disk_hits'] == 1
+    print("✅ Entry served from disk")
+
+    print("\n✅ Disk tier test PASSED\n")
+    return True
+
+
+def test_ttl_and_size_eviction():
+    """Test that expired entries miss and disk size stays bounded"""
+    print("\n" + "="*60)
+    print("TEST: TTL and Size Eviction")
+    print("="*60 + "\n")
+
+    cache = ResponseCache(cache_dir=tempfile.mkdtemp(), ttl=0.05)
+    key = ResponseCache.make_key("model-a", "Old", 0.3, None, "1")
+    cache.set(key, "stale")
+    time.sleep(0.1)
+    assert cache.get(key) is None
+    print("✅ Expired entry was not served")
+
+    cache = ResponseCache(cache_dir=tempfile.mkdtemp(), max_bytes=600)
+    for i in range(10):
+        cache.set(ResponseCache.make_key("model-a", f"prompt {i}", 0.3, None, "1"), "x" * 100)
+    stats = cache.get_stats()
+    assert stats['disk_bytes'] <= 600
+    assert stats['evictions'] > 0
+    print(f"✅ Disk bytes bounded: {stats['disk_bytes']} (evicted {stats['evictions']})")
+
+    print("\n✅ TTL and eviction test PASSED\n")
+    return True
+
+
+if __name__ == "__main__":
+    print("\n🧪 RUNNING RESPONSE CACHE TESTS\n")
+
+    try:
+        test_cache_hit_and_miss()
+        test_disk_tier_survives_restart()
+        test_ttl_and_size_eviction()
+
+        print("="*60)
+        print("🎉 ALL RESPONSE CACHE TESTS PASSED!")
+        print("="*60 + "\n")
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {str(e)}\n")
+        sys.exit(1)
@@ -0,0 +1,186 @@
+"""
+Test Retry Policy and Hedging
+"""
+
+import sys
+import os
+import time
+import asyncio
+import tempfile
+import threading
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from groq import InternalServerError, BadRequestError
+from bench.standin_server import StandinServer
+from tools.llm_client import LLMClient
+from tools.llm_scheduler import LLMScheduler
+from tools.retry_policy import RetryPolicy
+
+
+class TicketScheduler(LLMScheduler):
+    """Scheduler that remembers which tickets were issued and which settled"""
+
+    def __init__(self):
+        super().__init__()
+        self.issued = []
+        self.settled = []
+
+    def acquire(self, model: str, tokens: int, priority: str = 'normal') -> dict:
+        ticket = super().acquire(model, tokens, priority)
+        self.issued.append(ticket)
+        return ticket
+
+    async def aacquire(self, model: str, tokens: int, priority: str = 'normal') -> dict:
+        ticket = await super().aacquire(model, tokens, priority)
+        self.issued.append(ticket)
+        return ticket
+
+    def settle(self, ticket: dict, actual_tokens: int = None):
+        self.settled.append(ticket)
+        super().settle(ticket, actual_tokens)
+
+
+def test_backoff():
+    """Test jittered backoff bounds and which errors are retried"""
+    print("\n" + "="*60)
+    print("TEST: Backoff and Retryable Errors")
+    print("="*60 + "\n")
+    
+    policy = RetryPolicy(max_attempts=4, backoff_base=0.5, backoff_max=2.0)
+    for attempt, ceiling in ((1, 0.5), (2, 1.0), (3, 2.0), (6, 2.0)):
+        delays = [policy.delay(attempt) for _ in range(50)]
+        assert all(0 <= d <= ceiling for d in delays)
+    assert policy.delay(1, retry_after=3.0) == 3.0
+    print("✅ Delays stay under the doubling ceiling and respect Retry-After")
+    
+    server_error = InternalServerError.__new__(InternalServerError)
+    bad_request = BadRequestError.__new__(BadRequestError)
+    assert policy.should_retry(server_error, 1)
+    assert not policy.should_retry(server_error, 4)
+    assert not policy.should_retry(bad_request, 1)
+    print("✅ Server errors retried until max_attempts, bad requests never")
+    
+    print("\n✅ Backoff test PASSED\n")
+    return True
+
+
+def test_retry_on_server_error():
+    """Test that a 503 is retried instead of failing the call"""
+    print("\n" + "="*60)
+    print("TEST: Retry on Server Error")
+    print("="*60 + "\n")
+    
+    server = StandinServer(port=0, fixtures_dir=tempfile.mkdtemp(), fail_every=2)
+    client = LLMClient(api_key="standin", base_url=server.start(), cache=False)
+    policy = RetryPolicy(max_attempts=3, backoff_base=0.05)
+    
+    try:
+        assert client.complete("first", retry_policy=policy, call_name='test.retry')
+        assert client.complete("second", retry_policy=policy, call_name='test.retry')
+        record = client.metrics.records[-1]
+        assert record['retries'] == 1 and record['error'] is None
+        assert server.state.stats['failed'] == 1
+        print("✅ Second call succeeded after one retry")
+        
+        single = RetryPolicy(max_attempts=1)
+        try:
+            client.complete("fourth", retry_policy=single, call_name='test.retry')
+            assert False, "expected InternalServerError"
+        except InternalServerError:
+            print("✅ max_attempts=1 surfaces the error")
+    finally:
+        client.close()
+        server.stop()
+    
+    print("\n✅ Retry test PASSED\n")
+    return True
+
+
+def test_hedging():
+    """Test that a call slower than p95 is hedged and the fast duplicate wins"""
+    print("\n" + "="*60)
+    print("TEST: Hedged Requests")
+    print("="*60 + "\n")
+    
+    server = StandinServer(port=0, fixtures_dir=tempfile.mkdtemp(), slow_latency=2.0)
+    scheduler = TicketScheduler()
+    client = LLMClient(api_key="standin", base_url=server.start(), cache=False, scheduler=scheduler)
+    policy = RetryPolicy(hedge=True, hedge_min_samples=5)
+    # Latency samples for the hedge delay, without hedges of their own
+    unhedged = RetryPolicy()
+    
+    def stall_next():
+        """Make the server stall the next request only, not the hedge that follows it"""
+        server.state.slow_every = server.state.stats['requests'] + 1
+    
+    def check_stalled(elapsed):
+        """Check that the stalled call was answered by its hedge"""
+        server.state.slow_every = 0
+        record = client.metrics.records[-1]
+        assert record['hedged'] and record['hedge_won'], record
+        assert elapsed < 1.0, elapsed
+    
+    try:
+        for i in range(policy.hedge_min_samples):
+            client.complete(f"prompt {i}", retry_policy=unhedged, call_name='test.hedge')
+        stall_next()
+        started = time.perf_counter()
+        client.complete("stalled prompt", retry_policy=policy, call_name='test.hedge')
+        check_stalled(time.perf_counter() - started)
+        assert server.state.stats['slowed'] == 1
+        print(f"✅ Stalled call answered by its hedge in {client.metrics.records[-1]['wall_time_s']:.2f}s")
+        
+        # Async, all in one event loop: the losing request is cancelled
+        async def probe():
+            for i in range(3):
+                await client.acomplete(f"async prompt {i}", retry_policy=unhedged, call_name='test.hedge')
+            stall_next()
+            started = time.perf_counter()
+            await client.acomplete("async stalled prompt", retry_policy=policy, call_name='test.hedge')
+            return time.perf_counter() - started
+        
+        check_stalled(asyncio.run(probe()))
+        assert server.state.stats['slowed'] == 2
+        print(f"✅ Async stalled call answered in {client.metrics.records[-1]['wall_time_s']:.2f}s")
+        
+        wins = client.metrics.snapshot()['by_call']['test.hedge']['hedge_wins']
+        assert wins == 2, wins
+        print(f"✅ Hedges won: {wins}")
+        
+        # Losing attempts give their scheduler tickets back once they finish
+        time.sleep(2.5)
+        assert len(scheduler.issued) > len(client.metrics.records)
+        assert all(any(t is ticket for t in scheduler.settled) for ticket in scheduler.issued)
+        print(f"✅ All {len(scheduler.issued)} tickets settled, losers included")
+        
+        # Time spent waiting for a background thread does not trigger a hedge
+        hedged = client.metrics.snapshot()['by_call']['test.hedge']['hedged']
+        release = threading.Event()
+        for _ in range(client.pool_size):
+            client._background().submit(release.wait)
+        threading.Timer(1.0, release.set).start()
+        client.complete("queued behind background work", retry_policy=policy, call_name='test.hedge')
+        assert client.metrics.snapshot()['by_call']['test.hedge']['hedged'] == hedged
+        print("✅ Hedge delay starts when the attempt starts")
+    finally:
+        client.close()
+        server.stop()
+    
+    print("\n✅ Hedging test PASSED\n")
+    return True
+
+
+if __name__ == "__main__":
+    print("\n🧪 RUNNING RETRY POLICY TESTS\n")
+    
+    try:
+        test_backoff()
+        test_retry_on_server_error()
+        test_hedging()
+        
+        print("="*60)
+        print("🎉 ALL RETRY POLICY TESTS PASSED!")
+        print("="*60 + "\n")
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {str(e)}\n")
+        sys.exit(1)
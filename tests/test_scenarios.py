@@ -12,6 +12,65 @@ from agent.core import OPTAgent
 import json
 
 
+# Scripted conversations: (user message, OPT field it answers)
+BAKERY_CONVERSATION = [
+    ("Hello", "start"),
+    ("I run a small bakery", "business_type"),
+    ("Just 2 people - me and my assistant", "business_size"),
+    ("We use Excel and Gmail", "tools"),
+    ("Manually tracking inventory every single day", "pain_points"),
+    ("Inventory tracking process", "process_name"),
+    ("Walk around, count ingredients, write on paper, update Excel", "process_desc"),
+    ("Daily", "frequency"),
+    ("30-45 minutes", "time_spent"),
+    ("Emailing suppliers when running low on stock", "task_name"),
+    ("Check Excel, see what's low, manually email each supplier", "task_desc"),
+    ("Excel file with inventory counts", "inputs"),
+    ("Email to supplier with order details", "outputs"),
+    ("1", "choice"),  # Choose first automation
+]
+
+ECOMMERCE_CONVERSATION = [
+    ("Hello", "start"),
+    ("I run an online clothing store", "business_type"),
+    ("5 people on my team", "business_size"),
+    ("Shopify, Gmail, and spreadsheets", "tools"),
+    ("Processing orders manually takes forever", "pain_points"),
+    ("Order fulfillment", "process_name"),
+    ("Check orders, update inventory, send confirmation emails", "process_desc"),
+    ("Multiple times per day", "frequency"),
+    ("About 2 hours total per day", "time_spent"),
+    ("Sending order confirmation emails", "task_name"),
+    ("Copy order details and paste into email template", "task_desc"),
+    ("Order data from Shopify", "inputs"),
+    ("Confirmation email to customer", "outputs"),
+    ("1", "choice"),
+]
+
+FREELANCER_CONVERSATION = [
+    ("Hello", "start"),
+    ("I'm a freelance marketing consultant", "business_type"),
+    ("Solo - just me", "business_size"),
+    ("Google Docs, email, and manual tracking", "tools"),
+    ("Creating and sending invoices takes way too long", "pain_points"),
+    ("Client invoicing", "process_name"),
+    ("Track hours, calculate total, create invoice, email to client", "process_desc"),
+    ("Monthly for each client", "frequency"),
+    ("1-2 hours per month", "time_spent"),
+    ("Creating the invoice document", "task_name"),
+    ("Fill in template with hours, rates, client info", "task_desc"),
+    ("Time tracking spreadsheet", "inputs"),
+    ("PDF invoice", "outputs"),
+    ("1", "choice"),
+]
+
+SCENARIOS = {
+    "Small Bakery": BAKERY_CONVERSATION,
+    "E-commerce Store": ECOMMERCE_CONVERSATION,
+    "Freelance Consultant": FREELANCER_CONVERSATION,
+}
+
+
 class TestScenarios:
     def __init__(self):
         """Initialize test runner"""
@@ -28,23 +87,7 @@ class TestScenarios:
         
         agent = OPTAgent()
         
-        # Conversation sequence
-        conversation = [
-            ("Hello", "start"),
-            ("I run a small bakery", "business_type"),
-            ("Just 2 people - me and my assistant", "business_size"),
-            ("We use Excel and Gmail", "tools"),
-            ("Manually tracking inventory every single day", "pain_points"),
-            ("Inventory tracking process", "process_name"),
-            ("Walk around, count ingredients, write on paper, update Excel", "process_desc"),
-            ("Daily", "frequency"),
-            ("30-45 minutes", "time_spent"),
-            ("Emailing suppliers when running low on stock", "task_name"),
-            ("Check Excel, see what's low, manually email each supplier", "task_desc"),
-            ("Excel file with inventory counts", "inputs"),
-            ("Email to supplier with order details", "outputs"),
-            ("1", "choice"),  # Choose first automation
-        ]
+        conversation = BAKERY_CONVERSATION
         
         try:
             for i, (user_msg, stage) in enumerate(conversation, 1):
@@ -88,22 +131,7 @@ class TestScenarios:
         
         agent = OPTAgent()
         
-        conversation = [
-            ("Hello", "start"),
-            ("I run an online clothing store", "business_type"),
-            ("5 people on my team", "business_size"),
-            ("Shopify, Gmail, and spreadsheets", "tools"),
-            ("Processing orders manually takes forever", "pain_points"),
-            ("Order fulfillment", "process_name"),
-            ("Check orders, update inventory, send confirmation emails", "process_desc"),
-            ("Multiple times per day", "frequency"),
-            ("About 2 hours total per day", "time_spent"),
-            ("Sending order confirmation emails", "task_name"),
-            ("Copy order details and paste into email template", "task_desc"),
-            ("Order data from Shopify", "inputs"),
-            ("Confirmation email to customer", "outputs"),
-            ("1", "choice"),
-        ]
+        conversation = ECOMMERCE_CONVERSATION
         
         try:
             for i, (user_msg, stage) in enumerate(conversation, 1):
@@ -146,22 +174,7 @@ class TestScenarios:
         
         agent = OPTAgent()
         
-        conversation = [
-            ("Hello", "start"),
-            ("I'm a freelance marketing consultant", "business_type"),
-            ("Solo - just me", "business_size"),
-            ("Google Docs, email, and manual tracking", "tools"),
-            ("Creating and sending invoices takes way too long", "pain_points"),
-            ("Client invoicing", "process_name"),
-            ("Track hours, calculate total, create invoice, email to client", "process_desc"),
-            ("Monthly for each client", "frequency"),
-            ("1-2 hours per month", "time_spent"),
-            ("Creating the invoice document", "task_name"),
-            ("Fill in template with hours, rates, client info", "task_desc"),
-            ("Time tracking spreadsheet", "inputs"),
-            ("PDF invoice", "outputs"),
-            ("1", "choice"),
-        ]
+        conversation = FREELANCER_CONVERSATION
         
         try:
             for i, (user_msg, stage) in enumerate(conversation, 1):
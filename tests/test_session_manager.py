@@ -0,0 +1,143 @@
+"""
+Test the session manager's hot set, eviction and rehydration
+"""
+
+import sys
+import os
+import time
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent.sessions import SessionManager
+from bench.standin_server import StandinServer
+from memory.session_store import SessionStore
+from tools.llm_client import LLMClient
+
+
+def _manager(llm, store, workdir, **options) -> SessionManager:
+    return SessionManager(llm=llm, session_store=store, output_root=workdir,
+                          speculative_masterplans=0, pipeline_mode=False, **options)
+
+
+def test_lru_eviction():
+    """Test that the hot set stays bounded and evicted sessions come back"""
+    print("\n" + "="*60)
+    print("TEST: LRU Eviction and Rehydration")
+    print("="*60 + "\n")
+    
+    workdir = tempfile.mkdtemp()
+    server = StandinServer(port=0, fixtures_dir=tempfile.mkdtemp())
+    llm = LLMClient(api_key="standin", base_url=server.start(), cache=False)
+    store = SessionStore(os.path.join(workdir, "sessions.db"))
+    
+    try:
+        manager = _manager(llm, store, workdir, max_sessions=2, idle_timeout=0)
+        sessions = [manager.create() for _ in range(3)]
+        assert len(manager) == 2 and sessions[0] not in manager
+        for session_id in sessions[1:]:
+            manager.chat(session_id, "Hello")
+        assert manager.get_stats()['evicted_lru'] == 1
+        print("✅ Hot set holds 2 sessions, the least recently used was evicted")
+        
+        # Tools and LLM client are shared, memory is not
+        first, second = (manager.get(session_id) for session_id in sessions[1:])
+        assert first.masterplan is second.masterplan and first.llm is second.llm is llm
+        assert first.memory is not second.memory
+        print("✅ Agents share one set of tools")
+        
+        # Next message for an evicted session rehydrates it from the store
+        manager.chat(sessions[1], "I run a small bakery")
+        assert manager.chat(sessions[0], "Hello") and sessions[2] not in manager
+        manager.chat(sessions[2], "I run a bakery too")
+        agent = manager.get(sessions[2])
+        assert manager.get_stats()['rehydrated'] == 2 and len(manager) == 2
+        assert [m['content'] for m in agent.memory.get_state()['messages']][::2] == ["Hello", "I run a bakery too"]
+        print("✅ Evicted session rehydrated with its messages")
+        
+        # One session's disk I/O does not hold up another session's turn
+        with manager._slots[sessions[0]].lock:
+            assert manager.chat(sessions[2], "Just me")
+        print("✅ Turns run while another session is loading or saving")
+        
+        # get() keeps the hot set bounded too
+        manager.get(sessions[1])
+        assert len(manager) == 2 and sessions[0] not in manager
+        
+        for bad in ("no-such-session", "../outside", os.path.join(workdir, "sessions.db")):
+            try:
+                manager.chat(bad, "Hello")
+                assert False, f"expected ValueError for {bad}"
+            except ValueError:
+                pass
+        assert not os.path.exists(os.path.join(workdir, "no-such-session"))
+        print("✅ Unknown and unsafe session ids rejected")
+        
+        # A stored id cannot be created again (its next save would collide)
+        for taken in (sessions[0], sessions[1]):
+            try:
+                manager.create(taken)
+                assert False, f"expected ValueError for {taken}"
+            except ValueError:
+                pass
+        assert manager.chat(sessions[0], "Every day")
+        print("✅ Creating an existing session rejected, it continues through chat()")
+        
+        manager.close()
+        assert len(manager) == 0 and store.load_state(sessions[1])['messages'][-1]['role'] == 'agent'
+        print("✅ close() saves every session")
+    finally:
+        llm.close()
+        server.stop()
+        store.close()
+    
+    print("\n✅ LRU eviction test PASSED\n")
+    return True
+
+
+def test_idle_and_memory_eviction():
+    """Test eviction after the idle timeout and under memory pressure"""
+    print("\n" + "="*60)
+    print("TEST: Idle and Memory Pressure Eviction")
+    print("="*60 + "\n")
+    
+    workdir = tempfile.mkdtemp()
+    store = SessionStore(os.path.join(workdir, "sessions.db"))
+    llm = LLMClient(api_key="standin", base_url="http://127.0.0.1:9", cache=False)
+    
+    try:
+        manager = _manager(llm, store, workdir, max_sessions=10, idle_timeout=60)
+        sessions = [manager.create() for _ in range(4)]
+        assert manager.evict_idle() == 0
+        assert manager.evict_idle(now=time.monotonic() + 61) == 4 and len(manager) == 0
+        assert all(store.load_state(session_id) is not None for session_id in sessions)
+        print("✅ Idle sessions saved and evicted after the timeout")
+        
+        # A budget below what the process already uses evicts on every turn
+        manager = _manager(llm, store, workdir, max_sessions=10, idle_timeout=0, max_memory_mb=1)
+        if manager.get_stats()['resident_mb'] is None:
+            print("⚠️ Resident memory not available here, skipping memory pressure check")
+        else:
+            sessions = [manager.create() for _ in range(8)]
+            assert manager.get_stats()['evicted_memory'] >= 7 and len(manager) <= 1
+            print(f"✅ {manager.get_stats()['evicted_memory']} sessions evicted under memory pressure")
+    finally:
+        llm.close()
+        store.close()
+    
+    print("\n✅ Idle and memory eviction test PASSED\n")
+    return True
+
+
+if __name__ == "__main__":
+    print("\n🧪 RUNNING SESSION MANAGER TESTS\n")
+    
+    try:
+        test_lru_eviction()
+        test_idle_and_memory_eviction()
+        
+        print("="*60)
+        print("🎉 ALL SESSION MANAGER TESTS PASSED!")
+        print("="*60 + "\n")
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {str(e)}\n")
+        sys.exit(1)
@@ -0,0 +1,113 @@
+"""
+Test the slotted session models behind ConversationMemory
+"""
+
+import sys
+import os
+import json
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.session_memory import session_footprint
+from memory.conversation_memory import ConversationMemory
+from memory.models import MessageLog, OperatingModel, Role, SessionState, Suggestion
+
+
+def test_dict_compatibility():
+    """Test that the state still reads and writes like the nested dict it replaced"""
+    print("\n" + "="*60)
+    print("TEST: Dict Compatibility")
+    print("="*60 + "\n")
+    
+    memory = ConversationMemory()
+    memory.add_message('user', 'I run a small bakery')
+    memory.add_message(Role.AGENT, 'What tools do you use?')
+    memory.update_operating_model('business_type', 'Bakery')
+    state = memory.get_state()
+    
+    assert isinstance(state['operating_model'], OperatingModel)
+    assert state['operating_model'].get('business_type') == 'Bakery'
+    assert state['process']['completed'] is False and state['task']['name'] is None
+    assert state['messages'][-1]['content'] == 'What tools do you use?'
+    assert state['messages'][0]['role'] == 'user' and state['messages'][0].role is Role.USER
+    assert len(state['messages']) == 2 and state.get('masterplan') is None
+    print("✅ Sections, messages and outputs read as before")
+    
+    # Plain values assigned by the agent become records
+    state['suggestions'] = [{'rank': 1, 'name': 'Low Stock Alerts', 'roi': 'high'}]
+    state['chosen_task'] = state['suggestions'][0]
+    state['code'] = {'filename': 'alerts.py', 'code': "print('hi')", 'requirements': []}
+    state['process']['description'] = 'Count stock daily'
+    chosen = state['chosen_task']
+    assert isinstance(chosen, Suggestion) and chosen['roi'] == 'high' and 'time_saved' not in chosen
+    assert chosen == {'rank': 1, 'name': 'Low Stock Alerts', 'roi': 'high'}
+    print("✅ Assigned dicts converted, unknown keys kept")
+    
+    # to_dict() is the old layout, and compares equal to the live state
+    plain = memory.to_dict()
+    assert list(plain) == list(SessionState.FIELDS)
+    assert plain['messages'] == [{'role': 'user', 'content': 'I run a small bakery'},
+                                 {'role': 'agent', 'content': 'What tools do you use?'}]
+    assert json.loads(json.dumps(plain)) == state
+    print("✅ to_dict() round-trips through JSON and equals the state")
+    
+    print("\n✅ Dict compatibility test PASSED\n")
+    return True
+
+
+def test_restore_and_sync():
+    """Test restore() and pending_changes() on the slotted state"""
+    print("\n" + "="*60)
+    print("TEST: Restore and Pending Changes")
+    print("="*60 + "\n")
+    
+    first = ConversationMemory()
+    first.add_message('user', 'Hello')
+    first.update_task('name', 'Email suppliers')
+    first.get_state()['chosen_task'] = {'rank': 2, 'name': 'Reorder'}
+    
+    second = ConversationMemory()
+    second.restore(json.loads(json.dumps(first.to_dict())), session_id=first.session_id)
+    assert second.get_state() == first.get_state()
+    assert isinstance(second.get_state()['messages'], MessageLog)
+    assert second.pending_changes() == (1, [], {})
+    print("✅ Restored state equals the original, nothing pending")
+    
+    second.add_message('agent', 'Which supplier?')
+    second.update_task('inputs', 'inventory.csv')
+    first_seq, messages, deltas = second.pending_changes()
+    assert first_seq == 1 and messages == [{'role': 'agent', 'content': 'Which supplier?'}]
+    assert list(deltas) == ['task'] and json.loads(deltas['task'])['inputs'] == 'inventory.csv'
+    print("✅ Only the new message and changed section are pending")
+    
+    print("\n✅ Restore and sync test PASSED\n")
+    return True
+
+
+def test_memory_footprint():
+    """Test that the slotted layout costs far less than nested dicts"""
+    print("\n" + "="*60)
+    print("TEST: Memory per Session")
+    print("="*60 + "\n")
+    
+    result = session_footprint(sessions=300, turns=20)
+    print(f"✅ {result['dict_bytes_per_session']:,} → {result['slotted_bytes_per_session']:,} bytes/session")
+    assert result['reduction'] > 0.5, result
+    
+    print("\n✅ Memory footprint test PASSED\n")
+    return True
+
+
+if __name__ == "__main__":
+    print("\n🧪 RUNNING SESSION MODEL TESTS\n")
+    
+    try:
+        test_dict_compatibility()
+        test_restore_and_sync()
+        test_memory_footprint()
+        
+        print("="*60)
+        print("🎉 ALL SESSION MODEL TESTS PASSED!")
+        print("="*60 + "\n")
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {str(e)}\n")
+        sys.exit(1)
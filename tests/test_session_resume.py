@@ -0,0 +1,136 @@
+"""
+Test resuming saved sessions
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent.core import OPTAgent
+from bench.standin_server import StandinServer
+from memory.session_store import SessionStore
+from tools.llm_client import LLMClient
+
+
+CHOSEN = {'rank': 1, 'name': 'Low Stock Alerts', 'description': 'Email suppliers when stock is low',
+          'time_saved': '3 hours/week', 'money_saved': '$200/month', 'impact': 'High'}
+CODE = {'filename': 'low_stock_alerts.py', 'code': "print('checking stock')\n", 'requirements': []}
+
+
+def _agent(llm, store, output_dir) -> OPTAgent:
+    return OPTAgent(llm=llm, speculative_masterplans=0, pipeline_mode=False,
+                    output_dir=output_dir, session_store=store)
+
+
+def _interrupted_session(agent: OPTAgent):
+    """A session that was stopped after the masterplan and code were generated"""
+    memory = agent.memory
+    memory.add_message('user', 'Hello')
+    memory.add_message('agent', 'What kind of business do you run?')
+    memory.update_operating_model('business_type', 'Bakery')
+    memory.update_task('name', 'Email suppliers')
+    state = memory.get_state()
+    state['suggestions'] = [CHOSEN]
+    state['chosen_task'] = CHOSEN
+    state['masterplan'] = "# Masterplan\n\nCheck stock, then email suppliers."
+    state['code'] = CODE
+    memory.transition_phase('code')
+
+
+def test_resume_from_store():
+    """Test that a resumed session continues without repeating saved LLM calls"""
+    print("\n" + "="*60)
+    print("TEST: Resume From Session Store")
+    print("="*60 + "\n")
+    
+    workdir = tempfile.mkdtemp()
+    server = StandinServer(port=0, fixtures_dir=tempfile.mkdtemp())
+    llm = LLMClient(api_key="standin", base_url=server.start(), cache=False)
+    store = SessionStore(os.path.join(workdir, "sessions.db"))
+    
+    try:
+        first = _agent(llm, store, workdir)
+        _interrupted_session(first)
+        session_id = first.save_session()
+        
+        # A new process picks the session up
+        resumed = _agent(llm, store, workdir)
+        assert resumed.load_session(session_id) == 'code'
+        assert resumed.session_id == session_id
+        assert resumed.memory.get_state() == first.memory.get_state()
+        print("✅ Phase, OPT fields and outputs restored")
+        
+        # The code phase reuses the saved code: no LLM request
+        response = resumed.chat("continue")
+        assert server.state.stats['requests'] == 0
+        assert 'low_stock_alerts.py' in response
+        assert os.path.exists(os.path.join(workdir, 'low_stock_alerts.py'))
+        assert resumed.memory.get_phase() == 'deployment'
+        print("✅ Saved code reused, moved on to deployment without an LLM call")
+        
+        # Only the new turn is appended on the next save
+        before = store.get_stats()['messages_appended']
+        resumed.save_session()
+        assert store.get_stats()['messages_appended'] - before == 2
+        print("✅ Next save appends only the new turn")
+        
+        try:
+            _agent(llm, store, workdir).load_session("no-such-session")
+            assert False, "expected ValueError"
+        except ValueError:
+            print("✅ Unknown session id rejected")
+    finally:
+        llm.close()
+        server.stop()
+        store.close()
+    
+    print("\n✅ Resume from store test PASSED\n")
+    return True
+
+
+def test_resume_from_export():
+    """Test resuming from an exported JSON file"""
+    print("\n" + "="*60)
+    print("TEST: Resume From Exported File")
+    print("="*60 + "\n")
+    
+    workdir = tempfile.mkdtemp()
+    store = SessionStore(os.path.join(workdir, "sessions.db"))
+    llm = LLMClient(api_key="standin", base_url="http://127.0.0.1:9", cache=False)
+    
+    try:
+        first = _agent(llm, store, workdir)
+        _interrupted_session(first)
+        path = first.export_session()
+        
+        resumed = _agent(llm, store, workdir)
+        assert resumed.load_session(path) == 'code'
+        assert resumed.memory.get_state() == first.memory.get_state()
+        
+        # An exported file starts a new session in the store, saved in full
+        assert resumed.session_id != first.session_id
+        resumed.save_session()
+        assert store.load_state(resumed.session_id) == first.memory.get_state()
+        print("✅ Exported session restored and saved under a new id")
+    finally:
+        llm.close()
+        store.close()
+    
+    print("\n✅ Resume from export test PASSED\n")
+    return True
+
+
+if __name__ == "__main__":
+    print("\n🧪 RUNNING SESSION RESUME TESTS\n")
+    
+    try:
+        test_resume_from_store()
+        test_resume_from_export()
+        
+        print("="*60)
+        print("🎉 ALL SESSION RESUME TESTS PASSED!")
+        print("="*60 + "\n")
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {str(e)}\n")
+        sys.exit(1)
@@ -0,0 +1,133 @@
+"""
+Test the append-only SQLite Session Store
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+import threading
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from memory.conversation_memory import ConversationMemory
+from memory.session_store import SessionStore
+
+
+def test_incremental_save():
+    """Test that a save appends only what changed, and a load rebuilds the state"""
+    print("\n" + "="*60)
+    print("TEST: Incremental Save")
+    print("="*60 + "\n")
+    
+    store = SessionStore(os.path.join(tempfile.mkdtemp(), "sessions.db"))
+    memory = ConversationMemory()
+    memory.add_message('user', 'I run a small bakery')
+    memory.add_message('agent', 'What tools do you use?')
+    memory.update_operating_model('business_type', 'Bakery')
+    
+    store.save(memory)
+    first = store.get_stats()
+    assert first['messages_appended'] == 2
+    print(f"✅ First save: {first['messages_appended']} messages, {first['deltas_appended']} state values")
+    
+    # One more turn: only the new message and the changed values are appended
+    memory.add_message('user', 'Excel and email')
+    memory.update_operating_model('tools_used', 'Excel, Email')
+    memory.get_state()['masterplan'] = "# Plan"
+    store.save(memory)
+    second = store.get_stats()
+    assert second['messages_appended'] - first['messages_appended'] == 1
+    assert second['deltas_appended'] - first['deltas_appended'] == 2
+    print("✅ Second save appended 1 message and 2 changed values")
+    
+    # Nothing changed: nothing written
+    store.save(memory)
+    assert store.get_stats()['saves'] == 2
+    
+    loaded = store.load_state(memory.session_id)
+    assert loaded == memory.get_state()
+    assert store.load_state("no-such-session") is None
+    print("✅ Loaded state matches the in-memory state")
+    
+    store.close()
+    print("\n✅ Incremental save test PASSED\n")
+    return True
+
+
+def test_concurrent_sessions():
+    """Test many sessions saving at the same time into one database"""
+    print("\n" + "="*60)
+    print("TEST: Concurrent Sessions")
+    print("="*60 + "\n")
+    
+    store = SessionStore(os.path.join(tempfile.mkdtemp(), "sessions.db"))
+    memories = [ConversationMemory() for _ in range(40)]
+    
+    def converse(memory):
+        for turn in range(10):
+            memory.add_message('user', f"message {turn}")
+            memory.add_message('agent', f"reply {turn}")
+            memory.get_state()['process']['description'] = f"step {turn}"
+            store.save(memory)
+    
+    threads = [threading.Thread(target=converse, args=(memory,)) for memory in memories]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    for memory in memories:
+        assert store.load_state(memory.session_id) == memory.get_state()
+    sessions = store.list_sessions(limit=100)
+    assert len(sessions) == 40 and all(s['message_count'] == 20 for s in sessions)
+    print(f"✅ 40 sessions x 10 turns saved concurrently, {store.get_stats()['saves']} saves")
+    
+    store.close()
+    print("\n✅ Concurrent sessions test PASSED\n")
+    return True
+
+
+def test_compaction():
+    """Test that superseded deltas are compacted away"""
+    print("\n" + "="*60)
+    print("TEST: Delta Compaction")
+    print("="*60 + "\n")
+    
+    db_path = os.path.join(tempfile.mkdtemp(), "sessions.db")
+    store = SessionStore(db_path, compact_every=10)
+    memory = ConversationMemory()
+    store.save(memory)
+    
+    for phase in ['analysis', 'masterplan', 'code', 'deployment', 'done'] * 6:
+        memory.transition_phase(phase)
+        store.save(memory)
+    
+    rows = sqlite3.connect(db_path).execute("SELECT COUNT(*) FROM state_deltas").fetchone()[0]
+    assert 1 <= store.get_stats()['compactions'] <= 4
+    assert rows < 20, rows
+    assert store.load_state(memory.session_id) == memory.get_state()
+    print(f"✅ {store.get_stats()['deltas_appended']} deltas appended, {rows} rows kept")
+    
+    store.delete(memory.session_id)
+    assert store.load_state(memory.session_id) is None
+    print("✅ Deleted session is gone")
+    
+    store.close()
+    print("\n✅ Compaction test PASSED\n")
+    return True
+
+
+if __name__ == "__main__":
+    print("\n🧪 RUNNING SESSION STORE TESTS\n")
+    
+    try:
+        test_incremental_save()
+        test_concurrent_sessions()
+        test_compaction()
+    
+        print("="*60)
+        print("🎉 ALL SESSION STORE TESTS PASSED!")
+        print("="*60 + "\n")
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {str(e)}\n")
+        sys.exit(1)
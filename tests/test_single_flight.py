@@ -0,0 +1,158 @@
+"""
+Test Single-Flight Coalescing of identical LLM requests
+"""
+
+import sys
+import os
+import time
+import asyncio
+import tempfile
+import threading
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.standin_server import StandinServer
+from tools.llm_client import LLMClient
+
+
+def _run_threads(target, count: int, stagger: float = 0.0) -> list:
+    """Run target(i) in `count` threads and return the results in order"""
+    results = [None] * count
+    
+    def worker(i):
+        results[i] = target(i)
+    
+    threads = []
+    for i in range(count):
+        thread = threading.Thread(target=worker, args=(i,))
+        thread.start()
+        threads.append(thread)
+        time.sleep(stagger)
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_coalesced_complete():
+    """Test that identical concurrent completions share one upstream call"""
+    print("\n" + "="*60)
+    print("TEST: Coalesced Completions")
+    print("="*60 + "\n")
+    
+    server = StandinServer(port=0, fixtures_dir=tempfile.mkdtemp(), latency=0.3)
+    client = LLMClient(api_key="standin", base_url=server.start(), cache=False)
+    
+    try:
+        results = _run_threads(lambda i: client.complete("Extract the details of Daily", call_name='test.coalesce'), 8)
+        assert len(set(results)) == 1 and results[0]
+        assert server.state.stats['requests'] == 1, server.state.stats
+        print("✅ 8 identical calls, 1 upstream request")
+    
+        stats = client.get_stats()
+        assert stats['coalescing']['coalesced'] == 7 and stats['coalescing']['in_flight'] == 0
+        assert stats['llm']['coalesced'] == 7 and stats['llm']['calls'] == 8
+        print(f"✅ Counters: {stats['coalescing']}")
+    
+        # Opting out of the cache also opts out of sharing
+        _run_threads(lambda i: client.complete("Extract the details of Daily", use_cache=False), 3)
+        assert server.state.stats['requests'] == 4
+        print("✅ use_cache=False calls are not coalesced")
+    finally:
+        client.close()
+        server.stop()
+    
+    print("\n✅ Coalesced completion test PASSED\n")
+    return True
+
+
+def test_coalesced_stream():
+    """Test that followers replay a shared stream, even after the leader stops reading"""
+    print("\n" + "="*60)
+    print("TEST: Coalesced Streams")
+    print("="*60 + "\n")
+    
+    server = StandinServer(port=0, fixtures_dir=tempfile.mkdtemp(), latency=0.1, tokens_per_sec=400)
+    client = LLMClient(api_key="standin", base_url=server.start(), cache=False)
+    prompt = "Write a deployment guide"
+    
+    def read(i):
+        if i == 0:
+            # The leader stops after the first chunk
+            for chunk in client.stream(prompt, call_name='test.coalesce'):
+                return chunk
+        return ''.join(client.stream(prompt, call_name='test.coalesce'))
+    
+    try:
+        results = _run_threads(read, 4, stagger=0.02)
+        full = client.complete(prompt, use_cache=False)
+        assert results[0] and full.startswith(results[0])
+        assert results[1:] == [full] * 3, [len(r) for r in results]
+        assert server.state.stats['requests'] == 2, server.state.stats
+        print(f"✅ 3 followers got all {len(full)} characters from 1 upstream stream")
+    
+        records = [r for r in client.metrics.records if r['call_name'] == 'test.coalesce']
+        assert sum(1 for r in records if r['coalesced']) == 3
+        assert client.get_stats()['coalescing']['in_flight'] == 0
+        print("✅ Leader's stream finished in the background for the followers")
+    finally:
+        client.close()
+        server.stop()
+    
+    print("\n✅ Coalesced stream test PASSED\n")
+    return True
+
+
+def test_coalesced_async():
+    """Test async coalescing, including a cancelled leader"""
+    print("\n" + "="*60)
+    print("TEST: Coalesced Async Calls")
+    print("="*60 + "\n")
+    
+    server = StandinServer(port=0, fixtures_dir=tempfile.mkdtemp(), latency=0.3)
+    client = LLMClient(api_key="standin", base_url=server.start(), cache=False)
+    prompt = "Suggest automations for a bakery"
+    
+    async def run():
+        leader = asyncio.ensure_future(client.acomplete(prompt, call_name='test.coalesce'))
+        await asyncio.sleep(0.05)
+        followers = [asyncio.ensure_future(client.acomplete(prompt, call_name='test.coalesce')) for _ in range(4)]
+        streamed = asyncio.ensure_future(_collect(client.astream(prompt, call_name='test.coalesce')))
+        await asyncio.sleep(0.05)
+        leader.cancel()
+        results = await asyncio.gather(*followers, streamed)
+        await client.aclose()
+        return leader, results
+    
+    try:
+        leader, results = asyncio.run(run())
+        assert leader.cancelled()
+        assert len(set(results)) == 1 and results[0]
+        assert server.state.stats['requests'] == 1, server.state.stats
+        print("✅ Leader cancelled, 5 followers still answered by its request")
+    
+        assert client.get_stats()['coalescing']['coalesced'] == 5
+        print("✅ A stream shares the flight of identical completions")
+    finally:
+        server.stop()
+    
+    print("\n✅ Coalesced async test PASSED\n")
+    return True
+
+
+async def _collect(chunks) -> str:
+    return ''.join([chunk async for chunk in chunks])
+
+
+if __name__ == "__main__":
+    print("\n🧪 RUNNING SINGLE-FLIGHT TESTS\n")
+    
+    try:
+        test_coalesced_complete()
+        test_coalesced_stream()
+        test_coalesced_async()
+    
+        print("="*60)
+        print("🎉 ALL SINGLE-FLIGHT TESTS PASSED!")
+        print("="*60 + "\n")
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {str(e)}\n")
+        sys.exit(1)
@@ -0,0 +1,95 @@
+"""
+Test Speculative Masterplan Generation
+"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent.speculation import SpeculativeMasterplans
+
+
+class SlowMasterplanTool:
+    """Masterplan tool that streams one word at a time"""
+
+    def stream_masterplan(self, chosen, memory_state, use_cache=True):
+        for word in f"# Plan for {chosen['name']} with several steps".split(' '):
+            time.sleep(0.01)
+            yield word + ' '
+
+
+SUGGESTIONS = [
+    {'rank': 3, 'name': 'Report Generator'},
+    {'rank': 1, 'name': 'Inventory Tracker'},
+    {'rank': 2, 'name': 'Email Reminder'},
+]
+
+
+def test_promote_chosen_plan():
+    """Test that the chosen plan is reused and the others are cancelled"""
+    print("\n" + "="*60)
+    print("TEST: Promote Chosen Plan")
+    print("="*60 + "\n")
+
+    speculation = SpeculativeMasterplans(SlowMasterplanTool(), top_n=2, token_budget=1000)
+    speculation.start(SUGGESTIONS, {})
+
+    # Only the top two by rank are speculated on
+    assert [job.suggestion['name'] for job in speculation.jobs] == ['Inventory Tracker', 'Email Reminder']
+
+    job = speculation.promote(SUGGESTIONS[1])
+    assert job is not None
+    assert speculation.result(job) == "# Plan for Inventory Tracker with several steps"
+    assert speculation.stats['promoted'] == 1
+    print(f"✅ Stats: {speculation.stats}")
+
+    # A suggestion that was not speculated on has no job
+    assert speculation.promote(SUGGESTIONS[0]) is None
+
+    print("\n✅ Promote test PASSED\n")
+    return True
+
+
+def test_token_budget():
+    """Test that unchosen plans stop at the token budget"""
+    print("\n" + "="*60)
+    print("TEST: Token Budget")
+    print("="*60 + "\n")
+
+    speculation = SpeculativeMasterplans(SlowMasterplanTool(), top_n=3, token_budget=4)
+    speculation.start(SUGGESTIONS, {})
+    for job in speculation.jobs:
+        speculation.result(job)
+
+    assert speculation.stats['speculative_tokens'] <= 4
+    assert speculation.stats['over_budget'] > 0
+    print(f"✅ Stats: {speculation.stats}")
+
+    # Tokens are estimated from the text, and each round of suggestions gets the full budget
+    speculation = SpeculativeMasterplans(SlowMasterplanTool(), top_n=1, token_budget=15)
+    for _ in range(2):
+        speculation.start(SUGGESTIONS, {})
+        job = speculation.jobs[0]
+        assert speculation.result(job) == "# Plan for Inventory Tracker with several steps"
+        assert job.status == 'done' and job.tokens == 12
+    assert speculation.stats['speculative_tokens'] == 24 and speculation.stats['over_budget'] == 0
+    print("✅ Budget counts estimated tokens per round")
+
+    print("\n✅ Token budget test PASSED\n")
+    return True
+
+
+if __name__ == "__main__":
+    print("\n🧪 RUNNING SPECULATION TESTS\n")
+
+    try:
+        test_promote_chosen_plan()
+        test_token_budget()
+
+        print("="*60)
+        print("🎉 ALL SPECULATION TESTS PASSED!")
+        print("="*60 + "\n")
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {str(e)}\n")
+        sys.exit(1)
@@ -0,0 +1,95 @@
+"""
+Test Stand-in LLM Server
+"""
+
+import sys
+import os
+import time
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.standin_server import StandinServer, fixture_key
+from tools.llm_client import LLMClient, DEFAULT_MODEL
+
+
+def test_replay_fixture_and_synthesis():
+    """Test that recorded fixtures are replayed and unknown prompts synthesized"""
+    print("\n" + "="*60)
+    print("TEST: Replay and Synthesis")
+    print("="*60 + "\n")
+    
+    server = StandinServer(port=0, fixtures_dir=tempfile.mkdtemp())
+    client = LLMClient(api_key="standin", base_url=server.start())
+    
+    try:
+        # Recorded fixture is served back verbatim
+        request = {
+            'model': DEFAULT_MODEL,
+            'messages': [{"role": "user", "content": "Say hi"}],
+            'temperature': 0.7,
+            'max_tokens': None
+        }
+        server.state.save_fixture(fixture_key(request), request, "Hi from the fixture!", None)
+        assert client.complete("Say hi", use_cache=False) == "Hi from the fixture!"
+        assert ''.join(client.stream("Say hi", use_cache=False)) == "Hi from the fixture!"
+        print("✅ Fixture replayed (plain and streamed)")
+        
+        # Unknown prompts get a deterministic synthetic answer
+        first = client.complete("Write a masterplan", use_cache=False)
+        assert first == client.complete("Write a masterplan", use_cache=False)
+        assert first.startswith("# Synthetic Document")
+        print("✅ Synthetic response is deterministic")
+        
+        assert server.state.stats['replayed'] == 2
+        assert server.state.stats['synthesized'] == 2
+        print(f"✅ Stats: {server.state.stats}")
+    finally:
+        client.close()
+        server.stop()
+    
+    print("\n✅ Replay test PASSED\n")
+    return True
+
+
+def test_synthetic_latency():
+    """Test that latency and token rate shape response timing"""
+    print("\n" + "="*60)
+    print("TEST: Synthetic Latency")
+    print("="*60 + "\n")
+    
+    server = StandinServer(port=0, fixtures_dir=tempfile.mkdtemp(), latency=0.2,
+                           tokens_per_sec=200, synthetic_tokens=40)
+    client = LLMClient(api_key="standin", base_url=server.start())
+    
+    try:
+        started = time.time()
+        chunks = client.stream("Write a deployment guide", use_cache=False)
+        next(chunks)
+        first_token = time.time() - started
+        list(chunks)
+        total = time.time() - started
+        
+        assert first_token >= 0.2
+        assert total >= first_token + 0.1
+        print(f"✅ First token after {first_token:.2f}s, done after {total:.2f}s")
+    finally:
+        client.close()
+        server.stop()
+    
+    print("\n✅ Latency test PASSED\n")
+    return True
+
+
+if __name__ == "__main__":
+    print("\n🧪 RUNNING STAND-IN SERVER TESTS\n")
+    
+    try:
+        test_replay_fixture_and_synthesis()
+        test_synthetic_latency()
+        
+        print("="*60)
+        print("🎉 ALL STAND-IN SERVER TESTS PASSED!")
+        print("="*60 + "\n")
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {str(e)}\n")
+        sys.exit(1)
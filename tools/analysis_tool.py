@@ -5,30 +5,41 @@ Takes OPT discovery data and generates 3 ranked automation suggestions
 """
 
 import os
-import json
-from groq import Groq
-from dotenv import load_dotenv
-
-load_dotenv()
+from tools.llm_client import get_shared_client
+from tools.llm_scheduler import SchedulerBusy
+from tools.model_router import get_shared_router
+from tools.json_parser import parse_json, IncrementalJSONParser
 
 
 class AnalysisTool:
-    def __init__(self):
-        """Initialize the analysis tool with LLM"""
-        self.groq = Groq(api_key=os.getenv("GROQ_API_KEY"))
-        self.model = "llama-3.3-70b-versatile"
+    # Bump when the prompt template changes so cached responses are not reused
+    PROMPT_VERSION = "1"
+    
+    DISPLAY_HEADER = "\n" + "="*60 + "\n" + "🎯 AUTOMATION SUGGESTIONS\n" + "="*60 + "\n\n"
+    DISPLAY_FOOTER = "Which automation would you like me to build for you?\n(Reply with 1, 2, or 3)\n"
+    
+    def __init__(self, llm=None, router=None):
+        """
+        Initialize the analysis tool with LLM
+        
+        Args:
+            llm: Shared LLMClient (defaults to the process-wide client)
+            router: ModelRouter picking the model (defaults to the process-wide router)
+        """
+        self.llm = llm or get_shared_client()
+        self.router = router or get_shared_router()
         
         print("🔬 Analysis Tool initialized")
     
-    def analyze_and_suggest(self, memory_state: dict) -> list:
+    def _build_prompt(self, memory_state: dict) -> str:
         """
-        Analyze the business and suggest 3 automation opportunities
+        Build the analysis prompt from the OPT discovery data
         
         Args:
             memory_state: Complete OPT data from discovery
             
         Returns:
-            List of 3 automation suggestions with scoring
+            Prompt string
         """
         # Extract OPT data
         om = memory_state['operating_model']
@@ -102,49 +113,184 @@ Guidelines:
 - Be realistic about time/money savings
 - Focus on Python-automatable tasks (not requiring complex infrastructure)
 """
-
+        return prompt
+    
+    def _completion_options(self, use_cache: bool) -> dict:
+        """LLM call options shared by the sync and async analysis paths"""
+        # Model, temperature, max_tokens and fallbacks come from the route
+        options = self.router.options('analysis.suggest')
+        options.update({
+            'use_cache': use_cache,
+            'prompt_version': self.PROMPT_VERSION
+        })
+        return options
+    
+    def _parse_response(self, response_text: str) -> list:
+        """Parse the LLM's JSON reply into a list of suggestions"""
+        # Tolerates fences, prose, trailing commas and truncated replies;
+        # a suggestion cut off before its name is dropped
+        result = parse_json(response_text)
+        suggestions = [s for s in result.get('suggestions') or [] if isinstance(s, dict) and s.get('name')]
+        if not suggestions:
+            raise ValueError("reply contained no suggestions")
+        
+        print(f"✅ Generated {len(suggestions)} automation suggestions")
+        return suggestions
+    
+    @staticmethod
+    def _closed_suggestions(value, complete: bool) -> list:
+        """Suggestions whose JSON objects have closed in a partial reply"""
+        if not isinstance(value, dict) or not isinstance(value.get('suggestions'), list):
+            return []
+        suggestions = value['suggestions']
+        # Everything before the last element is closed; the last one is
+        # closed once the whole reply is
+        if not complete:
+            suggestions = suggestions[:-1]
+        return [s for s in suggestions if isinstance(s, dict) and s.get('name')]
+    
+    def _fallback_suggestions(self, memory_state: dict, error: Exception) -> list:
+        """Fallback when the LLM call or parsing fails"""
+        print(f"❌ Analysis error: {str(error)}")
+        import traceback
+        traceback.print_exc()
+        
+        p = memory_state['process']
+        t = memory_state['task']
+        
+        # Fallback: Create basic suggestion from task data
+        return [{
+            "rank": 1,
+            "name": t.get('name', 'Task Automation'),
+            "description": f"Automate: {t.get('description', 'the described task')}",
+            "time_saved": p.get('time_spent', '30 minutes/day'),
+            "money_saved": "$200/month (estimated)",
+            "complexity": "Medium",
+            "impact": "High",
+            "value_score": 75,
+            "implementation": "Python script with automation logic",
+            "why_this_rank": "User's primary request"
+        }]
+    
+    def analyze_and_suggest(self, memory_state: dict, use_cache: bool = True) -> list:
+        """
+        Analyze the business and suggest 3 automation opportunities
+        
+        Args:
+            memory_state: Complete OPT data from discovery
+            use_cache: Allow answering from the response cache
+            
+        Returns:
+            List of 3 automation suggestions with scoring
+        """
+        prompt = self._build_prompt(memory_state)
+        
         try:
-            response = self.groq.chat.completions.create(
-                messages=[{"role": "user", "content": prompt}],
-                model=self.model,
-                temperature=0.7
-            )
+            response_text = self.llm.complete(prompt, **self._completion_options(use_cache))
+            return self._parse_response(response_text)
+        except SchedulerBusy:
+            raise
+        except Exception as e:
+            return self._fallback_suggestions(memory_state, e)
+    
+    async def aanalyze_and_suggest(self, memory_state: dict, use_cache: bool = True) -> list:
+        """
+        Async variant of analyze_and_suggest()
+        
+        Args:
+            memory_state: Complete OPT data from discovery
+            use_cache: Allow answering from the response cache
             
-            # Parse JSON response
-            response_text = response.choices[0].message.content.strip()
+        Returns:
+            List of 3 automation suggestions with scoring
+        """
+        prompt = self._build_prompt(memory_state)
+        
+        try:
+            response_text = await self.llm.acomplete(prompt, **self._completion_options(use_cache))
+            return self._parse_response(response_text)
+        except SchedulerBusy:
+            raise
+        except Exception as e:
+            return self._fallback_suggestions(memory_state, e)
+    
+    def stream_suggestions(self, memory_state: dict, use_cache: bool = True):
+        """
+        Stream the analysis, yielding each suggestion as soon as its JSON
+        object closes, so #1 can be shown while #2 and #3 are generating
+        
+        Args:
+            memory_state: Complete OPT data from discovery
+            use_cache: Allow answering from the response cache
             
-            # Remove markdown code blocks if present
-            if "```json" in response_text:
-                response_text = response_text.split("```json")[1].split("```")[0]
-            elif "```" in response_text:
-                response_text = response_text.split("```")[1].split("```")[0]
+        Yields:
+            Suggestion dicts, in order
+        """
+        prompt = self._build_prompt(memory_state)
+        parser = IncrementalJSONParser()
+        emitted = 0
+        
+        try:
+            for chunk in self.llm.stream(prompt, **self._completion_options(use_cache)):
+                closed = self._closed_suggestions(parser.feed(chunk), parser.complete)
+                for suggestion in closed[emitted:]:
+                    yield suggestion
+                emitted = max(emitted, len(closed))
             
-            result = json.loads(response_text.strip())
-            suggestions = result.get('suggestions', [])
+            closed = self._closed_suggestions(parser.result(), True)
+            if not closed:
+                raise ValueError("reply contained no suggestions")
+            for suggestion in closed[emitted:]:
+                yield suggestion
+            print(f"✅ Generated {len(closed)} automation suggestions")
+        except SchedulerBusy:
+            raise
+        except Exception as e:
+            # Suggestions already shown stand; otherwise fall back
+            if emitted:
+                print(f"⚠️ Analysis stream ended early: {str(e)}")
+                return
+            for suggestion in self._fallback_suggestions(memory_state, e):
+                yield suggestion
+    
+    async def astream_suggestions(self, memory_state: dict, use_cache: bool = True):
+        """
+        Async variant of stream_suggestions()
+        
+        Args:
+            memory_state: Complete OPT data from discovery
+            use_cache: Allow answering from the response cache
             
-            print(f"✅ Generated {len(suggestions)} automation suggestions")
-            return suggestions
+        Yields:
+            Suggestion dicts, in order
+        """
+        prompt = self._build_prompt(memory_state)
+        parser = IncrementalJSONParser()
+        emitted = 0
+        
+        try:
+            async for chunk in self.llm.astream(prompt, **self._completion_options(use_cache)):
+                closed = self._closed_suggestions(parser.feed(chunk), parser.complete)
+                for suggestion in closed[emitted:]:
+                    yield suggestion
+                emitted = max(emitted, len(closed))
             
+            closed = self._closed_suggestions(parser.result(), True)
+            if not closed:
+                raise ValueError("reply contained no suggestions")
+            for suggestion in closed[emitted:]:
+                yield suggestion
+            print(f"✅ Generated {len(closed)} automation suggestions")
+        except SchedulerBusy:
+            raise
         except Exception as e:
-            print(f"❌ Analysis error: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            
-            # Fallback: Create basic suggestion from task data
-            return [{
-                "rank": 1,
-                "name": t.get('name', 'Task Automation'),
-                "description": f"Automate: {t.get('description', 'the described task')}",
-                "time_saved": p.get('time_spent', '30 minutes/day'),
-                "money_saved": "$200/month (estimated)",
-                "complexity": "Medium",
-                "impact": "High",
-                "value_score": 75,
-                "implementation": "Python script with automation logic",
-                "why_this_rank": "User's primary request"
-            }]
+            if emitted:
+                print(f"⚠️ Analysis stream ended early: {str(e)}")
+                return
+            for suggestion in self._fallback_suggestions(memory_state, e):
+                yield suggestion
     
-    def display_suggestions(self, suggestions: list) -> str:
+    def display_suggestions(self, suggestions) -> str:
         """
         Format suggestions for display to user
         
@@ -154,40 +300,62 @@ Guidelines:
         Returns:
             Formatted string for display
         """
-        output = "\n" + "="*60 + "\n"
-        output += "🎯 AUTOMATION SUGGESTIONS\n"
-        output += "="*60 + "\n\n"
+        return ''.join(self.iter_display(suggestions))
+    
+    def iter_display(self, suggestions):
+        """
+        Format suggestions piece by piece, rendering each one as soon as the
+        iterable produces it
         
-        for suggestion in suggestions:
-            rank = suggestion.get('rank', '?')
-            name = suggestion.get('name', 'Unknown')
-            description = suggestion.get('description', '')
-            time_saved = suggestion.get('time_saved', 'Unknown')
-            money_saved = suggestion.get('money_saved', 'Unknown')
-            complexity = suggestion.get('complexity', 'Unknown')
-            impact = suggestion.get('impact', 'Unknown')
-            value_score = suggestion.get('value_score', 0)
-            
-            # Emoji for rank
-            rank_emoji = "🥇" if rank == 1 else "🥈" if rank == 2 else "🥉"
+        Args:
+            suggestions: List, or generator from stream_suggestions()
             
-            # Impact indicator
-            impact_indicator = "🔥🔥🔥" if impact == "High" else "🔥🔥" if impact == "Medium" else "🔥"
+        Yields:
+            The header, one block per suggestion, then the footer
+        """
+        yield self.DISPLAY_HEADER
+        for suggestion in suggestions:
+            yield self.format_suggestion(suggestion)
+        yield self.DISPLAY_FOOTER
+    
+    def format_suggestion(self, suggestion: dict) -> str:
+        """
+        Format one suggestion for display
+        
+        Args:
+            suggestion: One suggestion dict
             
-            output += f"{rank_emoji} SUGGESTION #{rank}: {name}\n"
-            output += f"{'─'*60}\n"
-            output += f"📝 {description}\n\n"
-            output += f"⏱️  Time Saved: {time_saved}\n"
-            output += f"💰 Money Saved: {money_saved}\n"
-            output += f"🔧 Complexity: {complexity}\n"
-            output += f"📊 Impact: {impact} {impact_indicator}\n"
-            output += f"⭐ Value Score: {value_score}/100\n"
-            output += f"\n💡 Implementation: {suggestion.get('implementation', 'N/A')}\n"
-            output += f"\n✨ Why This Rank: {suggestion.get('why_this_rank', 'N/A')}\n"
-            output += "\n" + "="*60 + "\n\n"
+        Returns:
+            Formatted block for display
+        """
+        output = ""
+        
+        rank = suggestion.get('rank', '?')
+        name = suggestion.get('name', 'Unknown')
+        description = suggestion.get('description', '')
+        time_saved = suggestion.get('time_saved', 'Unknown')
+        money_saved = suggestion.get('money_saved', 'Unknown')
+        complexity = suggestion.get('complexity', 'Unknown')
+        impact = suggestion.get('impact', 'Unknown')
+        value_score = suggestion.get('value_score', 0)
+        
+        # Emoji for rank
+        rank_emoji = "🥇" if rank == 1 else "🥈" if rank == 2 else "🥉"
+        
+        # Impact indicator
+        impact_indicator = "🔥🔥🔥" if impact == "High" else "🔥🔥" if impact == "Medium" else "🔥"
         
-        output += "Which automation would you like me to build for you?\n"
-        output += "(Reply with 1, 2, or 3)\n"
+        output += f"{rank_emoji} SUGGESTION #{rank}: {name}\n"
+        output += f"{'─'*60}\n"
+        output += f"📝 {description}\n\n"
+        output += f"⏱️  Time Saved: {time_saved}\n"
+        output += f"💰 Money Saved: {money_saved}\n"
+        output += f"🔧 Complexity: {complexity}\n"
+        output += f"📊 Impact: {impact} {impact_indicator}\n"
+        output += f"⭐ Value Score: {value_score}/100\n"
+        output += f"\n💡 Implementation: {suggestion.get('implementation', 'N/A')}\n"
+        output += f"\n✨ Why This Rank: {suggestion.get('why_this_rank', 'N/A')}\n"
+        output += "\n" + "="*60 + "\n\n"
         
         return output
     
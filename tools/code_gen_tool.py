@@ -5,23 +5,32 @@ Generates beginner-friendly, production-ready Python code from masterplan
 """
 
 import os
-from groq import Groq
-from dotenv import load_dotenv
-
-load_dotenv()
+from tools.llm_client import get_shared_client
+from tools.llm_scheduler import SchedulerBusy
+from tools.model_router import get_shared_router
+from tools.outcome import mark_degraded
 
 
 class CodeGenTool:
-    def __init__(self):
-        """Initialize the code generation tool with LLM"""
-        self.groq = Groq(api_key=os.getenv("GROQ_API_KEY"))
-        self.model = "llama-3.3-70b-versatile"
+    # Bump when the prompt template changes so cached responses are not reused
+    PROMPT_VERSION = "1"
+    
+    def __init__(self, llm=None, router=None):
+        """
+        Initialize the code generation tool with LLM
+        
+        Args:
+            llm: Shared LLMClient (defaults to the process-wide client)
+            router: ModelRouter picking the model (defaults to the process-wide router)
+        """
+        self.llm = llm or get_shared_client()
+        self.router = router or get_shared_router()
         
         print("💻 Code Generation Tool initialized")
     
-    def generate_code(self, chosen_suggestion: dict, masterplan: str, task: dict) -> dict:
+    def _build_prompt(self, chosen_suggestion: dict, masterplan: str, task: dict) -> str:
         """
-        Generate complete Python automation script
+        Build the code generation prompt
         
         Args:
             chosen_suggestion: The chosen automation
@@ -29,7 +38,7 @@ class CodeGenTool:
             task: Task details from memory
             
         Returns:
-            dict with 'code', 'filename', 'requirements'
+            Prompt string
         """
         # Build code generation prompt
         prompt = f'''You are an expert Python developer creating automation scripts for non-technical users.
@@ -251,44 +260,97 @@ CRITICAL SECURITY REQUIREMENTS:
 - For Gmail: Instruct users to use App Passwords, not regular passwords
 
 Generate the complete Python script now:'''
-
-        try:
-            response = self.groq.chat.completions.create(
-                messages=[{"role": "user", "content": prompt}],
-                model=self.model,
-                temperature=0.5,  # Lower temp for more reliable code
-                max_tokens=3000
-            )
-            
-            code = response.choices[0].message.content.strip()
-            
-            # Extract code from markdown if present
-            if "```python" in code:
-                code = code.split("```python")[1].split("```")[0].strip()
-            elif "```" in code:
-                code = code.split("```")[1].split("```")[0].strip()
-            
-            # Generate filename
-            filename = self._generate_filename(chosen_suggestion.get('name'))
-            
-            # Extract requirements
-            requirements = self._extract_requirements(code)
-            
-            print(f"✅ Generated code ({len(code)} chars, {len(code.splitlines())} lines)")
-            
-            return {
-                'code': code,
-                'filename': filename,
-                'requirements': requirements
-            }
+        return prompt
+    
+    def _completion_options(self, use_cache: bool) -> dict:
+        """LLM call options shared by the sync and async generation paths"""
+        # Model, temperature, max_tokens and fallbacks come from the route
+        options = self.router.options('codegen.generate')
+        options.update({
+            'use_cache': use_cache,
+            'prompt_version': self.PROMPT_VERSION
+        })
+        return options
+    
+    def _package_code(self, response_text: str, chosen_suggestion: dict) -> dict:
+        """Turn the LLM reply into the code_data dict"""
+        code = response_text.strip()
+        
+        # Extract code from markdown if present
+        if "```python" in code:
+            code = code.split("```python")[1].split("```")[0].strip()
+        elif "```" in code:
+            code = code.split("```")[1].split("```")[0].strip()
+        
+        # Generate filename
+        filename = self._generate_filename(chosen_suggestion.get('name'))
+        
+        # Extract requirements
+        requirements = self._extract_requirements(code)
+        
+        print(f"✅ Generated code ({len(code)} chars, {len(code.splitlines())} lines)")
+        
+        return {
+            'code': code,
+            'filename': filename,
+            'requirements': requirements
+        }
+    
+    def _fallback(self, chosen_suggestion: dict, task: dict, error: Exception) -> dict:
+        """Fallback when the LLM call fails"""
+        print(f"❌ Code generation error: {str(error)}")
+        mark_degraded('code fallback')
+        import traceback
+        traceback.print_exc()
+        
+        # Fallback: Create basic template
+        return self._create_fallback_code(chosen_suggestion, task)
+    
+    def generate_code(self, chosen_suggestion: dict, masterplan: str, task: dict, use_cache: bool = True) -> dict:
+        """
+        Generate complete Python automation script
+        
+        Args:
+            chosen_suggestion: The chosen automation
+            masterplan: The generated masterplan
+            task: Task details from memory
+            use_cache: Allow answering from the response cache
             
+        Returns:
+            dict with 'code', 'filename', 'requirements'
+        """
+        prompt = self._build_prompt(chosen_suggestion, masterplan, task)
+        
+        try:
+            response_text = self.llm.complete(prompt, **self._completion_options(use_cache))
+            return self._package_code(response_text, chosen_suggestion)
+        except SchedulerBusy:
+            raise
         except Exception as e:
-            print(f"❌ Code generation error: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            return self._fallback(chosen_suggestion, task, e)
+    
+    async def agenerate_code(self, chosen_suggestion: dict, masterplan: str, task: dict, use_cache: bool = True) -> dict:
+        """
+        Async variant of generate_code()
+        
+        Args:
+            chosen_suggestion: The chosen automation
+            masterplan: The generated masterplan
+            task: Task details from memory
+            use_cache: Allow answering from the response cache
             
-            # Fallback: Create basic template
-            return self._create_fallback_code(chosen_suggestion, task)
+        Returns:
+            dict with 'code', 'filename', 'requirements'
+        """
+        prompt = self._build_prompt(chosen_suggestion, masterplan, task)
+        
+        try:
+            response_text = await self.llm.acomplete(prompt, **self._completion_options(use_cache))
+            return self._package_code(response_text, chosen_suggestion)
+        except SchedulerBusy:
+            raise
+        except Exception as e:
+            return self._fallback(chosen_suggestion, task, e)
     
     def _generate_filename(self, automation_name: str) -> str:
         """Generate a Python filename from automation name"""
@@ -418,12 +480,31 @@ if __name__ == "__main__":
             'requirements': ['python-dotenv']  # Always include dotenv
         }
     
-    def save_code(self, code_data: dict) -> tuple:
+    def validate_code(self, code_data: dict) -> dict:
+        """
+        Check that the generated code at least compiles
+        
+        Args:
+            code_data: dict from generate_code()
+            
+        Returns:
+            dict with 'valid' and 'error' (None when valid)
+        """
+        try:
+            compile(code_data['code'], code_data['filename'], 'exec')
+            print("✅ Generated code compiles")
+            return {'valid': True, 'error': None}
+        except SyntaxError as e:
+            print(f"⚠️ Generated code has a syntax error: {e.msg} (line {e.lineno})")
+            return {'valid': False, 'error': f"{e.msg} (line {e.lineno})"}
+    
+    def save_code(self, code_data: dict, output_dir: str = "output") -> tuple:
         """
         Save generated code and requirements to files
         
         Args:
             code_data: dict from generate_code()
+            output_dir: Directory to save into
             
         Returns:
             tuple of (code_path, requirements_path)
@@ -431,17 +512,17 @@ if __name__ == "__main__":
         import os
         
         # Create output directory
-        os.makedirs("output", exist_ok=True)
+        os.makedirs(output_dir, exist_ok=True)
         
         # Save Python script
-        code_path = os.path.join("output", code_data['filename'])
+        code_path = os.path.join(output_dir, code_data['filename'])
         with open(code_path, 'w', encoding='utf-8') as f:
             f.write(code_data['code'])
         print(f"💾 Code saved to: {code_path}")
         
         # Save requirements.txt
         if code_data['requirements']:
-            req_path = os.path.join("output", "requirements.txt")
+            req_path = os.path.join(output_dir, "requirements.txt")
             with open(req_path, 'w', encoding='utf-8') as f:
                 for req in code_data['requirements']:
                     f.write(f"{req}\n")
@@ -5,23 +5,32 @@ Generates beginner-friendly guide for installing and running the automation
 """
 
 import os
-from groq import Groq
-from dotenv import load_dotenv
-
-load_dotenv()
+from tools.llm_client import get_shared_client
+from tools.llm_scheduler import SchedulerBusy
+from tools.model_router import get_shared_router
+from tools.outcome import mark_degraded
 
 
 class DeploymentTool:
-    def __init__(self):
-        """Initialize the deployment tool with LLM"""
-        self.groq = Groq(api_key=os.getenv("GROQ_API_KEY"))
-        self.model = "llama-3.3-70b-versatile"
+    # Bump when the prompt template changes so cached responses are not reused
+    PROMPT_VERSION = "1"
+    
+    def __init__(self, llm=None, router=None):
+        """
+        Initialize the deployment tool with LLM
+        
+        Args:
+            llm: Shared LLMClient (defaults to the process-wide client)
+            router: ModelRouter picking the model (defaults to the process-wide router)
+        """
+        self.llm = llm or get_shared_client()
+        self.router = router or get_shared_router()
         
         print("🚀 Deployment Tool initialized")
     
-    def generate_deployment_guide(self, code_data: dict, chosen_suggestion: dict, memory_state: dict) -> str:
+    def _build_prompt(self, code_data: dict, chosen_suggestion: dict, memory_state: dict) -> str:
         """
-        Generate comprehensive deployment instructions
+        Build the deployment guide prompt
         
         Args:
             code_data: Generated code info (filename, requirements, code)
@@ -29,7 +38,7 @@ class DeploymentTool:
             memory_state: Business context
             
         Returns:
-            Deployment guide as markdown string
+            Prompt string
         """
         filename = code_data.get('filename', 'automation.py')
         requirements = code_data.get('requirements', [])
@@ -269,27 +278,139 @@ IMPORTANT:
 - Be encouraging and supportive
 
 Generate the complete deployment guide now:"""
-
-        try:
-            response = self.groq.chat.completions.create(
-                messages=[{"role": "user", "content": prompt}],
-                model=self.model,
-                temperature=0.7,
-                max_tokens=3000
-            )
+        return prompt
+    
+    def _completion_options(self, use_cache: bool) -> dict:
+        """LLM call options shared by every generation path"""
+        # Model, temperature, max_tokens and fallbacks come from the route
+        options = self.router.options('deployment.generate')
+        options.update({
+            'use_cache': use_cache,
+            'prompt_version': self.PROMPT_VERSION
+        })
+        return options
+    
+    def _fallback(self, code_data: dict, chosen_suggestion: dict, error: Exception) -> str:
+        """Fallback when the LLM call fails"""
+        print(f"❌ Deployment guide generation error: {str(error)}")
+        mark_degraded('deployment guide fallback')
+        import traceback
+        traceback.print_exc()
+        
+        # Fallback: Create basic guide
+        return self._create_fallback_guide(
+            code_data.get('filename', 'automation.py'),
+            code_data.get('requirements', []),
+            chosen_suggestion
+        )
+    
+    def generate_deployment_guide(self, code_data: dict, chosen_suggestion: dict, memory_state: dict, use_cache: bool = True) -> str:
+        """
+        Generate comprehensive deployment instructions
+        
+        Args:
+            code_data: Generated code info (filename, requirements, code)
+            chosen_suggestion: The automation details
+            memory_state: Business context
+            use_cache: Allow answering from the response cache
             
-            guide = response.choices[0].message.content.strip()
+        Returns:
+            Deployment guide as markdown string
+        """
+        prompt = self._build_prompt(code_data, chosen_suggestion, memory_state)
+        
+        try:
+            guide = self.llm.complete(prompt, **self._completion_options(use_cache)).strip()
+            print(f"✅ Generated deployment guide ({len(guide)} chars)")
+            return guide
+        except SchedulerBusy:
+            raise
+        except Exception as e:
+            return self._fallback(code_data, chosen_suggestion, e)
+    
+    async def agenerate_deployment_guide(self, code_data: dict, chosen_suggestion: dict, memory_state: dict, use_cache: bool = True) -> str:
+        """
+        Async variant of generate_deployment_guide()
+        
+        Args:
+            code_data: Generated code info (filename, requirements, code)
+            chosen_suggestion: The automation details
+            memory_state: Business context
+            use_cache: Allow answering from the response cache
             
+        Returns:
+            Deployment guide as markdown string
+        """
+        prompt = self._build_prompt(code_data, chosen_suggestion, memory_state)
+        
+        try:
+            guide = (await self.llm.acomplete(prompt, **self._completion_options(use_cache))).strip()
             print(f"✅ Generated deployment guide ({len(guide)} chars)")
             return guide
+        except SchedulerBusy:
+            raise
+        except Exception as e:
+            return self._fallback(code_data, chosen_suggestion, e)
+    
+    def stream_deployment_guide(self, code_data: dict, chosen_suggestion: dict, memory_state: dict, use_cache: bool = True):
+        """
+        Generate the deployment guide, yielding text chunks as tokens arrive
+        
+        Args:
+            code_data: Generated code info (filename, requirements, code)
+            chosen_suggestion: The automation details
+            memory_state: Business context
+            use_cache: Allow answering from the response cache
+            
+        Yields:
+            Markdown text chunks (join them for the full guide)
+        """
+        prompt = self._build_prompt(code_data, chosen_suggestion, memory_state)
+        total_chars = 0
+        
+        try:
+            for chunk in self.llm.stream(prompt, **self._completion_options(use_cache)):
+                total_chars += len(chunk)
+                yield chunk
             
+            print(f"\n✅ Generated deployment guide ({total_chars} chars)")
+            
+        except SchedulerBusy:
+            raise
         except Exception as e:
-            print(f"❌ Deployment guide generation error: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            # Fallback only if nothing was streamed yet
+            if total_chars == 0:
+                yield self._fallback(code_data, chosen_suggestion, e)
+            else:
+                print(f"❌ Deployment guide generation error: {str(e)}")
+                mark_degraded('deployment guide stream cut short')
+    
+    async def astream_deployment_guide(self, code_data: dict, chosen_suggestion: dict, memory_state: dict, use_cache: bool = True):
+        """
+        Async variant of stream_deployment_guide()
+        
+        Yields:
+            Markdown text chunks (join them for the full guide)
+        """
+        prompt = self._build_prompt(code_data, chosen_suggestion, memory_state)
+        total_chars = 0
+        
+        try:
+            async for chunk in self.llm.astream(prompt, **self._completion_options(use_cache)):
+                total_chars += len(chunk)
+                yield chunk
+            
+            print(f"\n✅ Generated deployment guide ({total_chars} chars)")
             
-            # Fallback: Create basic guide
-            return self._create_fallback_guide(filename, requirements, chosen_suggestion)
+        except SchedulerBusy:
+            raise
+        except Exception as e:
+            # Fallback only if nothing was streamed yet
+            if total_chars == 0:
+                yield self._fallback(code_data, chosen_suggestion, e)
+            else:
+                print(f"❌ Deployment guide generation error: {str(e)}")
+                mark_degraded('deployment guide stream cut short')
     
     def _extract_config_variables(self, code: str) -> list:
         """Extract configuration variable names from code"""
@@ -355,13 +476,14 @@ Set up Task Scheduler (Windows) or cron (Mac/Linux) to run automatically.
 Your automation is ready to use.
 """
     
-    def save_deployment_guide(self, guide: str, filename: str = "DEPLOYMENT.md") -> str:
+    def save_deployment_guide(self, guide: str, filename: str = "DEPLOYMENT.md", output_dir: str = "output") -> str:
         """
         Save deployment guide to file
         
         Args:
             guide: The generated guide
             filename: Output filename
+            output_dir: Directory to save into
             
         Returns:
             Path to saved file
@@ -369,9 +491,9 @@ Your automation is ready to use.
         import os
         
         # Create output directory
-        os.makedirs("output", exist_ok=True)
+        os.makedirs(output_dir, exist_ok=True)
         
-        filepath = os.path.join("output", filename)
+        filepath = os.path.join(output_dir, filename)
         
         with open(filepath, 'w', encoding='utf-8') as f:
             f.write(guide)
@@ -8,25 +8,63 @@ This tool asks questions to understand:
 """
 
 import os
-import json
 import sys
 
 # FIX: Add parent directory to path FIRST
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # NOW import local modules
-from groq import Groq
-from dotenv import load_dotenv
+from tools.llm_client import get_shared_client
+from tools.llm_scheduler import SchedulerBusy
+from tools.model_router import get_shared_router
+from tools.fast_extractor import FastExtractor
+from tools.json_parser import parse_json
 from memory.conversation_memory import ConversationMemory  # ← Now Python can find it!
 
-load_dotenv()
+
+# Every OPT field in interview order: (section, field, label, what to extract)
+OPT_FIELDS = [
+    ('operating_model', 'business_type', 'BUSINESS TYPE', "type of business (e.g., 'bakery', 'consulting firm', 'online store')"),
+    ('operating_model', 'business_size', 'BUSINESS SIZE', "team size (e.g., '2 employees', 'solo', '10 people')"),
+    ('operating_model', 'tools_used', 'TOOLS USED', "tools/software (e.g., 'Excel, Gmail', 'Salesforce', 'manual processes')"),
+    ('operating_model', 'pain_points', 'PAIN POINTS', "frustrations or time-consuming tasks"),
+    ('process', 'name', 'PROCESS NAME', "the name of a repetitive workflow"),
+    ('process', 'description', 'PROCESS DESCRIPTION', "detailed description of the process"),
+    ('process', 'frequency', 'PROCESS FREQUENCY', "how often (e.g., 'daily', 'weekly', '3 times per week')"),
+    ('process', 'time_spent', 'TIME SPENT', "duration (e.g., '30 minutes', '2 hours', '15 min')"),
+    ('task', 'name', 'SPECIFIC TASK NAME', "specific automatable task within the process"),
+    ('task', 'description', 'TASK DESCRIPTION', "detailed description of the task"),
+    ('task', 'inputs', 'TASK INPUTS', "data sources or inputs needed"),
+    ('task', 'outputs', 'TASK OUTPUTS', "results or outputs produced"),
+]
+
+SECTION_COMPLETE_MESSAGES = {
+    'operating_model': "✅ Operating Model Complete!\n",
+    'process': "✅ Process Complete!\n",
+    'task': "✅ Task Complete! Discovery phase done!\n",
+}
 
 
 class DiscoveryTool:
-    def __init__(self):
-        """Initialize the discovery tool with LLM"""
-        self.groq = Groq(api_key=os.getenv("GROQ_API_KEY"))
-        self.model = "llama-3.3-70b-versatile"
+    # Bump when the prompt template changes so cached responses are not reused
+    PROMPT_VERSION = "2"
+    
+    def __init__(self, llm=None, fast_path: bool = None, router=None):
+        """
+        Initialize the discovery tool with LLM
+        
+        Args:
+            llm: Shared LLMClient (defaults to the process-wide client)
+            fast_path: Parse simple answers (frequency, time spent, team size)
+                locally before calling the LLM (defaults to DISCOVERY_FAST_PATH, or on)
+            router: ModelRouter picking the model (defaults to the process-wide router)
+        """
+        self.llm = llm or get_shared_client()
+        self.router = router or get_shared_router()
+        
+        if fast_path is None:
+            fast_path = os.getenv("DISCOVERY_FAST_PATH", "1") == "1"
+        self.fast_extractor = FastExtractor() if fast_path else None
         
         print("🔍 Discovery Tool initialized")
     
@@ -85,149 +123,241 @@ class DiscoveryTool:
         # All info collected!
         return None
     
-    def extract_information(self, user_message: str, memory_state: dict) -> dict:
+    def _current_field(self, memory_state: dict):
         """
-        Use LLM to extract structured information from user's response
+        Find the field we're currently asking about
+        
+        Returns:
+            (section, field) of the first unfilled OPT field, or None
+        """
+        for section, field, _, _ in OPT_FIELDS:
+            if not memory_state[section].get(field):
+                return (section, field)
+        return None
+    
+    def _build_prompt(self, user_message: str, memory_state: dict) -> str:
+        """
+        Build the extraction prompt for every field that is still missing
         
         Args:
             user_message: What the user said
             memory_state: Current state to understand context
             
         Returns:
-            dict with extracted info: {'field': 'value', ...}
+            Prompt string
         """
-        # Determine what we're trying to extract
-        om = memory_state['operating_model']
-        p = memory_state['process']
-        t = memory_state['task']
+        current = self._current_field(memory_state)
         
         # Build context for LLM
         context = "Extract information from the user's message.\n\n"
         
-        if not om.get('business_type'):
-            context += "We're asking about: BUSINESS TYPE\n"
-            context += "Extract: type of business (e.g., 'bakery', 'consulting firm', 'online store')\n"
-        elif not om.get('business_size'):
-            context += "We're asking about: BUSINESS SIZE\n"
-            context += "Extract: team size (e.g., '2 employees', 'solo', '10 people')\n"
-        elif not om.get('tools_used'):
-            context += "We're asking about: TOOLS USED\n"
-            context += "Extract: tools/software (e.g., 'Excel, Gmail', 'Salesforce', 'manual processes')\n"
-        elif not om.get('pain_points'):
-            context += "We're asking about: PAIN POINTS\n"
-            context += "Extract: frustrations or time-consuming tasks\n"
-        elif not p.get('name'):
-            context += "We're asking about: PROCESS NAME\n"
-            context += "Extract: the name of a repetitive workflow\n"
-        elif not p.get('description'):
-            context += "We're asking about: PROCESS DESCRIPTION\n"
-            context += "Extract: detailed description of the process\n"
-        elif not p.get('frequency'):
-            context += "We're asking about: PROCESS FREQUENCY\n"
-            context += "Extract: how often (e.g., 'daily', 'weekly', '3 times per week')\n"
-        elif not p.get('time_spent'):
-            context += "We're asking about: TIME SPENT\n"
-            context += "Extract: duration (e.g., '30 minutes', '2 hours', '15 min')\n"
-        elif not t.get('name'):
-            context += "We're asking about: SPECIFIC TASK NAME\n"
-            context += "Extract: specific automatable task within the process\n"
-        elif not t.get('description'):
-            context += "We're asking about: TASK DESCRIPTION\n"
-            context += "Extract: detailed description of the task\n"
-        elif not t.get('inputs'):
-            context += "We're asking about: TASK INPUTS\n"
-            context += "Extract: data sources or inputs needed\n"
-        elif not t.get('outputs'):
-            context += "We're asking about: TASK OUTPUTS\n"
-            context += "Extract: results or outputs produced\n"
+        for section, field, label, hint in OPT_FIELDS:
+            if (section, field) == current:
+                context += f"We're asking about: {label}\n"
+                context += f"Extract: {hint}\n"
+        
+        context += "\nThe user may also mention other details. Still missing:\n"
+        for section, field, label, hint in OPT_FIELDS:
+            if not memory_state[section].get(field):
+                context += f"- {section}.{field} ({label}): {hint}\n"
         
         prompt = f"""{context}
 
 User's message: "{user_message}"
 
-Extract the requested information and respond with ONLY a JSON object:
+Extract every missing field the message answers and respond with ONLY a JSON object:
 {{
-  "extracted_value": "the extracted information here",
-  "confidence": "high/medium/low"
+  "fields": {{
+    "section.field": {{"value": "the extracted information here", "confidence": "high/medium/low"}}
+  }}
 }}
 
-Be concise and extract only the key information."""
-
-        try:
-            response = self.groq.chat.completions.create(
-                messages=[{"role": "user", "content": prompt}],
-                model=self.model,
-                temperature=0.3
-            )
-            
-            # Parse JSON response
-            response_text = response.choices[0].message.content.strip()
+Only include fields the message actually answers. Be concise and extract only the key information."""
+        return prompt
+    
+    def _completion_options(self, use_cache: bool) -> dict:
+        """LLM call options shared by the sync and async extraction paths"""
+        # Model, temperature, max_tokens and fallbacks come from the route
+        options = self.router.options('discovery.extract')
+        options.update({
+            'use_cache': use_cache,
+            'prompt_version': self.PROMPT_VERSION
+        })
+        return options
+    
+    def _parse_response(self, response_text: str, user_message: str, memory_state: dict) -> dict:
+        """Parse the LLM's JSON reply into an extraction dict"""
+        # Tolerates fences, prose, trailing commas and truncated replies
+        data = parse_json(response_text)
+        fields = {}
+        for key, item in (data.get('fields') or {}).items():
+            if isinstance(item, dict) and item.get('value'):
+                fields[key] = {
+                    'value': str(item['value']),
+                    'confidence': item.get('confidence', 'medium')
+                }
+        
+        # Older single-field replies, or only volunteered fields found: the
+        # raw answer still answers the asked field, so it is not asked again
+        current = self._current_field(memory_state)
+        if current and f"{current[0]}.{current[1]}" not in fields:
+            fields[f"{current[0]}.{current[1]}"] = {
+                'value': data.get('extracted_value') or user_message,
+                'confidence': data.get('confidence', 'medium') if data.get('extracted_value') else 'low'
+            }
+        
+        return self._make_extraction(fields, memory_state)
+    
+    def _make_extraction(self, fields: dict, memory_state: dict) -> dict:
+        """
+        Build the extraction dict, keeping the asked field at the top level
+        
+        Args:
+            fields: {'section.field': {'value': ..., 'confidence': ...}}
+            memory_state: Current state to find the asked field
             
-            # Remove markdown code blocks if present
-            if "```json" in response_text:
-                response_text = response_text.split("```json")[1].split("```")[0]
-            elif "```" in response_text:
-                response_text = response_text.split("```")[1].split("```")[0]
+        Returns:
+            dict with 'fields', plus 'field', 'extracted_value' and 'confidence'
+            for the field we asked about
+        """
+        current = self._current_field(memory_state)
+        asked = f"{current[0]}.{current[1]}" if current else None
+        item = fields.get(asked, {})
+        return {
+            'fields': fields,
+            'field': asked,
+            'extracted_value': item.get('value'),
+            'confidence': item.get('confidence', 'low')
+        }
+    
+    def _fallback_extraction(self, user_message: str, memory_state: dict, error: Exception) -> dict:
+        """Fallback when the LLM call or parsing fails"""
+        print(f"⚠️ Extraction error: {str(error)}")
+        # Fallback: use the user's message as the answer to the asked field
+        current = self._current_field(memory_state)
+        fields = {}
+        if current:
+            fields[f"{current[0]}.{current[1]}"] = {'value': user_message, 'confidence': 'low'}
+        return self._make_extraction(fields, memory_state)
+    
+    def _fast_extraction(self, user_message: str, memory_state: dict):
+        """
+        Answer from the rule-based extractor when it is confident
+        
+        Returns:
+            Extraction dict, or None to fall through to the LLM
+        """
+        if self.fast_extractor is None:
+            return None
+        
+        fields = self.fast_extractor.extract(user_message, memory_state, self._current_field(memory_state))
+        if fields is None:
+            return None
+        
+        for key, item in fields.items():
+            print(f"⚡ Fast-path extraction: {key} = {item['value']}")
+        return self._make_extraction(fields, memory_state)
+    
+    def extract_information(self, user_message: str, memory_state: dict, use_cache: bool = True) -> dict:
+        """
+        Use LLM to extract structured information from user's response
+        
+        Args:
+            user_message: What the user said
+            memory_state: Current state to understand context
+            use_cache: Allow answering from the response cache
             
-            result = json.loads(response_text.strip())
-            return result
+        Returns:
+            dict with 'fields' ({'section.field': {'value', 'confidence'}}) and
+            'extracted_value'/'confidence' for the field we asked about
+        """
+        extraction = self._fast_extraction(user_message, memory_state)
+        if extraction is not None:
+            return extraction
+        
+        prompt = self._build_prompt(user_message, memory_state)
+        
+        try:
+            response_text = self.llm.complete(prompt, **self._completion_options(use_cache))
+            return self._parse_response(response_text, user_message, memory_state)
+        except SchedulerBusy:
+            raise
+        except Exception as e:
+            return self._fallback_extraction(user_message, memory_state, e)
+    
+    async def aextract_information(self, user_message: str, memory_state: dict, use_cache: bool = True) -> dict:
+        """
+        Async variant of extract_information()
+        
+        Args:
+            user_message: What the user said
+            memory_state: Current state to understand context
+            use_cache: Allow answering from the response cache
             
+        Returns:
+            dict with 'fields' ({'section.field': {'value', 'confidence'}}) and
+            'extracted_value'/'confidence' for the field we asked about
+        """
+        extraction = self._fast_extraction(user_message, memory_state)
+        if extraction is not None:
+            return extraction
+        
+        prompt = self._build_prompt(user_message, memory_state)
+        
+        try:
+            response_text = await self.llm.acomplete(prompt, **self._completion_options(use_cache))
+            return self._parse_response(response_text, user_message, memory_state)
+        except SchedulerBusy:
+            raise
         except Exception as e:
-            print(f"⚠️ Extraction error: {str(e)}")
-            # Fallback: just return the user's message
-            return {
-                "extracted_value": user_message,
-                "confidence": "low"
-            }
+            return self._fallback_extraction(user_message, memory_state, e)
     
     def update_memory_with_extraction(self, extraction: dict, memory):
         """
-        Update memory with extracted information
+        Update memory with every extracted field
+        
+        The field we asked about is always filled (with the raw answer if
+        nothing better was extracted). Other fields are only filled when
+        the extraction is at least medium confidence.
         
         Args:
             extraction: Result from extract_information()
             memory: ConversationMemory instance
         """
-        value = extraction.get('extracted_value', '')
         state = memory.get_state()
+        updaters = {
+            'operating_model': memory.update_operating_model,
+            'process': memory.update_process,
+            'task': memory.update_task
+        }
         
-        om = state['operating_model']
-        p = state['process']
-        t = state['task']
+        fields = dict(extraction.get('fields') or {})
+        asked = self._current_field(state)
+        asked_key = f"{asked[0]}.{asked[1]}" if asked else None
+        if asked_key and asked_key not in fields and extraction.get('extracted_value'):
+            fields[asked_key] = {
+                'value': extraction['extracted_value'],
+                'confidence': extraction.get('confidence', 'low')
+            }
         
-        # Figure out what field to update
-        if not om.get('business_type'):
-            memory.update_operating_model('business_type', value)
-        elif not om.get('business_size'):
-            memory.update_operating_model('business_size', value)
-        elif not om.get('tools_used'):
-            memory.update_operating_model('tools_used', value)
-        elif not om.get('pain_points'):
-            memory.update_operating_model('pain_points', value)
-            memory.mark_phase_complete('operating_model')
-            print("✅ Operating Model Complete!\n")
-        elif not p.get('name'):
-            memory.update_process('name', value)
-        elif not p.get('description'):
-            memory.update_process('description', value)
-        elif not p.get('frequency'):
-            memory.update_process('frequency', value)
-        elif not p.get('time_spent'):
-            memory.update_process('time_spent', value)
-            memory.mark_phase_complete('process')
-            print("✅ Process Complete!\n")
-        elif not t.get('name'):
-            memory.update_task('name', value)
-        elif not t.get('description'):
-            memory.update_task('description', value)
-        elif not t.get('inputs'):
-            memory.update_task('inputs', value)
-        elif not t.get('outputs'):
-            memory.update_task('outputs', value)
-            memory.mark_phase_complete('task')
-            print("✅ Task Complete! Discovery phase done!\n")
-  
-
+        for section, field, _, _ in OPT_FIELDS:
+            key = f"{section}.{field}"
+            item = fields.get(key)
+            if not item or state[section].get(field):
+                continue
+            if key != asked_key and item.get('confidence') == 'low':
+                print(f"⏭️ Skipping low-confidence {key}: {item['value']}")
+                continue
+            updaters[section](field, item['value'])
+        
+        # Mark sections whose fields are now all filled
+        for section, message in SECTION_COMPLETE_MESSAGES.items():
+            section_state = state[section]
+            filled = all(section_state.get(field) for s, field, _, _ in OPT_FIELDS if s == section)
+            if filled and not section_state.get('completed'):
+                memory.mark_phase_complete(section)
+                print(message)
+    
     def is_complete(self, memory_state: dict) -> bool:
         """
         Check if discovery is complete - STRICTER VERSION
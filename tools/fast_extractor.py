@@ -0,0 +1,266 @@
+"""
+Fast Extractor - Rule-Based Parsing for Simple OPT Answers
+
+Answers to "how often", "how long" and "how many people" are almost always
+short phrases ("Daily", "30-45 minutes", "2 people"). These are parsed
+locally into normalized values so the discovery tool only calls the LLM
+when the rules are unsure.
+"""
+
+import re
+
+
+WORD_NUMBERS = {
+    'a': 1, 'an': 1, 'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5,
+    'six': 6, 'seven': 7, 'eight': 8, 'nine': 9, 'ten': 10, 'eleven': 11,
+    'twelve': 12, 'fifteen': 15, 'twenty': 20, 'thirty': 30, 'forty': 40,
+    'forty-five': 45, 'fifty': 50, 'sixty': 60, 'ninety': 90, 'half': 0.5,
+    'couple': 2, 'few': 3,
+}
+
+NUMBER = r"(\d+(?:\.\d+)?|" + "|".join(sorted(WORD_NUMBERS, key=len, reverse=True)) + r")"
+
+DURATION_UNITS = {
+    'second': 1 / 60, 'sec': 1 / 60,
+    'minute': 1, 'min': 1, 'mins': 1,
+    'hour': 60, 'hr': 60, 'hrs': 60, 'h': 60,
+    'day': 8 * 60,    # a working day
+}
+
+# "once a day" is a frequency: days only count as a duration after a real
+# quantity, never after the article
+ARTICLES = ('a', 'an')
+
+DURATION_PATTERN = re.compile(
+    NUMBER + r"(?:\s*(?:-|–|to|or)\s*" + NUMBER + r")?\s*"
+    r"(seconds?|secs?|minutes?|mins?|hours?|hrs?|h|days?)\b",
+    re.IGNORECASE
+)
+
+HALF_HOUR_PATTERN = re.compile(r"\bhalf\s+an?\s+hour\b", re.IGNORECASE)
+
+# (pattern, normalized frequency)
+FREQUENCY_PATTERNS = [
+    (r"\b(every|each)\s+other\s+day\b", "every 2 days"),
+    (r"\b(daily|every\s+(single\s+)?day|each\s+day|per\s+day|a\s+day|every\s+morning|every\s+evening|every\s+night|nightly)\b", "daily"),
+    (r"\b(every\s+(single\s+)?weeks?|each\s+week|weekly|once\s+a\s+week|per\s+week)\b", "weekly"),
+    (r"\b(biweekly|fortnightly|every\s+(two|2|other)\s+weeks?)\b", "every 2 weeks"),
+    (r"\b(monthly|every\s+month|each\s+month|once\s+a\s+month|per\s+month)\b", "monthly"),
+    (r"\b(quarterly|every\s+quarter)\b", "quarterly"),
+    (r"\b(yearly|annually|every\s+year|once\s+a\s+year)\b", "yearly"),
+    (r"\b(hourly|every\s+hour)\b", "hourly"),
+]
+
+TIMES_PATTERN = re.compile(
+    r"\b(?:(?P<word>once|twice|thrice)|(?P<count>" + NUMBER[1:-1] + r")\s*(?:x|times?))"
+    r"\s*(?:a|per|each|every)\s+(?P<period>day|week|month)\b",
+    re.IGNORECASE
+)
+
+# "every weekday" (5 times per week), "on Mondays and Thursdays" (one time per day named)
+WEEKDAY = r"(?:mon|tues|wednes|thurs|fri|satur|sun)days?"
+WEEKDAYS_PATTERN = re.compile(
+    r"\b(?:every|each|on)\s+(?P<weekdays>weekdays?|" + WEEKDAY + r"(?:\s*(?:,|and|&)\s*" + WEEKDAY + r")*)\b",
+    re.IGNORECASE
+)
+
+HEADCOUNT = (
+    NUMBER + r"(?:\s*(?:-|–|to)\s*" + NUMBER + r")?\s*"
+    r"(?:-\s*)?(?:full[- ]time\s+|part[- ]time\s+)?"
+    r"(?:people|persons?|employees?|staff|workers?|team\s+members?|members?|person|"
+    r"contractors?|freelancers?|assistants?|helpers?)\b"
+)
+
+HEADCOUNT_PATTERN = re.compile(HEADCOUNT, re.IGNORECASE)
+
+ME_AND = r"\b(?:me|myself|i)\s+(?:and|plus|\+|&)\s+(?:my\s+)?"
+
+# "me and 3 contractors" counts the speaker too
+PLUS_COUNT_PATTERN = re.compile(ME_AND + HEADCOUNT, re.IGNORECASE)
+
+SOLO_PATTERN = re.compile(r"\b(solo|just\s+me|only\s+me|by\s+myself|myself|one[- ]man|one[- ]woman|one[- ]person|solopreneur|freelancer)\b", re.IGNORECASE)
+
+PLUS_ONE_PATTERN = re.compile(
+    ME_AND +
+    r"(assistant|partner|wife|husband|spouse|employee|helper|colleague|co-?founder|son|daughter|brother|sister|friend)\b",
+    re.IGNORECASE
+)
+
+# Answers longer than this probably say more than the rules understand
+MAX_FAST_WORDS = 10
+
+
+def _to_number(token: str) -> float:
+    token = token.lower()
+    if token in WORD_NUMBERS:
+        return WORD_NUMBERS[token]
+    return float(token)
+
+
+def _format_number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else f"{value:g}"
+
+
+class FastExtractor:
+    # OPT fields the rules can answer, and the parser for each
+    FIELDS = {
+        ('process', 'frequency'): 'parse_frequency',
+        ('process', 'time_spent'): 'parse_duration',
+        ('operating_model', 'business_size'): 'parse_headcount',
+    }
+
+    def __init__(self):
+        """Initialize the rule-based extractor"""
+        self.stats = {'hits': 0, 'fallthroughs': 0}
+
+    def parse_duration(self, text: str, days: bool = True):
+        """
+        Parse a duration like "30-45 minutes", "an hour" or "1.5 hrs"
+
+        Args:
+            text: User's message
+            days: Accept durations in days ("2 days"); off when the message
+                answers another question, where "a day" is a frequency
+
+        Returns:
+            (normalized value, confidence), or None if no duration was found
+        """
+        text = HALF_HOUR_PATTERN.sub("30 minutes", text)
+        matches = [(low, high, unit) for low, high, unit in DURATION_PATTERN.findall(text)
+                   if not unit.lower().startswith('day') or (days and low.lower() not in ARTICLES)]
+        if not matches:
+            return None
+
+        low, high, unit = matches[0]
+        unit = unit.lower()
+        factor = DURATION_UNITS.get(unit, DURATION_UNITS.get(unit.rstrip('s'), 1))
+        low_minutes = _to_number(low) * factor
+        high_minutes = _to_number(high) * factor if high else None
+
+        # Whole hours or two hours and up in hours, otherwise minutes
+        values = [low_minutes] + ([high_minutes] if high_minutes is not None else [])
+        if all(v % 60 == 0 for v in values) or max(values) >= 120:
+            unit_name, divisor = 'hour', 60
+        else:
+            unit_name, divisor = 'minute', 1
+
+        value = '-'.join(_format_number(round(v / divisor, 2)) for v in values)
+        value += f" {unit_name}" if value == '1' else f" {unit_name}s"
+
+        return (value, 'high' if len(matches) == 1 else 'low')
+
+    def parse_frequency(self, text: str):
+        """
+        Parse a frequency like "Every single day", "twice a week" or "monthly"
+
+        Args:
+            text: User's message
+
+        Returns:
+            (normalized value, confidence), or None if no frequency was found
+        """
+        found = []
+        unsure = False
+
+        for match in TIMES_PATTERN.finditer(text):
+            period = match.group('period').lower()
+            word = (match.group('word') or '').lower()
+            if word == 'once':
+                found.append({'day': 'daily', 'week': 'weekly', 'month': 'monthly'}[period])
+                continue
+            times = {'twice': 2, 'thrice': 3}.get(word) or _to_number(match.group('count'))
+            found.append(f"{_format_number(times)} times per {period}")
+
+        rest = TIMES_PATTERN.sub(' ', text)
+        for match in WEEKDAYS_PATTERN.finditer(rest):
+            weekdays = match.group('weekdays').lower()
+            if weekdays.startswith('weekday'):
+                found.append("5 times per week")
+                continue
+            # "Mondays and Thursdays" may be alternatives rather than both
+            times = len(set(re.findall(WEEKDAY, weekdays, re.IGNORECASE)))
+            found.append("weekly" if times == 1 else f"{times} times per week")
+            unsure = unsure or times > 1
+
+        # Anything else that sounds like a frequency makes the answer ambiguous;
+        # each match is blanked out so "every other day" is not also "a day"
+        rest = WEEKDAYS_PATTERN.sub(' ', rest)
+        for pattern, normalized in FREQUENCY_PATTERNS:
+            matches = re.findall(pattern, rest, re.IGNORECASE)
+            if matches:
+                found.extend([normalized] * len(matches))
+                rest = re.sub(pattern, ' ', rest, flags=re.IGNORECASE)
+
+        if not found:
+            return None
+        return (found[0], 'high' if len(set(found)) == 1 and not unsure else 'low')
+
+    def parse_headcount(self, text: str):
+        """
+        Parse a team size like "2 people", "just me" or "me and my assistant"
+
+        Args:
+            text: User's message
+
+        Returns:
+            (normalized value, confidence), or None if no team size was found
+        """
+        # A count after "me and" may or may not include the speaker: add them, but let the LLM check
+        match = PLUS_COUNT_PATTERN.search(text)
+        if match:
+            return (self._headcount(match, extra=1), 'low')
+
+        match = HEADCOUNT_PATTERN.search(text)
+        if match:
+            return (self._headcount(match), 'high')
+
+        if PLUS_ONE_PATTERN.search(text):
+            return ("2 people", 'high')
+
+        if SOLO_PATTERN.search(text):
+            return ("1 person", 'high')
+
+        return None
+
+    @staticmethod
+    def _headcount(match, extra: int = 0) -> str:
+        """Normalized team size of a headcount match, plus extra people"""
+        low = _to_number(match.group(1)) + extra
+        if match.group(2):
+            return f"{_format_number(low)}-{_format_number(_to_number(match.group(2)) + extra)} people"
+        return f"{_format_number(low)} {'person' if low == 1 else 'people'}"
+
+    def extract(self, user_message: str, memory_state: dict, asked: tuple) -> dict:
+        """
+        Try to answer the asked field (and any other rule-parsable ones) locally
+
+        Args:
+            user_message: What the user said
+            memory_state: Current state (filled fields are not re-extracted)
+            asked: (section, field) we're currently asking about
+
+        Returns:
+            {'section.field': {'value': ..., 'confidence': 'high'}} when the
+            asked field was parsed with high confidence, otherwise None
+        """
+        if asked not in self.FIELDS or len(user_message.split()) > MAX_FAST_WORDS:
+            return None
+
+        fields = {}
+        for (section, field), parser in self.FIELDS.items():
+            if memory_state[section].get(field):
+                continue
+            if parser == 'parse_duration':
+                # Only a direct answer to "how long" may be in days
+                result = self.parse_duration(user_message, days=(section, field) == asked)
+            else:
+                result = getattr(self, parser)(user_message)
+            if result and result[1] == 'high':
+                fields[f"{section}.{field}"] = {'value': result[0], 'confidence': 'high'}
+
+        if f"{asked[0]}.{asked[1]}" not in fields:
+            self.stats['fallthroughs'] += 1
+            return None
+
+        self.stats['hits'] += 1
+        return fields
@@ -0,0 +1,295 @@
+"""
+JSON Parser - Tolerant parsing of JSON in LLM replies
+
+LLM replies wrap JSON in code fences and prose, and sometimes break it:
+trailing commas, Python literals (True/None), single quotes, comments, or a
+reply cut off by max_tokens. parse_json() finds the first JSON object in a
+reply and repairs these defects instead of failing the whole turn.
+IncrementalJSONParser does the same on a token stream, returning the best
+partial value after each chunk.
+"""
+
+import json
+
+
+class JSONParseError(ValueError):
+    """No JSON value could be recovered from a reply"""
+
+
+# Python-style literals some models emit instead of JSON ones
+LITERALS = {'True': 'true', 'False': 'false', 'None': 'null'}
+
+# Candidate start positions tried before giving up
+MAX_STARTS = 5
+
+_decoder = json.JSONDecoder(strict=False)
+
+
+class _Repairer:
+    """
+    Streaming rewriter from almost-JSON to JSON
+
+    Fed one chunk at a time, it copies the first JSON value it sees into
+    `out`, converting quotes, literals and comments, dropping trailing
+    commas, and remembering cut points where the value can be closed if the
+    input ends early.
+    """
+
+    def __init__(self, opener: str = '{'):
+        self.openers = opener or '{['
+        self.started = False
+        self.done = False
+        self.out = []
+        self.stack = []             # Closers for the open containers
+        self.cuts = []              # (len(out), stack) where a truncated value can be closed
+        self.quote = None           # Quote char of the open string, if any
+        self.escape = False
+        self.word = []              # Pending bare word (true/True/None, ...)
+        self.comment = None         # 'line' or 'block' while skipping a comment
+        self.slash = False          # Previous char was a '/' outside a string
+        self.star = False           # Previous char was a '*' inside a block comment
+
+    def feed(self, text: str) -> int:
+        """
+        Consume text
+
+        Returns:
+            Number of completed elements (commas or closers) seen in this text
+        """
+        boundaries = 0
+        for ch in text:
+            if self.done:
+                break
+            if not self.started:
+                if ch in self.openers:
+                    self.started = True
+                    self._open(ch)
+                continue
+            boundaries += self._char(ch)
+        return boundaries
+
+    def _open(self, ch: str):
+        self.stack.append('}' if ch == '{' else ']')
+        self.out.append(ch)
+        self.cuts.append((len(self.out), tuple(self.stack)))
+
+    def _flush_word(self):
+        if self.word:
+            word = ''.join(self.word)
+            self.out.append(LITERALS.get(word, word))
+            self.word = []
+
+    def _drop_trailing_comma(self):
+        end = len(self.out)
+        while end and self.out[end - 1].isspace():
+            end -= 1
+        if end and self.out[end - 1] == ',':
+            del self.out[end - 1:]
+
+    def _char(self, ch: str) -> int:
+        # Comments
+        if self.comment == 'line':
+            if ch == '\n':
+                self.comment = None
+            return 0
+        if self.comment == 'block':
+            if self.star and ch == '/':
+                self.comment = None
+            self.star = ch == '*'
+            return 0
+        if self.slash:
+            self.slash = False
+            if ch == '/':
+                self.comment = 'line'
+                return 0
+            if ch == '*':
+                self.comment = 'block'
+                return 0
+            self.out.append('/')
+
+        # Strings
+        if self.quote:
+            if self.escape:
+                self.escape = False
+                if ch == "'" and self.quote == "'":
+                    self.out[-1] = "'"      # \' is not a JSON escape
+                else:
+                    self.out.append(ch)
+            elif ch == '\\':
+                self.escape = True
+                self.out.append(ch)
+            elif ch == self.quote:
+                self.quote = None
+                self.out.append('"')
+            elif ch == '"':
+                self.out.append('\\"')
+            else:
+                self.out.append(ch)
+            return 0
+
+        if ch.isalpha() or ch == '_':
+            self.word.append(ch)
+            return 0
+        self._flush_word()
+
+        if ch in '"\'':
+            self.quote = ch
+            self.out.append('"')
+        elif ch == '/':
+            self.slash = True
+        elif ch in '{[':
+            self._open(ch)
+        elif ch in '}]':
+            self._drop_trailing_comma()
+            if self.stack and self.stack[-1] == ch:
+                self.stack.pop()
+            self.out.append(ch)
+            if not self.stack:
+                self.done = True
+            return 1
+        elif ch == ',':
+            self.cuts.append((len(self.out), tuple(self.stack)))
+            self.out.append(ch)
+            return 1
+        else:
+            self.out.append(ch)
+        return 0
+
+    def candidates(self):
+        """
+        Texts to try loading, best first: the whole value closed where it
+        stands, then the value closed at each earlier cut point
+
+        Yields:
+            JSON text
+        """
+        if not self.started:
+            return
+        out = list(self.out)
+        if self.word:
+            word = ''.join(self.word)
+            out.append(LITERALS.get(word, word))
+        if self.quote:
+            if self.escape:
+                out.pop()
+            out.append('"')
+        text = ''.join(out).rstrip()
+        if text.endswith(','):
+            text = text[:-1]
+        elif text.endswith(':'):
+            text += 'null'
+        yield text + ''.join(reversed(self.stack))
+
+        if not self.done:
+            for position, stack in reversed(self.cuts):
+                yield ''.join(self.out[:position]) + ''.join(reversed(stack))
+
+
+def _load_candidates(repairer: _Repairer, expect):
+    """First candidate of a repairer that loads as the expected type, or None"""
+    for text in repairer.candidates():
+        try:
+            value = json.loads(text, strict=False)
+        except ValueError:
+            continue
+        if expect is None or isinstance(value, expect):
+            return value
+    return None
+
+
+def parse_json(text: str, expect: type = dict):
+    """
+    Parse the first JSON value in an LLM reply, repairing common defects
+
+    Handles code fences and surrounding prose, trailing commas, Python
+    literals, single-quoted strings, comments and truncated replies (which
+    are closed after the last complete element).
+
+    Args:
+        text: The raw reply
+        expect: dict or list to look for that type only, None for either
+
+    Returns:
+        The parsed value
+
+    Raises:
+        JSONParseError: If no value of the expected type can be recovered
+    """
+    if not text:
+        raise JSONParseError("empty reply")
+
+    opener = {dict: '{', list: '['}.get(expect, '{[')
+    start = -1
+    for _ in range(MAX_STARTS):
+        start = min((i for i in (text.find(ch, start + 1) for ch in opener) if i >= 0), default=-1)
+        if start < 0:
+            break
+
+        # Fast path: valid JSON, possibly followed by prose or a closing fence
+        try:
+            value, _ = _decoder.raw_decode(text, start)
+            if expect is None or isinstance(value, expect):
+                return value
+        except ValueError:
+            pass
+
+        repairer = _Repairer(opener)
+        repairer.feed(text[start:])
+        value = _load_candidates(repairer, expect)
+        if value is not None:
+            return value
+
+    raise JSONParseError(f"no JSON {getattr(expect, '__name__', 'value')} found in reply: {text[:80]!r}")
+
+
+class IncrementalJSONParser:
+    def __init__(self, expect: type = dict):
+        """
+        Parse a JSON reply as it streams in
+
+        Args:
+            expect: dict or list to look for that type only, None for either
+        """
+        self.expect = expect
+        self._repairer = _Repairer({dict: '{', list: '['}.get(expect, '{['))
+        self.value = None
+
+    @property
+    def complete(self) -> bool:
+        """True once the top-level value has been closed"""
+        return self._repairer.done
+
+    def feed(self, chunk: str):
+        """
+        Add streamed text
+
+        The partial value is only re-parsed when an element was completed
+        in this chunk, so feeding token by token stays cheap.
+
+        Args:
+            chunk: Next piece of the reply
+
+        Returns:
+            The best partial value so far (None until something parses)
+        """
+        if self._repairer.feed(chunk):
+            value = _load_candidates(self._repairer, self.expect)
+            if value is not None:
+                self.value = value
+        return self.value
+
+    def result(self):
+        """
+        Get the final value once the stream has ended
+
+        Returns:
+            The parsed (and, if truncated, closed) value
+
+        Raises:
+            JSONParseError: If nothing could be recovered
+        """
+        value = _load_candidates(self._repairer, self.expect)
+        if value is None:
+            raise JSONParseError("no JSON value found in streamed reply")
+        self.value = value
+        return value
@@ -0,0 +1,1085 @@
+"""
+LLM Client - Shared, Pooled Connection to the LLM Backend
+
+One process-wide client that every tool gets injected with, so all tools
+(and all sessions) reuse the same keep-alive HTTP connection pool instead
+of each tool opening its own.
+"""
+
+import os
+import time
+import asyncio
+import threading
+import contextvars
+import weakref
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import httpx
+from groq import Groq, AsyncGroq, RateLimitError, APITimeoutError, InternalServerError, BadRequestError
+from dotenv import load_dotenv
+
+from tools.response_cache import ResponseCache
+from tools.llm_metrics import LLMMetrics, current_session_metrics
+from tools.model_router import ModelRouter, get_shared_router
+from tools.llm_scheduler import LLMScheduler
+from tools.retry_policy import RetryPolicy
+from tools.single_flight import SingleFlight, FlightAbandoned
+
+load_dotenv()
+
+DEFAULT_MODEL = "llama-3.3-70b-versatile"
+
+# Errors after which a call moves on to its next fallback model
+FALLBACK_ERRORS = (RateLimitError, APITimeoutError, InternalServerError)
+
+
+class LLMClient:
+    def __init__(self, api_key: str = None, pool_size: int = None, keepalive_expiry: float = None,
+                 cache: ResponseCache = None, base_url: str = None, router: ModelRouter = None,
+                 scheduler: LLMScheduler = None, timeout: float = None, coalesce: bool = None):
+        """
+        Initialize the shared LLM client
+
+        Args:
+            api_key: Groq API key (defaults to GROQ_API_KEY)
+            pool_size: Max pooled connections (defaults to LLM_POOL_SIZE, or 20)
+            keepalive_expiry: Seconds an idle connection is kept open
+                (defaults to LLM_KEEPALIVE_EXPIRY, or 30)
+            cache: Response cache (defaults to a ResponseCache unless
+                LLM_CACHE_ENABLED=0; pass False to disable)
+            base_url: API endpoint, e.g. a local stand-in server (defaults to
+                LLM_BASE_URL, then GROQ_BASE_URL, then the Groq API)
+            router: Model router tracking fallback cooldowns (defaults to
+                the process-wide router)
+            scheduler: Rate limiter / priority queue every request goes
+                through (defaults to one using LLM_RPM and LLM_TPM)
+            timeout: Seconds per attempt for calls whose route sets none
+                (defaults to LLM_TIMEOUT, or 60)
+            coalesce: Share one upstream call between identical concurrent
+                requests (defaults to True unless LLM_COALESCE=0)
+        """
+        self.pool_size = pool_size or int(os.getenv("LLM_POOL_SIZE", "20"))
+        self.keepalive_expiry = keepalive_expiry or float(os.getenv("LLM_KEEPALIVE_EXPIRY", "30"))
+
+        # Connection reuse counters
+        self._lock = threading.Lock()
+        self._seen_connections = weakref.WeakSet()
+        self.stats = {
+            'requests': 0,
+            'new_connections': 0,
+            'reused_connections': 0,
+        }
+
+        # One keep-alive pool shared by every tool using this client
+        self.http_client = httpx.Client(
+            limits=httpx.Limits(
+                max_connections=self.pool_size,
+                max_keepalive_connections=self.pool_size,
+                keepalive_expiry=self.keepalive_expiry
+            ),
+            event_hooks={'response': [self._track_connection]}
+        )
+
+        # Response cache shared by every tool using this client
+        if cache is None and os.getenv("LLM_CACHE_ENABLED", "1") != "0":
+            cache = ResponseCache()
+        self.cache = cache or None
+
+        # Identical requests in flight at the same time share one upstream call
+        if coalesce is None:
+            coalesce = os.getenv("LLM_COALESCE", "1") != "0"
+        self.flights = SingleFlight() if coalesce else None
+
+        self.api_key = api_key or os.getenv("GROQ_API_KEY")
+        self.base_url = base_url or os.getenv("LLM_BASE_URL") or None
+        self.timeout = timeout or float(os.getenv("LLM_TIMEOUT", "60"))
+
+        # Retries are done by the route's RetryPolicy, not the SDK
+        self.retry_policy = RetryPolicy()
+        self.groq = Groq(
+            api_key=self.api_key,
+            base_url=self.base_url,
+            http_client=self.http_client,
+            max_retries=0,
+            timeout=self.timeout
+        )
+
+        # Per-call instrumentation, aggregated for the whole process
+        self.metrics = LLMMetrics()
+
+        self.router = router or get_shared_router()
+
+        # Every request waits here for its turn under the RPM/TPM limits
+        self.scheduler = scheduler or LLMScheduler()
+
+        # Async counterparts, one per event loop (created on its first async call)
+        self._async_clients = weakref.WeakKeyDictionary()     # loop → (httpx.AsyncClient, AsyncGroq)
+
+        # Threads for hedged requests and for finishing shared streams,
+        # created on first use
+        self._background_pool = None
+
+        # Background tasks finishing shared requests whose leader went away
+        self._tasks = set()
+
+        print(f"🔌 LLM client initialized (pool size: {self.pool_size})")
+        if self.base_url:
+            print(f"🔌 Using LLM endpoint: {self.base_url}")
+
+    def _track_connection(self, response: httpx.Response):
+        """Count whether a response came over a new or a reused connection"""
+        stream = response.extensions.get('network_stream')
+
+        with self._lock:
+            self.stats['requests'] += 1
+            if stream is None:
+                return
+            if stream in self._seen_connections:
+                self.stats['reused_connections'] += 1
+            else:
+                self._seen_connections.add(stream)
+                self.stats['new_connections'] += 1
+
+    async def _atrack_connection(self, response: httpx.Response):
+        """Async event hook wrapper around _track_connection()"""
+        self._track_connection(response)
+
+    @property
+    def agroq(self) -> AsyncGroq:
+        """
+        Async Groq client for the running event loop, sharing this client's
+        pool settings and counters
+
+        Async connections belong to the loop that opened them, so each loop
+        (e.g. one asyncio.run() per request) gets its own pool; pools of
+        loops that have closed are dropped.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = self._async_clients.get(loop)
+            if entry is None:
+                for closed in [other for other in self._async_clients if other.is_closed()]:
+                    del self._async_clients[closed]
+                http_client = httpx.AsyncClient(
+                    limits=httpx.Limits(
+                        max_connections=self.pool_size,
+                        max_keepalive_connections=self.pool_size,
+                        keepalive_expiry=self.keepalive_expiry
+                    ),
+                    event_hooks={'response': [self._atrack_connection]}
+                )
+                entry = (http_client, AsyncGroq(api_key=self.api_key, base_url=self.base_url,
+                                                http_client=http_client, max_retries=0, timeout=self.timeout))
+                self._async_clients[loop] = entry
+        return entry[1]
+
+    def _background(self) -> ThreadPoolExecutor:
+        """Thread pool for hedged requests and shared-stream draining"""
+        with self._lock:
+            if self._background_pool is None:
+                self._background_pool = ThreadPoolExecutor(max_workers=self.pool_size,
+                                                           thread_name_prefix="llm-background")
+            return self._background_pool
+
+    def _cache_key(self, use_cache: bool, model: str, prompt: str, temperature: float,
+                   max_tokens: int, prompt_version: str):
+        """Cache key for a request, or None when caching doesn't apply"""
+        if not use_cache or self.cache is None:
+            return None
+        return ResponseCache.make_key(model, prompt, temperature, max_tokens, prompt_version)
+
+    def _flight_key(self, use_cache: bool, model: str, prompt: str, temperature: float,
+                    max_tokens: int, prompt_version: str, json_mode: bool = False):
+        """
+        Identity of a request for coalescing, or None when it must not be shared
+
+        Calls that opt out of the cache want a fresh answer, so they are
+        not coalesced either.
+        """
+        if not use_cache or self.flights is None:
+            return None
+        key = ResponseCache.make_key(model, prompt, temperature, max_tokens, prompt_version)
+        return key + ':json' if json_mode else key
+
+    @staticmethod
+    def _request_params(prompt: str, model: str, temperature: float, max_tokens: int,
+                        stream: bool = False, json_mode: bool = False) -> dict:
+        """Build the chat completion request parameters"""
+        params = {
+            'messages': [{"role": "user", "content": prompt}],
+            'model': model,
+            'temperature': temperature,
+        }
+        if max_tokens:
+            params['max_tokens'] = max_tokens
+        if stream:
+            params['stream'] = True
+        if json_mode:
+            params['response_format'] = {'type': 'json_object'}
+        return params
+
+    @staticmethod
+    def _failed_generation(error: Exception):
+        """Reply text the backend rejected in JSON mode, or None for other errors"""
+        if not isinstance(error, BadRequestError):
+            return None
+        body = error.body
+        if isinstance(body, dict) and isinstance(body.get('error'), dict):
+            body = body['error']
+        if isinstance(body, dict) and body.get('code') == 'json_validate_failed':
+            return body.get('failed_generation') or None
+        return None
+
+    def _start_call(self, call_name: str, model: str, temperature: float, max_tokens: int,
+                    streamed: bool, cache_key) -> dict:
+        """Begin an instrumentation record for one completion call"""
+        return {
+            'call_name': call_name,
+            'model': model,
+            'temperature': temperature,
+            'max_tokens': max_tokens,
+            'streamed': streamed,
+            'cache': 'off' if cache_key is None else 'miss',
+            'started_at': time.time(),
+            'wall_time_s': None,
+            'ttft_s': None,
+            'prompt_tokens': None,
+            'completion_tokens': None,
+            'retries': 0,
+            'fallbacks': 0,
+            'hedged': False,
+            'hedge_won': False,
+            'coalesced': False,
+            'priority': self.scheduler.priority_for(call_name),
+            'queue_wait_s': 0.0,
+            'error': None,
+            'phase': None,
+            '_started': time.perf_counter(),
+        }
+
+    def _finish_call(self, call: dict, error: BaseException = None):
+        """Complete a record and add it to the process and session metrics"""
+        call['wall_time_s'] = round(time.perf_counter() - call.pop('_started'), 4)
+        if error is not None:
+            call['error'] = f"{type(error).__name__}: {error}"
+
+        # Replace the up-front token estimate with the real usage
+        ticket = call.pop('_ticket', None)
+        if ticket is not None and call['prompt_tokens'] is not None:
+            self.scheduler.settle(ticket, call['prompt_tokens'] + (call['completion_tokens'] or 0))
+
+        session = current_session_metrics.get()
+        if session is not None:
+            call['phase'] = session.current_phase()
+
+        self.metrics.record(call)
+        if session is not None:
+            session.record(call)
+
+    @staticmethod
+    def _apply_usage(call: dict, usage):
+        """Copy token counts from a response usage object"""
+        if usage is not None:
+            call['prompt_tokens'] = getattr(usage, 'prompt_tokens', None)
+            call['completion_tokens'] = getattr(usage, 'completion_tokens', None)
+
+    @staticmethod
+    def _chunk_usage(chunk):
+        """Usage reported on a stream chunk (Groq sends it in x_groq on the last one)"""
+        x_groq = getattr(chunk, 'x_groq', None)
+        if x_groq is not None and getattr(x_groq, 'usage', None) is not None:
+            return x_groq.usage
+        return getattr(chunk, 'usage', None)
+
+    def _fallback_chain(self, model: str, fallback_models: list) -> list:
+        """Models to try for a call, skipping ones that are cooling down"""
+        if not fallback_models:
+            return [model]
+        return self.router.candidates([model] + [m for m in fallback_models if m != model])
+
+    @staticmethod
+    def _retry_after(error: Exception):
+        """Seconds from an error response's Retry-After header, or None"""
+        response = getattr(error, 'response', None)
+        if response is None:
+            return None
+        try:
+            return float(response.headers.get('retry-after'))
+        except (TypeError, ValueError):
+            return None
+
+    def _on_fallback(self, call: dict, model: str, error: Exception):
+        """Put a failing model in cooldown before trying the next one"""
+        self.router.mark_unavailable(model, self._retry_after(error))
+        call['fallbacks'] += 1
+        print(f"⚠️ {type(error).__name__} from {model}, falling back")
+
+    def _estimate(self, params: dict) -> int:
+        """Estimated token cost of a request, charged to the TPM bucket up front"""
+        prompt = ''.join(message['content'] for message in params['messages'])
+        return self.scheduler.estimate_tokens(prompt, params.get('max_tokens'))
+
+    def _admitted(self, call: dict, ticket: dict):
+        """Note the scheduler ticket and queue wait of an attempt"""
+        # The request this replaces (a retry or fallback) failed: give its estimate back
+        self.scheduler.settle(call.get('_ticket'), 0)
+        call['_ticket'] = ticket
+        call['queue_wait_s'] = round(call['queue_wait_s'] + ticket.get('waited_s', 0.0), 4)
+
+    def _on_error(self, model: str, error: Exception):
+        """Hold the model's queue after a rate limit so other sessions don't pile on"""
+        if isinstance(error, RateLimitError):
+            self.scheduler.pause(model, self._retry_after(error) or 1.0)
+
+    def _create_once(self, params: dict, fallback_models: list, timeout: float, call: dict):
+        """
+        One attempt: send the request down the fallback chain, moving on
+        from a model on rate limits, overloads and timeouts. Each model
+        first waits for its turn in the scheduler.
+
+        Returns:
+            The raw response of the first model that answered
+        """
+        models = self._fallback_chain(params['model'], fallback_models)
+        for index, model in enumerate(models):
+            call['model'] = model
+            self._admitted(call, self.scheduler.acquire(model, self._estimate(params), call['priority']))
+            try:
+                return self.groq.chat.completions.with_raw_response.create(
+                    **dict(params, model=model), timeout=timeout or self.timeout
+                )
+            except FALLBACK_ERRORS as e:
+                self._on_error(model, e)
+                if index == len(models) - 1:
+                    raise
+                self._on_fallback(call, model, e)
+
+    async def _acreate_once(self, params: dict, fallback_models: list, timeout: float, call: dict):
+        """Async variant of _create_once()"""
+        models = self._fallback_chain(params['model'], fallback_models)
+        for index, model in enumerate(models):
+            call['model'] = model
+            self._admitted(call, await self.scheduler.aacquire(model, self._estimate(params), call['priority']))
+            try:
+                return await self.agroq.chat.completions.with_raw_response.create(
+                    **dict(params, model=model), timeout=timeout or self.timeout
+                )
+            except FALLBACK_ERRORS as e:
+                self._on_error(model, e)
+                if index == len(models) - 1:
+                    raise
+                self._on_fallback(call, model, e)
+
+    def _retry_wait(self, call: dict, policy: RetryPolicy, error: Exception, attempt: int) -> float:
+        """Count a retry and get its backoff, or re-raise if the policy says stop"""
+        if call.get('_abandoned') or not policy.should_retry(error, attempt):
+            raise error
+        delay = policy.delay(attempt, self._retry_after(error))
+        call['retries'] += 1
+        print(f"🔁 {type(error).__name__}, retrying in {delay:.1f}s (attempt {attempt + 1}/{policy.max_attempts})")
+        return delay
+
+    def _create(self, params: dict, fallback_models: list, timeout: float, call: dict,
+                policy: RetryPolicy = None):
+        """
+        Send a chat completion request, retrying per the retry policy
+
+        Returns:
+            The raw response
+        """
+        policy = policy or self.retry_policy
+        attempt = 0
+        while True:
+            try:
+                return self._create_once(params, fallback_models, timeout, call)
+            except Exception as e:
+                attempt += 1
+                time.sleep(self._retry_wait(call, policy, e, attempt))
+
+    async def _acreate(self, params: dict, fallback_models: list, timeout: float, call: dict,
+                       policy: RetryPolicy = None):
+        """Async variant of _create()"""
+        policy = policy or self.retry_policy
+        attempt = 0
+        while True:
+            try:
+                return await self._acreate_once(params, fallback_models, timeout, call)
+            except Exception as e:
+                attempt += 1
+                await asyncio.sleep(self._retry_wait(call, policy, e, attempt))
+
+    def _hedge_delay(self, call: dict, policy: RetryPolicy):
+        """Seconds after which to hedge this call, or None to not hedge"""
+        if not policy.hedge or self.scheduler.pressure()['saturated']:
+            return None
+        return self.metrics.latency_percentile(call['call_name'], policy.hedge_percentile,
+                                               policy.hedge_min_samples)
+
+    @staticmethod
+    def _take_attempt(call: dict, attempt: dict, hedged: bool, hedge_won: bool):
+        """Copy the bookkeeping of the attempt whose answer is used into the call record"""
+        for key in ('model', 'retries', 'fallbacks', 'queue_wait_s', '_ticket'):
+            if key in attempt:
+                call[key] = attempt[key]
+        call['hedged'] = hedged
+        call['hedge_won'] = hedge_won
+
+    def _settle_loser(self, attempt: dict, future):
+        """
+        Settle the scheduler ticket of an attempt that lost a hedge race,
+        once it has finished: to its real usage if it got an answer, else
+        give the whole estimate back
+        """
+        ticket = attempt.pop('_ticket', None)
+        if ticket is None:
+            return
+        tokens = 0
+        if not future.cancelled() and future.exception() is None:
+            try:
+                usage = future.result().http_response.json().get('usage') or {}
+                tokens = (usage.get('prompt_tokens') or 0) + (usage.get('completion_tokens') or 0)
+            except (ValueError, AttributeError):
+                tokens = None
+        self.scheduler.settle(ticket, tokens)
+
+    def _settle_losers(self, futures: list, attempts: list, winner: int):
+        """Settle every attempt but the winner's as it finishes (the winner's is settled with its call)"""
+        for index, future in enumerate(futures):
+            if index != winner:
+                future.add_done_callback(lambda done, attempt=attempts[index]: self._settle_loser(attempt, done))
+
+    def _started_create(self, started: threading.Event, params: dict, fallback_models: list, timeout: float,
+                        call: dict, policy: RetryPolicy):
+        """_create() on a background thread, setting `started` once the attempt is running"""
+        started.set()
+        return self._create(params, fallback_models, timeout, call, policy)
+
+    def _hedged_create(self, params: dict, fallback_models: list, timeout: float, call: dict,
+                       policy: RetryPolicy = None):
+        """
+        _create(), plus a duplicate request once the call outlives the p95
+        latency of its call name; the first answer wins
+
+        Returns:
+            The raw response
+        """
+        policy = policy or self.retry_policy
+        hedge_after = self._hedge_delay(call, policy)
+        if hedge_after is None:
+            return self._create(params, fallback_models, timeout, call, policy)
+
+        attempts = [dict(call)]
+        started = threading.Event()
+        futures = [self._background().submit(self._started_create, started, params, fallback_models, timeout,
+                                             attempts[0], policy)]
+        # Time the attempt from when it starts, not from when it was queued
+        # behind other background work
+        started.wait()
+        done, _ = wait(futures, timeout=hedge_after)
+        if not done:
+            print(f"🏁 {call['call_name']} slower than p{policy.hedge_percentile:g} ({hedge_after:.2f}s), hedging")
+            attempts.append(dict(call))
+            futures.append(self._background().submit(self._create, params, fallback_models, timeout, attempts[1], policy))
+
+        # The loser of a sync race can't be interrupted; it finishes in the
+        # background, without retrying
+        pending = set(futures)
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    index = futures.index(future)
+                    for attempt in attempts:
+                        attempt['_abandoned'] = attempt is not attempts[index]
+                    self._settle_losers(futures, attempts, index)
+                    self._take_attempt(call, attempts[index], len(futures) > 1, index == 1)
+                    return future.result()
+                error = error or future.exception()
+        self._settle_losers(futures, attempts, 0)
+        self._take_attempt(call, attempts[0], len(futures) > 1, False)
+        raise error
+
+    async def _ahedged_create(self, params: dict, fallback_models: list, timeout: float, call: dict,
+                              policy: RetryPolicy = None):
+        """Async variant of _hedged_create(); the losing request is cancelled"""
+        policy = policy or self.retry_policy
+        hedge_after = self._hedge_delay(call, policy)
+        if hedge_after is None:
+            return await self._acreate(params, fallback_models, timeout, call, policy)
+
+        attempts = [dict(call)]
+        tasks = [asyncio.ensure_future(self._acreate(params, fallback_models, timeout, attempts[0], policy))]
+        done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+        if not done:
+            print(f"🏁 {call['call_name']} slower than p{policy.hedge_percentile:g} ({hedge_after:.2f}s), hedging")
+            attempts.append(dict(call))
+            tasks.append(asyncio.ensure_future(self._acreate(params, fallback_models, timeout, attempts[1], policy)))
+
+        pending = set(tasks)
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        index = tasks.index(task)
+                        self._settle_losers(tasks, attempts, index)
+                        self._take_attempt(call, attempts[index], len(tasks) > 1, index == 1)
+                        return task.result()
+                    error = error or task.exception()
+        finally:
+            for task in pending:
+                task.cancel()
+        self._settle_losers(tasks, attempts, 0)
+        self._take_attempt(call, attempts[0], len(tasks) > 1, False)
+        raise error
+
+    def _finish_follower(self, call: dict, error: BaseException = None):
+        """Record a call answered by another caller's in-flight request"""
+        call['coalesced'] = True
+        self._finish_call(call, error)
+
+    def _land(self, flight, text: str = None, error: BaseException = None, abandoned: bool = False):
+        """Hand the leader's outcome to the callers sharing its request"""
+        if flight is None:
+            return
+        if text:
+            flight.push(text)
+        self.flights.land(flight, error, abandoned)
+
+    def _follow(self, flight_key, call: dict) -> tuple:
+        """
+        Join the in-flight request for a key, waiting for its reply if an
+        identical call is already being made
+
+        Returns:
+            (flight, None) when this caller leads and makes the request,
+            (None, text) with the leader's reply, or (None, None) when the
+            request is not shared
+        """
+        while flight_key is not None:
+            flight, leader = self.flights.join(flight_key)
+            if leader:
+                return flight, None
+            try:
+                text = ''.join(flight.follow())
+            except FlightAbandoned:
+                continue
+            except Exception as e:
+                self._finish_follower(call, e)
+                raise
+            self._finish_follower(call)
+            return None, text
+        return None, None
+
+    async def _afollow(self, flight_key, call: dict) -> tuple:
+        """Async variant of _follow()"""
+        while flight_key is not None:
+            flight, leader = self.flights.join(flight_key)
+            if leader:
+                return flight, None
+            try:
+                text = ''.join([part async for part in flight.afollow()])
+            except FlightAbandoned:
+                continue
+            except Exception as e:
+                self._finish_follower(call, e)
+                raise
+            self._finish_follower(call)
+            return None, text
+        return None, None
+
+    @staticmethod
+    def _reply_key(call: dict, model: str, cache_key):
+        """
+        Cache key to store a reply under: None if a fallback model answered,
+        since the key names the requested model and the reply would then be
+        served (and checkpointed) as if that model had written it
+        """
+        return cache_key if call['model'] == model else None
+
+    def _upstream_failed(self, call: dict, flight, error: Exception) -> str:
+        """Settle a failed completion request: return the rejected JSON-mode reply, or re-raise"""
+        self._finish_call(call, error)
+        recovered = self._failed_generation(error)
+        if recovered is None:
+            self._land(flight, error=error)
+            raise error
+        print("⚠️ Reply failed JSON validation, returning it for lenient parsing")
+        self._land(flight, recovered)
+        return recovered
+
+    def _upstream_reply(self, call: dict, flight, cache_key, response) -> str:
+        """Settle a completion request: record usage, cache the reply and share it with any followers"""
+        text = response.choices[0].message.content
+        self._apply_usage(call, response.usage)
+        self._finish_call(call)
+
+        if cache_key is not None and text:
+            self.cache.set(cache_key, text)
+
+        self._land(flight, text)
+        return text
+
+    def _complete_upstream(self, params: dict, fallback_models: list, timeout: float, call: dict,
+                           retry_policy: RetryPolicy, cache_key, flight) -> str:
+        """Make a completion request, then cache the reply and share it with any followers"""
+        try:
+            raw = self._hedged_create(params, fallback_models, timeout, call, retry_policy)
+            response = raw.parse()
+        except Exception as e:
+            return self._upstream_failed(call, flight, e)
+        except BaseException:
+            self._land(flight, abandoned=True)
+            raise
+
+        return self._upstream_reply(call, flight, self._reply_key(call, params['model'], cache_key), response)
+
+    async def _acomplete_upstream(self, params: dict, fallback_models: list, timeout: float, call: dict,
+                                  retry_policy: RetryPolicy, cache_key, flight) -> str:
+        """Async variant of _complete_upstream()"""
+        try:
+            raw = await self._ahedged_create(params, fallback_models, timeout, call, retry_policy)
+            response = await raw.parse()
+        except Exception as e:
+            return self._upstream_failed(call, flight, e)
+        except BaseException:
+            self._land(flight, abandoned=True)
+            raise
+
+        return self._upstream_reply(call, flight, self._reply_key(call, params['model'], cache_key), response)
+
+    def _chunk_delta(self, call: dict, chunk):
+        """Text delta of one streamed chunk, noting usage and time to first token"""
+        usage = self._chunk_usage(chunk)
+        if usage is not None:
+            self._apply_usage(call, usage)
+        if not chunk.choices:
+            return None
+        delta = chunk.choices[0].delta.content
+        if delta and call['ttft_s'] is None:
+            call['ttft_s'] = round(time.perf_counter() - call['_started'], 4)
+        return delta
+
+    def _stream_failed(self, call: dict, flight, error: BaseException):
+        """Settle a stream whose request failed (or was interrupted) before any text"""
+        if isinstance(error, Exception):
+            self._finish_call(call, error)
+            self._land(flight, error=error)
+        else:
+            self._land(flight, abandoned=True)
+
+    def _deltas(self, response, call: dict):
+        """Text deltas of a streamed response"""
+        for chunk in response:
+            delta = self._chunk_delta(call, chunk)
+            if delta:
+                yield delta
+
+    async def _adeltas(self, response, call: dict):
+        """Async variant of _deltas()"""
+        async for chunk in response:
+            delta = self._chunk_delta(call, chunk)
+            if delta:
+                yield delta
+
+    def _end_stream(self, call: dict, flight, cache_key, parts: list, completed: bool,
+                    error: BaseException = None):
+        """Record a stream's call, cache it if it finished and end its flight"""
+        self._finish_call(call, error)
+        if completed and cache_key is not None and parts:
+            self.cache.set(cache_key, ''.join(parts))
+        if flight is not None:
+            self.flights.land(flight, error, abandoned=not completed and error is None)
+
+    def _hand_off(self, call: dict, flight) -> bool:
+        """Note that a stream's consumer stopped reading; True if identical calls still need the rest"""
+        call['cancelled'] = True
+        return flight is not None and not self.flights.release(flight)
+
+    def _drain(self, deltas, response, call: dict, flight, parts: list, cache_key):
+        """Finish reading a stream its consumer stopped reading, for the callers sharing it"""
+        error = None
+        completed = False
+        try:
+            for delta in deltas:
+                parts.append(delta)
+                flight.push(delta)
+            completed = True
+        except Exception as e:
+            error = e
+        finally:
+            response.close()
+            self._end_stream(call, flight, cache_key, parts, completed, error)
+
+    async def _adrain(self, deltas, response, call: dict, flight, parts: list, cache_key):
+        """Async variant of _drain()"""
+        error = None
+        completed = False
+        try:
+            async for delta in deltas:
+                parts.append(delta)
+                flight.push(delta)
+            completed = True
+        except Exception as e:
+            error = e
+        finally:
+            await response.close()
+            self._end_stream(call, flight, cache_key, parts, completed, error)
+
+    def _end_replay(self, call: dict, replayed: bool, error: BaseException = None) -> bool:
+        """
+        Record a replayed stream that ended, failed or was closed by its consumer
+
+        Returns:
+            True if the leader gave up before producing any text: the call
+            is left open for the caller to make the request itself
+        """
+        if isinstance(error, FlightAbandoned) and not replayed:
+            return True
+        if isinstance(error, GeneratorExit):
+            call['cancelled'] = True
+            error = None
+        self._finish_follower(call, error)
+        return False
+
+    def _replay(self, flight, call: dict):
+        """
+        Yield the reply of the caller leading an identical stream
+
+        If the leader gives up before producing any text, nothing is
+        yielded and the call is left open (call['coalesced'] stays False)
+        so the caller can make the request itself.
+        """
+        replayed = False
+        try:
+            for part in flight.follow():
+                if not replayed:
+                    replayed = True
+                    call['ttft_s'] = round(time.perf_counter() - call['_started'], 4)
+                yield part
+        except (Exception, GeneratorExit) as e:
+            if self._end_replay(call, replayed, e):
+                return
+            raise
+        self._end_replay(call, replayed)
+
+    async def _areplay(self, flight, call: dict):
+        """Async variant of _replay()"""
+        replayed = False
+        try:
+            async for part in flight.afollow():
+                if not replayed:
+                    replayed = True
+                    call['ttft_s'] = round(time.perf_counter() - call['_started'], 4)
+                yield part
+        except (Exception, GeneratorExit) as e:
+            if self._end_replay(call, replayed, e):
+                return
+            raise
+        self._end_replay(call, replayed)
+
+    def _cached(self, call: dict, cache_key):
+        """Cached reply for a call, recorded as a cache hit (None on a miss)"""
+        if cache_key is None:
+            return None
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            call['cache'] = 'hit'
+            self._finish_call(call)
+        return cached
+
+    def _keep_task(self, task: asyncio.Task):
+        """Hold a background task until it finishes (the event loop only keeps weak references)"""
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        # Its outcome was already handed to the flight's followers
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    def complete(self, prompt: str, model: str = DEFAULT_MODEL, temperature: float = 0.7,
+                 max_tokens: int = None, use_cache: bool = True, prompt_version: str = None,
+                 call_name: str = None, fallback_models: list = None, timeout: float = None,
+                 json_mode: bool = False, retry_policy: RetryPolicy = None) -> str:
+        """
+        Send a single-prompt chat completion
+
+        Identical concurrent calls (same prompt and settings, use_cache on)
+        share one upstream request.
+
+        Args:
+            prompt: The user prompt
+            model: Model name
+            temperature: Sampling temperature
+            max_tokens: Optional completion length limit
+            use_cache: Whether this call may be answered from / stored in the
+                cache, or by an identical call already in flight
+            prompt_version: Version tag of the calling tool's prompt template,
+                so template changes never hit stale entries
+            call_name: Label for instrumentation, e.g. "discovery.extract"
+            fallback_models: Models to try, in order, if this one is
+                rate-limited, overloaded or slower than the timeout
+            timeout: Seconds per attempt on a model before falling back or
+                retrying (defaults to the client's timeout)
+            json_mode: Ask the backend for a JSON object reply. If the backend
+                rejects the reply as invalid JSON, the rejected text is
+                returned so the caller's tolerant parser can still use it
+            retry_policy: Retries, backoff and hedging for this call
+                (defaults to the client's policy; streams are not hedged)
+
+        Returns:
+            The completion text
+        """
+        cache_key = self._cache_key(use_cache, model, prompt, temperature, max_tokens, prompt_version)
+        call = self._start_call(call_name, model, temperature, max_tokens, False, cache_key)
+        cached = self._cached(call, cache_key)
+        if cached is not None:
+            return cached
+
+        flight_key = self._flight_key(use_cache, model, prompt, temperature, max_tokens, prompt_version, json_mode)
+        flight, shared = self._follow(flight_key, call)
+        if shared is not None:
+            return shared
+
+        return self._complete_upstream(self._request_params(prompt, model, temperature, max_tokens,
+                                                            json_mode=json_mode),
+                                       fallback_models, timeout, call, retry_policy, cache_key, flight)
+
+    async def acomplete(self, prompt: str, model: str = DEFAULT_MODEL, temperature: float = 0.7,
+                        max_tokens: int = None, use_cache: bool = True, prompt_version: str = None,
+                        call_name: str = None, fallback_models: list = None,
+                        timeout: float = None, json_mode: bool = False,
+                        retry_policy: RetryPolicy = None) -> str:
+        """
+        Async variant of complete()
+
+        If a call leading a shared request is cancelled while others wait
+        on it, the request carries on for them.
+
+        Args:
+            Same as complete()
+
+        Returns:
+            The completion text
+        """
+        cache_key = self._cache_key(use_cache, model, prompt, temperature, max_tokens, prompt_version)
+        call = self._start_call(call_name, model, temperature, max_tokens, False, cache_key)
+        cached = self._cached(call, cache_key)
+        if cached is not None:
+            return cached
+
+        flight_key = self._flight_key(use_cache, model, prompt, temperature, max_tokens, prompt_version, json_mode)
+        flight, shared = await self._afollow(flight_key, call)
+        if shared is not None:
+            return shared
+
+        upstream = self._acomplete_upstream(self._request_params(prompt, model, temperature, max_tokens,
+                                                                 json_mode=json_mode),
+                                            fallback_models, timeout, call, retry_policy, cache_key, flight)
+        if flight is None:
+            return await upstream
+
+        task = asyncio.ensure_future(upstream)
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self.flights.release(flight):
+                task.cancel()
+            else:
+                self._keep_task(task)
+            raise
+
+    def stream(self, prompt: str, model: str = DEFAULT_MODEL, temperature: float = 0.7,
+               max_tokens: int = None, use_cache: bool = True, prompt_version: str = None,
+               call_name: str = None, fallback_models: list = None, timeout: float = None,
+               json_mode: bool = False, retry_policy: RetryPolicy = None):
+        """
+        Send a single-prompt chat completion and yield text as it arrives
+
+        The full text is stored in the cache once the stream finishes; a
+        cache hit is yielded as a single chunk. Identical concurrent streams
+        share one upstream request: later callers replay its chunks, and if
+        the first caller stops reading early, the rest of the reply is read
+        in the background for the others.
+
+        Args:
+            Same as complete(), except json_mode is ignored: the backend
+            does not stream in JSON mode, so parse incrementally instead
+
+        Yields:
+            Text chunks of the completion
+        """
+        cache_key = self._cache_key(use_cache, model, prompt, temperature, max_tokens, prompt_version)
+        call = self._start_call(call_name, model, temperature, max_tokens, True, cache_key)
+        cached = self._cached(call, cache_key)
+        if cached is not None:
+            yield cached
+            return
+
+        flight_key = self._flight_key(use_cache, model, prompt, temperature, max_tokens, prompt_version)
+        flight = None
+        while flight_key is not None:
+            flight, leader = self.flights.join(flight_key)
+            if leader:
+                break
+            yield from self._replay(flight, call)
+            if call['coalesced']:
+                return
+
+        try:
+            raw = self._create(self._request_params(prompt, model, temperature, max_tokens, stream=True),
+                               fallback_models, timeout, call, retry_policy)
+            response = raw.parse()
+        except BaseException as e:
+            self._stream_failed(call, flight, e)
+            raise
+
+        cache_key = self._reply_key(call, model, cache_key)
+        parts = []
+        deltas = self._deltas(response, call)
+        error = None
+        completed = False
+        handed_off = False
+        try:
+            for delta in deltas:
+                parts.append(delta)
+                if flight is not None:
+                    flight.push(delta)
+                yield delta
+            completed = True
+        except GeneratorExit:
+            if self._hand_off(call, flight):
+                # Identical calls are still reading: finish the reply for them
+                handed_off = True
+                self._background().submit(contextvars.copy_context().run, self._drain,
+                                          deltas, response, call, flight, parts, cache_key)
+            raise
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            # Also runs when the consumer stops early, releasing the connection
+            if not handed_off:
+                response.close()
+                self._end_stream(call, flight, cache_key, parts, completed, error)
+
+    async def astream(self, prompt: str, model: str = DEFAULT_MODEL, temperature: float = 0.7,
+                      max_tokens: int = None, use_cache: bool = True, prompt_version: str = None,
+                      call_name: str = None, fallback_models: list = None, timeout: float = None,
+                      json_mode: bool = False, retry_policy: RetryPolicy = None):
+        """
+        Async variant of stream()
+
+        Args:
+            Same as stream()
+
+        Yields:
+            Text chunks of the completion
+        """
+        cache_key = self._cache_key(use_cache, model, prompt, temperature, max_tokens, prompt_version)
+        call = self._start_call(call_name, model, temperature, max_tokens, True, cache_key)
+        cached = self._cached(call, cache_key)
+        if cached is not None:
+            yield cached
+            return
+
+        flight_key = self._flight_key(use_cache, model, prompt, temperature, max_tokens, prompt_version)
+        flight = None
+        while flight_key is not None:
+            flight, leader = self.flights.join(flight_key)
+            if leader:
+                break
+            replay = self._areplay(flight, call)
+            try:
+                async for part in replay:
+                    yield part
+            finally:
+                await replay.aclose()
+            if call['coalesced']:
+                return
+
+        try:
+            raw = await self._acreate(self._request_params(prompt, model, temperature, max_tokens, stream=True),
+                                      fallback_models, timeout, call, retry_policy)
+            response = await raw.parse()
+        except BaseException as e:
+            self._stream_failed(call, flight, e)
+            raise
+
+        cache_key = self._reply_key(call, model, cache_key)
+        parts = []
+        deltas = self._adeltas(response, call)
+        error = None
+        completed = False
+        handed_off = False
+        try:
+            async for delta in deltas:
+                parts.append(delta)
+                if flight is not None:
+                    flight.push(delta)
+                yield delta
+            completed = True
+        except GeneratorExit:
+            if self._hand_off(call, flight):
+                # Identical calls are still reading: finish the reply for them
+                handed_off = True
+                self._keep_task(asyncio.ensure_future(
+                    self._adrain(deltas, response, call, flight, parts, cache_key)))
+            raise
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            if not handed_off:
+                await response.close()
+                self._end_stream(call, flight, cache_key, parts, completed, error)
+
+    def get_stats(self) -> dict:
+        """Get a copy of the connection counters"""
+        with self._lock:
+            stats = dict(self.stats)
+        total = stats['new_connections'] + stats['reused_connections']
+        stats['reuse_ratio'] = round(stats['reused_connections'] / total, 3) if total else 0.0
+        if self.cache is not None:
+            stats['cache'] = self.cache.get_stats()
+        stats['llm'] = self.metrics.snapshot()['totals']
+        stats['routing'] = self.router.get_stats()
+        stats['scheduler'] = self.scheduler.get_stats()
+        if self.flights is not None:
+            stats['coalescing'] = self.flights.get_stats()
+        return stats
+
+    def close(self):
+        """Close the pooled connections"""
+        if self._background_pool is not None:
+            self._background_pool.shutdown(wait=False)
+        self.http_client.close()
+
+    async def aclose(self):
+        """Close the pooled connections, including the running loop's async pool"""
+        if self._background_pool is not None:
+            self._background_pool.shutdown(wait=False)
+        self.http_client.close()
+        with self._lock:
+            entry = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if entry is not None:
+            await entry[0].aclose()
+
+
+_shared_client = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_client() -> LLMClient:
+    """
+    Get the process-wide LLM client, creating it on first use
+
+    Returns:
+        The shared LLMClient instance
+    """
+    global _shared_client
+
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = LLMClient()
+        return _shared_client
@@ -0,0 +1,281 @@
+"""
+LLM Metrics - Per-call instrumentation of LLM completions
+
+Every completion made through LLMClient produces one call record (wall time,
+time to first token, token usage, model, temperature, retries, cache
+status). Records are aggregated per process (LLMClient.metrics) and per
+session (ConversationMemory.llm_metrics, found through a context variable
+so shared tools need no session argument), and can be exported as JSON
+snapshots or Prometheus text format.
+"""
+
+import json
+import time
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+
+
+# Metrics of the session the current chat turn belongs to
+current_session_metrics = contextvars.ContextVar('current_session_metrics', default=None)
+
+
+@contextmanager
+def bind_session(metrics):
+    """
+    Attribute LLM calls made inside the block to a session
+
+    Args:
+        metrics: The session's LLMMetrics
+    """
+    token = current_session_metrics.set(metrics)
+    try:
+        yield metrics
+    finally:
+        try:
+            current_session_metrics.reset(token)
+        except ValueError:
+            # Generator finished in a different context; nothing to undo there
+            pass
+
+
+def _percentile(values: list, pct: float):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def _new_totals() -> dict:
+    return {
+        'calls': 0,
+        'errors': 0,
+        'cache_hits': 0,
+        'cache_misses': 0,
+        'prompt_tokens': 0,
+        'completion_tokens': 0,
+        'retries': 0,
+        'fallbacks': 0,
+        'hedged': 0,
+        'hedge_wins': 0,
+        'coalesced': 0,
+        'queue_wait_s': 0.0,
+        'wall_time_s': 0.0,
+    }
+
+
+class LLMMetrics:
+    # Latency samples kept per call name for percentiles
+    MAX_SAMPLES = 500
+
+    def __init__(self, phase_getter=None, max_records: int = 1000):
+        """
+        Initialize an aggregate of LLM call records
+
+        Args:
+            phase_getter: Optional callable returning the current conversation
+                phase, stamped on each record
+            max_records: Recent raw records kept for inspection
+        """
+        self.phase_getter = phase_getter
+        self._lock = threading.Lock()
+        self.records = deque(maxlen=max_records)
+        self.totals = _new_totals()
+        self.by_call = {}
+        self.by_model = {}
+        self.by_phase = {}
+        self._latencies = {}
+        self._ttfts = {}
+        self._upstream = {}         # call name → [count, wall time sum] of the calls behind _latencies
+
+    def current_phase(self):
+        """Phase to stamp on a record (None without a phase getter)"""
+        return self.phase_getter() if self.phase_getter else None
+
+    def record(self, call: dict):
+        """
+        Add one call record
+
+        Args:
+            call: Record from LLMClient (call_name, model, temperature,
+                max_tokens, streamed, cache, wall_time_s, ttft_s,
+                prompt_tokens, completion_tokens, retries, fallbacks, hedged,
+                hedge_won, coalesced, priority, queue_wait_s, error, phase)
+        """
+        name = call.get('call_name') or 'unnamed'
+
+        with self._lock:
+            self.records.append(call)
+
+            groups = [self.totals,
+                      self.by_call.setdefault(name, _new_totals()),
+                      self.by_model.setdefault(call.get('model') or 'unknown', _new_totals())]
+            if call.get('phase'):
+                groups.append(self.by_phase.setdefault(call['phase'], _new_totals()))
+
+            for totals in groups:
+                totals['calls'] += 1
+                totals['errors'] += 1 if call.get('error') else 0
+                totals['cache_hits'] += 1 if call.get('cache') == 'hit' else 0
+                totals['cache_misses'] += 1 if call.get('cache') == 'miss' else 0
+                totals['prompt_tokens'] += call.get('prompt_tokens') or 0
+                totals['completion_tokens'] += call.get('completion_tokens') or 0
+                totals['retries'] += call.get('retries') or 0
+                totals['fallbacks'] += call.get('fallbacks') or 0
+                totals['hedged'] += 1 if call.get('hedged') else 0
+                totals['hedge_wins'] += 1 if call.get('hedge_won') else 0
+                totals['coalesced'] += 1 if call.get('coalesced') else 0
+                totals['queue_wait_s'] = round(totals['queue_wait_s'] + (call.get('queue_wait_s') or 0.0), 4)
+                totals['wall_time_s'] = round(totals['wall_time_s'] + call.get('wall_time_s', 0.0), 4)
+
+            # Upstream latency only: cache hits and shared replies would skew the percentiles
+            if call.get('cache') != 'hit' and not call.get('coalesced') and not call.get('error'):
+                self._latencies.setdefault(name, deque(maxlen=self.MAX_SAMPLES)).append(call['wall_time_s'])
+                upstream = self._upstream.setdefault(name, [0, 0.0])
+                upstream[0] += 1
+                upstream[1] = round(upstream[1] + call['wall_time_s'], 4)
+                if call.get('ttft_s') is not None:
+                    self._ttfts.setdefault(name, deque(maxlen=self.MAX_SAMPLES)).append(call['ttft_s'])
+
+    def latency_percentile(self, call_name: str, pct: float, min_samples: int = 1):
+        """
+        Recent wall-time percentile of one call name (upstream calls only)
+
+        Args:
+            call_name: Tool call label, e.g. "discovery.extract"
+            pct: Percentile, e.g. 95
+            min_samples: Samples required before a value is returned
+
+        Returns:
+            Seconds, or None with too few samples
+        """
+        with self._lock:
+            samples = list(self._latencies.get(call_name or 'unnamed', []))
+        if len(samples) < min_samples:
+            return None
+        return _percentile(samples, pct)
+
+    def snapshot(self) -> dict:
+        """
+        Get the aggregates as a JSON-serializable dict
+
+        Returns:
+            dict with totals, by_call (with latency percentiles), by_model and by_phase
+        """
+        with self._lock:
+            by_call = {}
+            for name, totals in self.by_call.items():
+                latencies = list(self._latencies.get(name, []))
+                ttfts = list(self._ttfts.get(name, []))
+                upstream_calls, upstream_wall_time = self._upstream.get(name, (0, 0.0))
+                by_call[name] = dict(totals, **{
+                    'upstream_calls': upstream_calls,
+                    'upstream_wall_time_s': upstream_wall_time,
+                    'latency_p50_s': _percentile(latencies, 50),
+                    'latency_p95_s': _percentile(latencies, 95),
+                    'ttft_p50_s': _percentile(ttfts, 50),
+                })
+            return {
+                'timestamp': time.time(),
+                'totals': dict(self.totals),
+                'by_call': by_call,
+                'by_model': {k: dict(v) for k, v in self.by_model.items()},
+                'by_phase': {k: dict(v) for k, v in self.by_phase.items()},
+            }
+
+    def to_json(self, include_records: bool = False) -> str:
+        """
+        Export a JSON snapshot
+
+        Args:
+            include_records: Also include the recent raw call records
+        """
+        snapshot = self.snapshot()
+        if include_records:
+            with self._lock:
+                snapshot['records'] = list(self.records)
+        return json.dumps(snapshot, indent=2)
+
+    def to_prometheus(self, prefix: str = "opt_llm") -> str:
+        """
+        Export in Prometheus text exposition format
+
+        Args:
+            prefix: Metric name prefix
+
+        Returns:
+            Exposition text
+        """
+        snapshot = self.snapshot()
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for labels, value in samples:
+                label_text = ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+                lines.append(f"{prefix}_{name}{{{label_text}}} {value}")
+
+        by_call = snapshot['by_call']
+        metric('calls_total', 'counter', "LLM completion calls",
+               [({'call': name}, t['calls']) for name, t in by_call.items()])
+        metric('errors_total', 'counter', "LLM completion calls that failed",
+               [({'call': name}, t['errors']) for name, t in by_call.items()])
+        metric('cache_requests_total', 'counter', "Response cache lookups by result",
+               [({'call': name, 'result': result}, t[key])
+                for name, t in by_call.items()
+                for result, key in (('hit', 'cache_hits'), ('miss', 'cache_misses'))])
+        metric('tokens_total', 'counter', "Tokens reported in response usage",
+               [({'call': name, 'type': kind}, t[f'{kind}_tokens'])
+                for name, t in by_call.items() for kind in ('prompt', 'completion')])
+        metric('retries_total', 'counter', "Retries taken by LLM calls",
+               [({'call': name}, t['retries']) for name, t in by_call.items()])
+        metric('fallbacks_total', 'counter', "Times a call moved on to its next fallback model",
+               [({'call': name}, t['fallbacks']) for name, t in by_call.items()])
+        metric('hedged_total', 'counter', "Calls that sent a hedged duplicate request",
+               [({'call': name}, t['hedged']) for name, t in by_call.items()])
+        metric('hedge_wins_total', 'counter', "Hedged calls answered by the duplicate request",
+               [({'call': name}, t['hedge_wins']) for name, t in by_call.items()])
+        metric('coalesced_total', 'counter', "Calls answered by an identical call already in flight",
+               [({'call': name}, t['coalesced']) for name, t in by_call.items()])
+        metric('queue_wait_seconds_total', 'counter', "Time LLM calls spent waiting in the rate-limit queue",
+               [({'call': name}, t['queue_wait_s']) for name, t in by_call.items()])
+        metric('model_calls_total', 'counter', "LLM completion calls by the model that answered",
+               [({'model': model}, t['calls']) for model, t in snapshot['by_model'].items()])
+        metric('phase_tokens_total', 'counter', "Tokens by conversation phase",
+               [({'phase': phase, 'type': kind}, t[f'{kind}_tokens'])
+                for phase, t in snapshot['by_phase'].items() for kind in ('prompt', 'completion')])
+
+        lines.append(f"# HELP {prefix}_call_seconds Wall time of upstream LLM calls "
+                     f"(cache hits, shared replies and failed calls excluded)")
+        lines.append(f"# TYPE {prefix}_call_seconds summary")
+        for name, t in by_call.items():
+            for quantile, key in (('0.5', 'latency_p50_s'), ('0.95', 'latency_p95_s')):
+                if t[key] is not None:
+                    lines.append(f'{prefix}_call_seconds{{call="{_escape(name)}",quantile="{quantile}"}} {t[key]}')
+            lines.append(f'{prefix}_call_seconds_sum{{call="{_escape(name)}"}} {t["upstream_wall_time_s"]}')
+            lines.append(f'{prefix}_call_seconds_count{{call="{_escape(name)}"}} {t["upstream_calls"]}')
+
+        return '\n'.join(lines) + '\n'
+
+    def save(self, filepath: str, fmt: str = "json") -> str:
+        """
+        Write a snapshot to a file
+
+        Args:
+            filepath: Output path
+            fmt: 'json' or 'prometheus'
+
+        Returns:
+            Path to saved file
+        """
+        text = self.to_prometheus() if fmt == 'prometheus' else self.to_json(include_records=True)
+        with open(filepath, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return filepath
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
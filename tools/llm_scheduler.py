@@ -0,0 +1,336 @@
+"""
+LLM Scheduler - Rate limiting and prioritisation of LLM calls
+
+Groq enforces requests-per-minute and tokens-per-minute limits per model.
+When many sessions share one process, going over them stalls every
+session at once. The scheduler keeps one RPM and one TPM token bucket per
+model and queues calls that would exceed them. Calls leave a model's queue
+in priority order:
+
+- interactive: a user is waiting on the reply (discovery extraction, suggestions)
+- normal: other interactive-session work (masterplan, code, deployment)
+- batch: background work (batch runs), bind with llm_priority('batch')
+
+Queue depth, wait times and a saturation flag are exposed so callers can
+back off before the queue grows. Non-interactive calls are refused with
+SchedulerBusy once the queue is full.
+"""
+
+import os
+import time
+import heapq
+import asyncio
+import itertools
+import threading
+import contextvars
+from contextlib import contextmanager
+
+
+PRIORITIES = {'interactive': 0, 'normal': 1, 'batch': 2}
+
+# Default priority per call name; anything else is 'normal'
+CALL_PRIORITIES = {
+    'discovery.extract': 'interactive',
+    'analysis.suggest': 'interactive',
+}
+
+# Priority override for the calls made inside a block (e.g. a batch run)
+current_priority = contextvars.ContextVar('current_priority', default=None)
+
+
+@contextmanager
+def llm_priority(priority: str):
+    """
+    Run the LLM calls made inside the block at a given priority
+
+    Args:
+        priority: 'interactive', 'normal' or 'batch'
+    """
+    if priority not in PRIORITIES:
+        raise ValueError(f"unknown priority: {priority}")
+    token = current_priority.set(priority)
+    try:
+        yield priority
+    finally:
+        current_priority.reset(token)
+
+
+class SchedulerBusy(RuntimeError):
+    """The scheduler queue is full; retry later"""
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float):
+        """
+        Continuously refilling bucket holding one minute's allowance
+
+        Args:
+            per_minute: Allowance per minute (None or 0 = unlimited)
+        """
+        self.per_minute = per_minute or None
+        self.capacity = float(per_minute or 0)
+        self.available = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float):
+        if self.per_minute:
+            self.available = min(self.capacity, self.available + (now - self._updated) * self.per_minute / 60)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` can be taken (requests larger than the bucket wait for a full one)"""
+        if not self.per_minute:
+            return 0.0
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.available
+        return max(0.0, missing * 60 / self.per_minute)
+
+    def take(self, amount: float, now: float):
+        if self.per_minute:
+            self._refill(now)
+            self.available -= min(amount, self.capacity)
+
+    def give_back(self, amount: float, now: float):
+        """Return (or, if negative, charge) an estimate correction"""
+        if self.per_minute:
+            self._refill(now)
+            self.available = min(self.capacity, self.available + amount)
+
+
+class _ModelLane:
+    """Buckets and wait queue of one model"""
+
+    def __init__(self, rpm: float, tpm: float):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.queue = []             # heap of [priority, seq, ticket]
+        self.paused_until = 0.0
+
+    def wait_time(self, tokens: int, now: float) -> float:
+        return max(self.paused_until - now,
+                   self.requests.wait_time(1, now),
+                   self.tokens.wait_time(tokens, now))
+
+
+class LLMScheduler:
+    def __init__(self, rpm: float = None, tpm: float = None, limits: dict = None, max_queue: int = None):
+        """
+        Initialize the scheduler
+
+        Args:
+            rpm: Requests per minute allowed per model (defaults to LLM_RPM; unset = unlimited)
+            tpm: Tokens per minute allowed per model (defaults to LLM_TPM; unset = unlimited)
+            limits: Per-model overrides, e.g. {"llama-3.1-8b-instant": {"rpm": 30, "tpm": 6000}}
+            max_queue: Queued calls per model before non-interactive calls are refused
+                (defaults to LLM_MAX_QUEUE, or 100)
+        """
+        self.rpm = rpm if rpm is not None else float(os.getenv("LLM_RPM", "0"))
+        self.tpm = tpm if tpm is not None else float(os.getenv("LLM_TPM", "0"))
+        self.limits = limits or {}
+        self.max_queue = max_queue or int(os.getenv("LLM_MAX_QUEUE", "100"))
+
+        self._cond = threading.Condition()
+        self._lanes = {}
+        self._seq = itertools.count()
+        self.stats = {
+            'dispatched': 0,
+            'queued': 0,
+            'rejected': 0,
+            'paused': 0,
+            'wait_time_s': 0.0,
+            'max_wait_s': 0.0,
+            'peak_queue_depth': 0,
+        }
+
+    def _lane(self, model: str) -> _ModelLane:
+        if model not in self._lanes:
+            limits = self.limits.get(model, {})
+            self._lanes[model] = _ModelLane(limits.get('rpm', self.rpm), limits.get('tpm', self.tpm))
+        return self._lanes[model]
+
+    @staticmethod
+    def priority_for(call_name: str = None) -> str:
+        """
+        Priority of a call: the bound llm_priority(), else the call's default
+
+        Args:
+            call_name: Tool call label, e.g. "discovery.extract"
+        """
+        return current_priority.get() or CALL_PRIORITIES.get(call_name, 'normal')
+
+    @staticmethod
+    def estimate_tokens(prompt: str, max_tokens: int = None) -> int:
+        """Rough token cost of a call: ~4 characters per prompt token plus the completion allowance"""
+        return len(prompt) // 4 + (max_tokens or 1000)
+
+    def _enqueue(self, model: str, tokens: int, priority: str) -> list:
+        """Add a waiter to a model's queue (call with the lock held)"""
+        lane = self._lane(model)
+        if len(lane.queue) >= self.max_queue and priority != 'interactive':
+            self.stats['rejected'] += 1
+            raise SchedulerBusy(f"LLM queue for {model} is full ({len(lane.queue)} waiting)")
+
+        ticket = {'model': model, 'tokens': tokens, 'priority': priority, 'enqueued': time.monotonic()}
+        entry = [PRIORITIES[priority], next(self._seq), ticket]
+        heapq.heappush(lane.queue, entry)
+        self.stats['peak_queue_depth'] = max(self.stats['peak_queue_depth'], len(lane.queue))
+        return entry
+
+    def _try_dispatch(self, entry: list):
+        """
+        Dispatch a waiter if it is first in line and the buckets allow it
+        (call with the lock held)
+
+        Returns:
+            0 when dispatched, else seconds to wait before checking again
+            (None if it is not first in line)
+        """
+        ticket = entry[2]
+        lane = self._lane(ticket['model'])
+        if lane.queue[0] is not entry:
+            return None
+
+        now = time.monotonic()
+        wait = lane.wait_time(ticket['tokens'], now)
+        if wait > 0:
+            return wait
+
+        heapq.heappop(lane.queue)
+        lane.requests.take(1, now)
+        lane.tokens.take(ticket['tokens'], now)
+
+        waited = now - ticket['enqueued']
+        self.stats['dispatched'] += 1
+        if waited > 0.001:
+            self.stats['queued'] += 1
+        self.stats['wait_time_s'] = round(self.stats['wait_time_s'] + waited, 4)
+        self.stats['max_wait_s'] = round(max(self.stats['max_wait_s'], waited), 4)
+        ticket['waited_s'] = round(waited, 4)
+        self._cond.notify_all()
+        return 0
+
+    def _abandon(self, entry: list):
+        """Remove a waiter that gave up (call with the lock held)"""
+        lane = self._lane(entry[2]['model'])
+        if entry in lane.queue:
+            lane.queue.remove(entry)
+            heapq.heapify(lane.queue)
+            self._cond.notify_all()
+
+    def acquire(self, model: str, tokens: int, priority: str = 'normal') -> dict:
+        """
+        Wait for this call's turn and for room in the model's buckets
+
+        Args:
+            model: Model the call goes to
+            tokens: Estimated tokens (see estimate_tokens())
+            priority: 'interactive', 'normal' or 'batch'
+
+        Returns:
+            Ticket to pass to settle() once the real usage is known
+
+        Raises:
+            SchedulerBusy: If the queue is full (non-interactive calls only)
+        """
+        with self._cond:
+            entry = self._enqueue(model, tokens, priority)
+            try:
+                while True:
+                    wait = self._try_dispatch(entry)
+                    if wait == 0:
+                        return entry[2]
+                    self._cond.wait(wait)
+            except BaseException:
+                self._abandon(entry)
+                raise
+
+    async def aacquire(self, model: str, tokens: int, priority: str = 'normal') -> dict:
+        """
+        Async variant of acquire(); waits without blocking the event loop
+
+        Args:
+            Same as acquire()
+
+        Returns:
+            Ticket to pass to settle()
+        """
+        with self._cond:
+            entry = self._enqueue(model, tokens, priority)
+        try:
+            while True:
+                with self._cond:
+                    wait = self._try_dispatch(entry)
+                if wait == 0:
+                    return entry[2]
+                # Not first in line: poll, as thread waiters can't wake us
+                await asyncio.sleep(min(wait or 0.02, 0.25))
+        except BaseException:
+            with self._cond:
+                self._abandon(entry)
+            raise
+
+    def settle(self, ticket: dict, actual_tokens: int = None):
+        """
+        Correct the token bucket once the real usage is known
+
+        Args:
+            ticket: Ticket from acquire()
+            actual_tokens: prompt + completion tokens reported by the API
+                (None keeps the estimate)
+        """
+        if ticket is None or actual_tokens is None:
+            return
+        with self._cond:
+            self._lane(ticket['model']).tokens.give_back(ticket['tokens'] - actual_tokens, time.monotonic())
+            self._cond.notify_all()
+
+    def pause(self, model: str, seconds: float):
+        """
+        Hold every queued call to a model, e.g. after a 429 with Retry-After
+
+        Args:
+            model: The rate-limited model
+            seconds: How long to hold
+        """
+        with self._cond:
+            lane = self._lane(model)
+            lane.paused_until = max(lane.paused_until, time.monotonic() + seconds)
+            self.stats['paused'] += 1
+            self._cond.notify_all()
+
+    def pressure(self) -> dict:
+        """
+        Backpressure signal for callers deciding whether to start more work
+
+        Returns:
+            dict with queue_depth (total and by priority), estimated_wait_s
+            (longest wait for a new call on any model) and saturated (True
+            once any queue is at least half full)
+        """
+        now = time.monotonic()
+        with self._cond:
+            depth = {name: 0 for name in PRIORITIES}
+            estimated_wait = 0.0
+            saturated = False
+            for lane in self._lanes.values():
+                for entry in lane.queue:
+                    depth[entry[2]['priority']] += 1
+                queued_tokens = sum(entry[2]['tokens'] for entry in lane.queue)
+                wait = max(lane.paused_until - now,
+                           lane.requests.wait_time(len(lane.queue) + 1, now),
+                           lane.tokens.wait_time(queued_tokens, now))
+                estimated_wait = max(estimated_wait, wait)
+                saturated = saturated or len(lane.queue) >= self.max_queue / 2
+        return {
+            'queue_depth': sum(depth.values()),
+            'queue_by_priority': depth,
+            'estimated_wait_s': round(estimated_wait, 2),
+            'saturated': saturated,
+        }
+
+    def get_stats(self) -> dict:
+        """Get a copy of the scheduler counters plus the current pressure"""
+        with self._cond:
+            stats = dict(self.stats)
+        stats.update(self.pressure())
+        return stats
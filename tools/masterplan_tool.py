@@ -5,30 +5,39 @@ Creates comprehensive blueprint for implementing the chosen automation
 """
 
 import os
-from groq import Groq
-from dotenv import load_dotenv
-
-load_dotenv()
+from tools.llm_client import get_shared_client
+from tools.llm_scheduler import SchedulerBusy
+from tools.model_router import get_shared_router
+from tools.outcome import mark_degraded
 
 
 class MasterplanTool:
-    def __init__(self):
-        """Initialize the masterplan tool with LLM"""
-        self.groq = Groq(api_key=os.getenv("GROQ_API_KEY"))
-        self.model = "llama-3.3-70b-versatile"
+    # Bump when the prompt template changes so cached responses are not reused
+    PROMPT_VERSION = "1"
+    
+    def __init__(self, llm=None, router=None):
+        """
+        Initialize the masterplan tool with LLM
+        
+        Args:
+            llm: Shared LLMClient (defaults to the process-wide client)
+            router: ModelRouter picking the model (defaults to the process-wide router)
+        """
+        self.llm = llm or get_shared_client()
+        self.router = router or get_shared_router()
         
         print("📋 Masterplan Tool initialized")
     
-    def generate_masterplan(self, chosen_suggestion: dict, memory_state: dict) -> str:
+    def _build_prompt(self, chosen_suggestion: dict, memory_state: dict) -> str:
         """
-        Generate a comprehensive automation masterplan
+        Build the masterplan generation prompt
         
         Args:
             chosen_suggestion: The automation the user chose
             memory_state: Full OPT context from discovery
             
         Returns:
-            Detailed masterplan as markdown string
+            Prompt string
         """
         # Extract context
         om = memory_state['operating_model']
@@ -172,27 +181,132 @@ IMPORTANT:
 - Show clear value proposition
 
 Generate the complete masterplan now:"""
-
-        try:
-            response = self.groq.chat.completions.create(
-                messages=[{"role": "user", "content": prompt}],
-                model=self.model,
-                temperature=0.7,
-                max_tokens=3000  # Allow longer response for detailed plan
-            )
+        return prompt
+    
+    def _completion_options(self, use_cache: bool) -> dict:
+        """LLM call options shared by every generation path"""
+        # Model, temperature, max_tokens and fallbacks come from the route
+        options = self.router.options('masterplan.generate')
+        options.update({
+            'use_cache': use_cache,
+            'prompt_version': self.PROMPT_VERSION
+        })
+        return options
+    
+    def _fallback(self, chosen_suggestion: dict, memory_state: dict, error: Exception) -> str:
+        """Fallback when the LLM call fails"""
+        print(f"❌ Masterplan generation error: {str(error)}")
+        mark_degraded('masterplan fallback')
+        import traceback
+        traceback.print_exc()
+        
+        # Fallback: Create basic masterplan
+        return self._create_fallback_masterplan(chosen_suggestion, memory_state['task'])
+    
+    def generate_masterplan(self, chosen_suggestion: dict, memory_state: dict, use_cache: bool = True) -> str:
+        """
+        Generate a comprehensive automation masterplan
+        
+        Args:
+            chosen_suggestion: The automation the user chose
+            memory_state: Full OPT context from discovery
+            use_cache: Allow answering from the response cache
             
-            masterplan = response.choices[0].message.content.strip()
+        Returns:
+            Detailed masterplan as markdown string
+        """
+        prompt = self._build_prompt(chosen_suggestion, memory_state)
+        
+        try:
+            masterplan = self.llm.complete(prompt, **self._completion_options(use_cache)).strip()
+            print(f"✅ Generated masterplan ({len(masterplan)} chars)")
+            return masterplan
+        except SchedulerBusy:
+            raise
+        except Exception as e:
+            return self._fallback(chosen_suggestion, memory_state, e)
+    
+    async def agenerate_masterplan(self, chosen_suggestion: dict, memory_state: dict, use_cache: bool = True) -> str:
+        """
+        Async variant of generate_masterplan()
+        
+        Args:
+            chosen_suggestion: The automation the user chose
+            memory_state: Full OPT context from discovery
+            use_cache: Allow answering from the response cache
             
+        Returns:
+            Detailed masterplan as markdown string
+        """
+        prompt = self._build_prompt(chosen_suggestion, memory_state)
+        
+        try:
+            masterplan = (await self.llm.acomplete(prompt, **self._completion_options(use_cache))).strip()
             print(f"✅ Generated masterplan ({len(masterplan)} chars)")
             return masterplan
+        except SchedulerBusy:
+            raise
+        except Exception as e:
+            return self._fallback(chosen_suggestion, memory_state, e)
+    
+    def stream_masterplan(self, chosen_suggestion: dict, memory_state: dict, use_cache: bool = True):
+        """
+        Generate the masterplan, yielding text chunks as tokens arrive
+        
+        Args:
+            chosen_suggestion: The automation the user chose
+            memory_state: Full OPT context from discovery
+            use_cache: Allow answering from the response cache
             
+        Yields:
+            Markdown text chunks (join them for the full masterplan)
+        """
+        prompt = self._build_prompt(chosen_suggestion, memory_state)
+        total_chars = 0
+        
+        try:
+            for chunk in self.llm.stream(prompt, **self._completion_options(use_cache)):
+                total_chars += len(chunk)
+                yield chunk
+            
+            print(f"\n✅ Generated masterplan ({total_chars} chars)")
+            
+        except SchedulerBusy:
+            raise
         except Exception as e:
-            print(f"❌ Masterplan generation error: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            # Fallback only if nothing was streamed yet
+            if total_chars == 0:
+                yield self._fallback(chosen_suggestion, memory_state, e)
+            else:
+                print(f"❌ Masterplan generation error: {str(e)}")
+                mark_degraded('masterplan stream cut short')
+    
+    async def astream_masterplan(self, chosen_suggestion: dict, memory_state: dict, use_cache: bool = True):
+        """
+        Async variant of stream_masterplan()
+        
+        Yields:
+            Markdown text chunks (join them for the full masterplan)
+        """
+        prompt = self._build_prompt(chosen_suggestion, memory_state)
+        total_chars = 0
+        
+        try:
+            async for chunk in self.llm.astream(prompt, **self._completion_options(use_cache)):
+                total_chars += len(chunk)
+                yield chunk
+            
+            print(f"\n✅ Generated masterplan ({total_chars} chars)")
             
-            # Fallback: Create basic masterplan
-            return self._create_fallback_masterplan(chosen_suggestion, t)
+        except SchedulerBusy:
+            raise
+        except Exception as e:
+            # Fallback only if nothing was streamed yet
+            if total_chars == 0:
+                yield self._fallback(chosen_suggestion, memory_state, e)
+            else:
+                print(f"❌ Masterplan generation error: {str(e)}")
+                mark_degraded('masterplan stream cut short')
     
     def _create_fallback_masterplan(self, suggestion: dict, task: dict) -> str:
         """Create a basic masterplan if LLM fails"""
@@ -242,13 +356,14 @@ Estimated value: {suggestion.get('time_saved', 'significant time')} saved,
 4. Deploy to production
 """
     
-    def save_masterplan(self, masterplan: str, filename: str = "masterplan.md") -> str:
+    def save_masterplan(self, masterplan: str, filename: str = "masterplan.md", output_dir: str = "output") -> str:
         """
         Save masterplan to file
         
         Args:
             masterplan: The generated masterplan
             filename: Output filename
+            output_dir: Directory to save into
             
         Returns:
             Path to saved file
@@ -256,9 +371,9 @@ Estimated value: {suggestion.get('time_saved', 'significant time')} saved,
         import os
         
         # Create output directory
-        os.makedirs("output", exist_ok=True)
+        os.makedirs(output_dir, exist_ok=True)
         
-        filepath = os.path.join("output", filename)
+        filepath = os.path.join(output_dir, filename)
         
         with open(filepath, 'w', encoding='utf-8') as f:
             f.write(masterplan)
@@ -0,0 +1,211 @@
+"""
+Model Router - Per-call model selection with fallback chains
+
+Maps each tool call (e.g. "discovery.extract") to a model, temperature and
+max_tokens, so short extraction calls can go to a small fast model while
+long-form generation stays on the large one. Each route lists models in
+order of preference; when a model is rate-limited, overloaded or slower
+than the route's timeout, LLMClient moves on to the next one and the
+router keeps the failing model out of rotation for a cooldown period.
+
+Routes can be overridden with a JSON file (LLM_ROUTES_FILE) of the form:
+
+    {"discovery.extract": {"models": ["llama-3.1-8b-instant"], "temperature": 0.2}}
+"""
+
+import os
+import json
+import time
+import threading
+
+from tools.retry_policy import RetryPolicy
+
+
+SMALL_MODEL = "llama-3.1-8b-instant"
+LARGE_MODEL = "llama-3.3-70b-versatile"
+
+# call_name -> models (in order of preference), sampling settings, the
+# seconds to wait on a model before falling back or retrying, whether to
+# ask the backend for a JSON object reply, and the retry policy (see
+# RetryPolicy.from_config). Only the short extraction call is hedged;
+# duplicating long generations would double their token cost.
+DEFAULT_ROUTES = {
+    'discovery.extract': {
+        'models': [SMALL_MODEL, LARGE_MODEL],
+        'temperature': 0.3,
+        'max_tokens': 600,
+        'timeout_s': 10,
+        'json_mode': True,
+        'retry': {'max_attempts': 3, 'backoff_base_s': 0.25, 'hedge': True},
+    },
+    'analysis.suggest': {
+        'models': [LARGE_MODEL, SMALL_MODEL],
+        'temperature': 0.7,
+        'max_tokens': 2000,
+        'timeout_s': 30,
+        'json_mode': True,
+        'retry': {'max_attempts': 3},
+    },
+    'masterplan.generate': {
+        'models': [LARGE_MODEL, SMALL_MODEL],
+        'temperature': 0.7,
+        'max_tokens': 3000,
+        'timeout_s': 60,
+        'retry': {'max_attempts': 3},
+    },
+    'codegen.generate': {
+        'models': [LARGE_MODEL, SMALL_MODEL],
+        'temperature': 0.5,     # Lower temp for more reliable code
+        'max_tokens': 3000,
+        'timeout_s': 60,
+        'retry': {'max_attempts': 3},
+    },
+    'deployment.generate': {
+        'models': [LARGE_MODEL, SMALL_MODEL],
+        'temperature': 0.7,
+        'max_tokens': 3000,
+        'timeout_s': 60,
+        'retry': {'max_attempts': 3},
+    },
+}
+
+DEFAULT_ROUTE = {
+    'models': [LARGE_MODEL],
+    'temperature': 0.7,
+    'max_tokens': None,
+    'timeout_s': None,
+    'json_mode': False,
+    'retry': {},
+}
+
+
+class ModelRouter:
+    def __init__(self, routes: dict = None, config_path: str = None, cooldown: float = None):
+        """
+        Initialize the router
+
+        Args:
+            routes: Route overrides, merged over DEFAULT_ROUTES
+            config_path: JSON file with route overrides (defaults to LLM_ROUTES_FILE)
+            cooldown: Seconds a failing model is skipped when the error gives
+                no Retry-After (defaults to LLM_MODEL_COOLDOWN, or 30)
+        """
+        self.cooldown = cooldown or float(os.getenv("LLM_MODEL_COOLDOWN", "30"))
+        self.routes = {name: dict(route) for name, route in DEFAULT_ROUTES.items()}
+
+        config_path = config_path or os.getenv("LLM_ROUTES_FILE")
+        if config_path:
+            with open(config_path, 'r', encoding='utf-8') as f:
+                self._merge(json.load(f))
+            print(f"🧭 Model routes loaded from: {config_path}")
+        if routes:
+            self._merge(routes)
+
+        self._lock = threading.Lock()
+        self._cooling = {}      # model -> monotonic time it becomes available again
+        self.stats = {
+            'fallbacks': 0,
+            'skipped_cooling': 0,
+        }
+
+    def _merge(self, routes: dict):
+        """Merge route overrides into the current routes"""
+        for name, route in routes.items():
+            merged = dict(self.routes.get(name, DEFAULT_ROUTE))
+            merged.update(route)
+            if isinstance(merged.get('models'), str):
+                merged['models'] = [merged['models']]
+            self.routes[name] = merged
+
+    def route(self, call_name: str) -> dict:
+        """
+        Get the route for a call
+
+        Args:
+            call_name: Tool call label, e.g. "discovery.extract"
+
+        Returns:
+            dict with models, temperature, max_tokens, timeout_s, json_mode and retry
+        """
+        return dict(self.routes.get(call_name, DEFAULT_ROUTE))
+
+    def options(self, call_name: str) -> dict:
+        """
+        Get LLMClient keyword arguments for a call
+
+        Args:
+            call_name: Tool call label, e.g. "discovery.extract"
+
+        Returns:
+            dict with model, fallback_models, temperature, max_tokens, timeout,
+            json_mode, retry_policy and call_name
+        """
+        route = self.route(call_name)
+        return {
+            'model': route['models'][0],
+            'fallback_models': list(route['models'][1:]),
+            'temperature': route['temperature'],
+            'max_tokens': route.get('max_tokens'),
+            'timeout': route.get('timeout_s'),
+            'json_mode': route.get('json_mode', False),
+            'retry_policy': RetryPolicy.from_config(route.get('retry')),
+            'call_name': call_name,
+        }
+
+    def candidates(self, models: list) -> list:
+        """
+        Filter out models that are cooling down
+
+        The last model in the chain is always kept so a call is never left
+        without one.
+
+        Args:
+            models: Models in order of preference
+
+        Returns:
+            Models to try, in order
+        """
+        now = time.monotonic()
+        with self._lock:
+            available = [m for m in models if self._cooling.get(m, 0) <= now]
+            self.stats['skipped_cooling'] += len(models) - len(available)
+        return available or models[-1:]
+
+    def mark_unavailable(self, model: str, retry_after: float = None):
+        """
+        Keep a model out of rotation after a rate limit, overload or timeout
+
+        Args:
+            model: The failing model
+            retry_after: Seconds from the server's Retry-After header, if any
+        """
+        with self._lock:
+            self._cooling[model] = time.monotonic() + (retry_after or self.cooldown)
+            self.stats['fallbacks'] += 1
+
+    def get_stats(self) -> dict:
+        """Get a copy of the fallback counters and the models cooling down"""
+        now = time.monotonic()
+        with self._lock:
+            stats = dict(self.stats)
+            stats['cooling'] = {m: round(t - now, 1) for m, t in self._cooling.items() if t > now}
+        return stats
+
+
+_shared_router = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_router() -> ModelRouter:
+    """
+    Get the process-wide model router, creating it on first use
+
+    Returns:
+        The shared ModelRouter instance
+    """
+    global _shared_router
+
+    with _shared_lock:
+        if _shared_router is None:
+            _shared_router = ModelRouter()
+        return _shared_router
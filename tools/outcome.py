@@ -0,0 +1,68 @@
+"""
+Generation Outcome - Tell a complete LLM result from a stand-in
+
+When an LLM call fails, every tool answers with a canned template
+(_create_fallback_*), and a stream that fails midway leaves the text
+received so far. Both are fine to show the user, but must not be reused as
+if they were the real result (e.g. checkpointed under the phase's input
+hash). Tools call mark_degraded() on those paths; callers that need to know
+wrap the generation in track_outcome(), found through a context variable
+so shared tools need no extra argument.
+"""
+
+import contextvars
+from contextlib import contextmanager
+
+
+# Outcome of the generation running in the current context
+current_outcome = contextvars.ContextVar('current_outcome', default=None)
+
+
+class Outcome:
+    __slots__ = ('degraded', 'reasons')
+
+    def __init__(self):
+        """A generation that has not degraded (yet)"""
+        self.degraded = False
+        self.reasons = []
+
+    @property
+    def complete(self) -> bool:
+        """True if every result came from a finished LLM call"""
+        return not self.degraded
+
+
+@contextmanager
+def track_outcome(outcome: Outcome = None):
+    """
+    Record whether generations inside the block fell back or were cut short
+
+    Args:
+        outcome: Outcome to record into (defaults to a new one)
+
+    Yields:
+        The Outcome
+    """
+    outcome = outcome or Outcome()
+    token = current_outcome.set(outcome)
+    try:
+        yield outcome
+    finally:
+        try:
+            current_outcome.reset(token)
+        except ValueError:
+            # Generator finished in a different context; nothing to undo there
+            pass
+
+
+def mark_degraded(reason: str):
+    """
+    Report that the result being produced is a fallback or partial
+
+    Args:
+        reason: Short description (e.g. 'masterplan fallback')
+    """
+    outcome = current_outcome.get()
+    if outcome is not None:
+        outcome.degraded = True
+        outcome.reasons.append(reason)
@@ -0,0 +1,218 @@
+"""
+Response Cache - Content-Addressed Cache for LLM Completions
+
+Identical requests (same model, prompt, temperature, max_tokens and prompt
+version) are answered from an in-memory LRU tier, backed by a size-bounded
+on-disk store, instead of going to the network again.
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class ResponseCache:
+    def __init__(self, cache_dir: str = None, max_memory_entries: int = None,
+                 max_bytes: int = None, ttl: float = None):
+        """
+        Initialize the cache
+
+        Args:
+            cache_dir: Directory for the on-disk tier (defaults to LLM_CACHE_DIR, or .cache/llm)
+            max_memory_entries: Entries kept in the in-memory LRU tier
+                (defaults to LLM_CACHE_MEMORY_ENTRIES, or 256)
+            max_bytes: Size limit of the on-disk tier
+                (defaults to LLM_CACHE_MAX_BYTES, or 100 MB)
+            ttl: Seconds before an entry expires (defaults to LLM_CACHE_TTL, or 7 days)
+        """
+        self.cache_dir = cache_dir or os.getenv("LLM_CACHE_DIR", os.path.join(".cache", "llm"))
+        self.max_memory_entries = max_memory_entries or int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "256"))
+        self.max_bytes = max_bytes or int(os.getenv("LLM_CACHE_MAX_BYTES", str(100 * 1024 * 1024)))
+        self.ttl = ttl or float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()    # key -> (created_at, text)
+        self._disk_index = {}           # key -> (size, last_used)
+        self._disk_bytes = 0
+
+        self.stats = {
+            'hits': 0,
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'writes': 0,
+            'evictions': 0,
+            'expired': 0,
+        }
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_disk_index()
+
+    @staticmethod
+    def make_key(model: str, prompt: str, temperature: float, max_tokens: int,
+                 prompt_version: str = None) -> str:
+        """
+        Build the content address for a request
+
+        Returns:
+            Hex SHA-256 digest of the request parameters
+        """
+        payload = json.dumps({
+            'model': model,
+            'prompt': prompt,
+            'temperature': temperature,
+            'max_tokens': max_tokens,
+            'prompt_version': prompt_version,
+        }, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str):
+        """
+        Look up a cached completion
+
+        Args:
+            key: Key from make_key()
+
+        Returns:
+            The cached text, or None on a miss
+        """
+        now = time.time()
+
+        with self._lock:
+            # Memory tier
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, text = entry
+                if now - created_at <= self.ttl:
+                    self._memory.move_to_end(key)
+                    self._touch_disk(key, now)
+                    self.stats['hits'] += 1
+                    self.stats['memory_hits'] += 1
+                    return text
+                self._memory.pop(key)
+
+            # Disk tier
+            if key in self._disk_index:
+                record = self._read_disk(key)
+                if record is not None and now - record['created_at'] <= self.ttl:
+                    self._remember(key, record['created_at'], record['text'])
+                    self._touch_disk(key, now)
+                    self.stats['hits'] += 1
+                    self.stats['disk_hits'] += 1
+                    return record['text']
+
+                self._remove_disk(key)
+                self.stats['expired'] += 1
+
+            self.stats['misses'] += 1
+            return None
+
+    def set(self, key: str, text: str):
+        """
+        Store a completion in both tiers
+
+        Args:
+            key: Key from make_key()
+            text: The completion text
+        """
+        now = time.time()
+        data = json.dumps({'created_at': now, 'text': text}, ensure_ascii=False).encode('utf-8')
+
+        with self._lock:
+            self._remember(key, now, text)
+
+            path = self._path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+            if key in self._disk_index:
+                self._disk_bytes -= self._disk_index[key][0]
+            self._disk_index[key] = (len(data), now)
+            self._disk_bytes += len(data)
+            self.stats['writes'] += 1
+
+            self._evict_disk()
+
+    def clear(self):
+        """Remove every cached entry"""
+        with self._lock:
+            self._memory.clear()
+            for key in list(self._disk_index):
+                self._remove_disk(key)
+
+    def get_stats(self) -> dict:
+        """Get hit/miss counters and tier sizes"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['memory_entries'] = len(self._memory)
+            stats['disk_entries'] = len(self._disk_index)
+            stats['disk_bytes'] = self._disk_bytes
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else 0.0
+        return stats
+
+    def _remember(self, key: str, created_at: float, text: str):
+        """Put an entry in the memory tier, evicting the least recently used"""
+        self._memory[key] = (created_at, text)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _read_disk(self, key: str):
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _touch_disk(self, key: str, now: float):
+        """Record a use so disk eviction stays least-recently-used"""
+        if key in self._disk_index:
+            size, _ = self._disk_index[key]
+            self._disk_index[key] = (size, now)
+            try:
+                os.utime(self._path(key), (now, now))
+            except OSError:
+                pass
+
+    def _remove_disk(self, key: str):
+        size, _ = self._disk_index.pop(key, (0, 0))
+        self._disk_bytes -= size
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _evict_disk(self):
+        """Drop least recently used disk entries until under max_bytes"""
+        if self._disk_bytes <= self.max_bytes:
+            return
+        for key, _ in sorted(self._disk_index.items(), key=lambda item: item[1][1]):
+            if self._disk_bytes <= self.max_bytes:
+                break
+            self._remove_disk(key)
+            self._memory.pop(key, None)
+            self.stats['evictions'] += 1
+
+    def _load_disk_index(self):
+        """Scan the cache directory so size limits hold across restarts"""
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith('.json'):
+                    continue
+                try:
+                    info = os.stat(os.path.join(root, name))
+                except OSError:
+                    continue
+                key = name[:-len('.json')]
+                self._disk_index[key] = (info.st_size, info.st_mtime)
+                self._disk_bytes += info.st_size
@@ -0,0 +1,93 @@
+"""
+Retry Policy - Retries with backoff and jitter, and hedged requests
+
+The Groq SDK's own retries are turned off so each tool's route decides how
+a failed or slow completion is retried: how many attempts, which errors
+are worth retrying, and the backoff between attempts (exponential with
+full jitter, so sessions that failed together don't retry together).
+
+Hedging trims tail latency: once a call has been running longer than the
+p95 latency of that call name, a duplicate request is sent and whichever
+answers first is used.
+"""
+
+import os
+import random
+
+import groq
+
+
+# Errors worth another attempt; anything else (bad request, auth) fails at once
+DEFAULT_RETRY_ON = ('APIConnectionError', 'APITimeoutError', 'RateLimitError', 'InternalServerError')
+
+
+class RetryPolicy:
+    def __init__(self, max_attempts: int = None, backoff_base: float = 0.5, backoff_max: float = 8.0,
+                 retry_on: tuple = DEFAULT_RETRY_ON, hedge: bool = False, hedge_percentile: float = 95,
+                 hedge_min_samples: int = 20):
+        """
+        Initialize a retry policy
+
+        Args:
+            max_attempts: Attempts including the first (defaults to LLM_MAX_ATTEMPTS, or 3)
+            backoff_base: Seconds of the first backoff ceiling; doubles per attempt
+            backoff_max: Cap of the backoff ceiling
+            retry_on: Names of groq exception classes to retry
+            hedge: Send a duplicate request once a call outlives the hedge percentile
+            hedge_percentile: Latency percentile (of the same call name) that triggers the hedge
+            hedge_min_samples: Latency samples needed before hedging starts
+        """
+        self.max_attempts = max(1, max_attempts or int(os.getenv("LLM_MAX_ATTEMPTS", "3")))
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_on = tuple(getattr(groq, name) for name in retry_on)
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+
+    @classmethod
+    def from_config(cls, config: dict = None) -> 'RetryPolicy':
+        """
+        Build a policy from a route's "retry" settings
+
+        Args:
+            config: dict with any of max_attempts, backoff_base_s, backoff_max_s,
+                retry_on, hedge, hedge_percentile, hedge_min_samples
+
+        Returns:
+            RetryPolicy
+        """
+        config = config or {}
+        return cls(
+            max_attempts=config.get('max_attempts'),
+            backoff_base=config.get('backoff_base_s', 0.5),
+            backoff_max=config.get('backoff_max_s', 8.0),
+            retry_on=tuple(config.get('retry_on', DEFAULT_RETRY_ON)),
+            hedge=config.get('hedge', False),
+            hedge_percentile=config.get('hedge_percentile', 95),
+            hedge_min_samples=config.get('hedge_min_samples', 20),
+        )
+
+    def should_retry(self, error: Exception, attempt: int) -> bool:
+        """
+        Whether to make another attempt after a failure
+
+        Args:
+            error: The failure
+            attempt: Attempts made so far (1 after the first failure)
+        """
+        return attempt < self.max_attempts and isinstance(error, self.retry_on)
+
+    def delay(self, attempt: int, retry_after: float = None) -> float:
+        """
+        Seconds to wait before the next attempt
+
+        Full jitter: a random delay up to an exponentially growing ceiling,
+        but never less than the server's Retry-After.
+
+        Args:
+            attempt: Attempts made so far (1 after the first failure)
+            retry_after: Seconds from the server's Retry-After header, if any
+        """
+        ceiling = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+        return max(retry_after or 0.0, random.uniform(0, ceiling))
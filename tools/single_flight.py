@@ -0,0 +1,191 @@
+"""
+Single Flight - Coalescing of identical in-flight LLM requests
+
+In batch runs and busy servers many sessions send the same prompt at the
+same moment (the discovery extraction of "Daily", suggestions for
+templated profiles). The response cache only helps once the first of them
+has finished. Until then, every copy is a separate upstream call.
+
+SingleFlight lets the first caller of a request (the leader) make the
+upstream call and fans its result out to every identical caller that
+arrives while it is in flight (the followers). Streamed replies are
+replayed chunk by chunk, so a follower that joins late still gets the
+whole text, and sync and async callers can share the same flight.
+"""
+
+import asyncio
+import threading
+
+
+class FlightAbandoned(RuntimeError):
+    """The leader stopped before finishing (e.g. it was cancelled)"""
+
+
+class Flight:
+    """One in-flight upstream request and the text it has produced so far"""
+
+    def __init__(self, key: str):
+        self.key = key
+        self.parts = []
+        self.done = False
+        self.error = None
+        self.abandoned = False
+        self.followers = 0
+        self._cond = threading.Condition()
+        self._waiters = set()       # (loop, asyncio.Event) of async followers
+
+    def _wake(self):
+        """Wake every follower (call with the lock held)"""
+        self._cond.notify_all()
+        for loop, event in list(self._waiters):
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # Follower's event loop is closed
+                self._waiters.discard((loop, event))
+
+    def push(self, text: str):
+        """Hand a piece of the reply to the followers"""
+        with self._cond:
+            self.parts.append(text)
+            self._wake()
+
+    def finish(self, error: BaseException = None, abandoned: bool = False):
+        """Mark the flight finished, failed or abandoned"""
+        with self._cond:
+            self.done = True
+            self.error = error
+            self.abandoned = abandoned
+            self._wake()
+
+    def _outcome(self):
+        """Raise the leader's failure, if any (call once every part has been read)"""
+        if self.abandoned:
+            raise FlightAbandoned(f"in-flight request {self.key[:12]} was abandoned")
+        if self.error is not None:
+            raise self.error
+
+    def follow(self):
+        """
+        Read the reply as the leader produces it
+
+        Yields:
+            Text pieces, from the first one on
+
+        Raises:
+            The leader's error, or FlightAbandoned
+        """
+        index = 0
+        while True:
+            with self._cond:
+                while index >= len(self.parts) and not self.done:
+                    self._cond.wait()
+                new = self.parts[index:]
+                done = self.done
+            index += len(new)
+            yield from new
+            if done and index >= len(self.parts):
+                self._outcome()
+                return
+
+    async def afollow(self):
+        """Async variant of follow(); waits without blocking the event loop"""
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._cond:
+            self._waiters.add(waiter)
+        try:
+            index = 0
+            while True:
+                with self._cond:
+                    new = self.parts[index:]
+                    done = self.done
+                    if not new and not done:
+                        waiter[1].clear()
+                if new:
+                    index += len(new)
+                    for part in new:
+                        yield part
+                elif done:
+                    self._outcome()
+                    return
+                else:
+                    await waiter[1].wait()
+        finally:
+            with self._cond:
+                self._waiters.discard(waiter)
+
+
+class SingleFlight:
+    def __init__(self):
+        """Initialize an empty set of in-flight requests"""
+        self._lock = threading.Lock()
+        self._flights = {}
+        self.stats = {
+            'leaders': 0,
+            'coalesced': 0,
+            'abandoned': 0,
+        }
+
+    def join(self, key: str) -> tuple:
+        """
+        Join the in-flight request for a key, or start one
+
+        Args:
+            key: Request identity (see ResponseCache.make_key)
+
+        Returns:
+            (flight, is_leader): the leader must make the request and call
+            land() when it is over; followers read flight.follow()
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None and not flight.done:
+                flight.followers += 1
+                self.stats['coalesced'] += 1
+                return flight, False
+
+            flight = Flight(key)
+            self._flights[key] = flight
+            self.stats['leaders'] += 1
+            return flight, True
+
+    def land(self, flight: Flight, error: BaseException = None, abandoned: bool = False):
+        """
+        End a flight; callers arriving afterwards start a new one
+
+        Args:
+            flight: The leader's flight
+            error: The leader's failure, shared with the followers
+            abandoned: The leader stopped early; followers make their own request
+        """
+        with self._lock:
+            if self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+            if abandoned and flight.followers:
+                self.stats['abandoned'] += 1
+        flight.finish(error, abandoned)
+
+    def release(self, flight: Flight) -> bool:
+        """
+        Ask whether a leader may stop before finishing
+
+        Args:
+            flight: The leader's flight
+
+        Returns:
+            True if nobody follows the flight (it is withdrawn, so nobody
+            joins it any more), False if followers wait on the reply
+        """
+        with self._lock:
+            if flight.followers:
+                return False
+            if self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+            return True
+
+    def get_stats(self) -> dict:
+        """Get a copy of the counters plus the number of requests in flight"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['in_flight'] = len(self._flights)
+        return stats